@@ -1,9 +1,14 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
 import time
 from datetime import datetime
-from db import save_campaign, get_campaigns, delete_campaign, generate_numeric_id, delete_influencer
+from db import save_campaign, get_campaign_summaries, count_campaigns, delete_campaign, generate_numeric_id, generate_numeric_ids, mint_share_token
+from profiling import start_rerun, span, render_timing_panel
+from charts import platform_pie, post_type_bar
+from shared_state import bootstrap_session, reload_campaign
+from concurrency import EditConflictError
+from resilience import BackendUnavailableError
+from undo import remember_campaign_delete, remember_influencer_delete, last_label, undo_last
 
 
 
@@ -15,6 +20,9 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Start recording per-rerun timings
+start_rerun("app")
+
 # Hide Streamlit's default GitHub link and menu
 hide_streamlit_elements = """
 <style>
@@ -32,13 +40,20 @@ st.markdown(hide_streamlit_elements, unsafe_allow_html=True)
 
 
 
-# Initialize session state variables if they don't exist
-if 'campaigns' not in st.session_state:
-    # Load campaigns from database
-    st.session_state.campaigns = get_campaigns()
+# Initialize session state variables if they don't exist.
+# Campaigns are loaded when opened (or deep-linked with ?campaign_id=); the
+# sidebar lists them from campaign_summaries. This also reloads campaigns
+# changed by other sessions or app processes.
+bootstrap_session(st.session_state, st.query_params)
+
+if 'campaign_list_pages' not in st.session_state:
+    st.session_state.campaign_list_pages = 1
 
-if 'current_campaign_id' not in st.session_state:
-    st.session_state.current_campaign_id = None
+# Tell the user if their last save clashed with someone else's
+if 'save_conflict' in st.session_state:
+    st.warning(st.session_state.pop('save_conflict'))
+if 'undo_message' in st.session_state:
+    st.info(st.session_state.pop('undo_message'))
 
 # Initialize form fields in session state if they don't exist
 if 'form_name' not in st.session_state:
@@ -65,7 +80,17 @@ def save_campaign_data():
     """Save campaign data to database"""
     if st.session_state.current_campaign_id:
         current_campaign = st.session_state.campaigns[st.session_state.current_campaign_id]
-        save_campaign(current_campaign)
+        try:
+            save_campaign(current_campaign)
+        except EditConflictError as e:
+            # Someone else saved overlapping changes first: show theirs instead
+            reload_campaign(st.session_state, current_campaign['id'])
+            st.session_state.save_conflict = str(e)
+            st.rerun()
+        except BackendUnavailableError as e:
+            # Nothing was lost: the edits stay in this session and go out with the next save
+            st.session_state.save_conflict = f"{e}. Your changes were not saved yet."
+            st.rerun()
 
 def reset_form_fields():
     """Reset all form fields to defaults"""
@@ -83,7 +108,7 @@ def reset_form_fields():
 st.title("Campaign Manager")
 
 # Sidebar for navigations
-with st.sidebar:
+with st.sidebar, span("render.sidebar", "render"):
     st.header("Navigation")
     
     # Campaign selection/creation section
@@ -102,7 +127,7 @@ with st.sidebar:
             # Create new campaign with numeric ID
             st.session_state.campaigns[str(new_id)] = {  # Convert to string for dictionary key
                 "id": new_id,  # Actual ID is numeric
-                "name": f"Campaign {len(st.session_state.campaigns) + 1}",
+                "name": f"Campaign {count_campaigns() + 1}",
                 "created_at": current_time,
                 "influencers": [],
                 "budget": 0,
@@ -113,15 +138,40 @@ with st.sidebar:
                     "total_shares": 0,
                     "total_comments": 0
                 },
-                "share_token": f"share_{new_id}"  # Use numeric ID in share token
+                "share_token": mint_share_token()  # Random token, checked for uniqueness
             }
             st.session_state.current_campaign_id = str(new_id)  # String for dictionary key
             save_campaign_data()  # Save to database
             st.rerun()
     
+    # Undo the last delete made in this session
+    undo_label = last_label(st.session_state)
+    if undo_label and st.button(f"Undo delete: {undo_label}"):
+        try:
+            st.session_state.undo_message = undo_last(st.session_state)
+        except BackendUnavailableError as e:
+            # The delete stays on the undo stack, so the button can be used again
+            st.session_state.save_conflict = f"{e}. The delete was not undone yet."
+        st.rerun()
+    
     # Display existing campaigns with delete option
     st.write("Select a campaign:")
     
+    # Search runs in the database; changing it starts the list from the first page again
+    campaign_search = st.text_input("Search campaigns", key="campaign_search", placeholder="Campaign name")
+    if st.session_state.get('campaign_list_search') != campaign_search:
+        st.session_state.campaign_list_search = campaign_search
+        st.session_state.campaign_list_pages = 1
+    
+    # One indexed query per page shown (keyset pagination, newest first)
+    campaign_summaries = []
+    next_after = None
+    for _ in range(st.session_state.campaign_list_pages):
+        page_rows, next_after = get_campaign_summaries(search=campaign_search, after=next_after)
+        campaign_summaries.extend(page_rows)
+        if next_after is None:
+            break
+    
     # Add this CSS fix for mobile sidebar columns
     st.markdown("""
     <style>
@@ -146,26 +196,33 @@ with st.sidebar:
     if hasattr(st.session_state, 'confirm_delete'):
         st.session_state.open_expander = st.session_state.confirm_delete
     
-    # Keep the existing campaigns loop
-    for campaign_id, campaign_data in st.session_state.campaigns.items():
+    for campaign_data in campaign_summaries:
+        campaign_id = str(campaign_data['campaign_id'])
+        
         # Check if this expander should be open (for delete confirmation)
         is_open = st.session_state.open_expander == campaign_id
         
         # Use an expander to group each campaign with its delete button
         with st.expander(f"{campaign_data['name']}", expanded=is_open):
+            st.caption(
+                f"{campaign_data['influencer_count']:,} influencers · "
+                f"{campaign_data['total_views']:,} views · created {campaign_data['created_at']}"
+            )
+            
             # Show delete confirmation within the expander if it matches
             if hasattr(st.session_state, 'confirm_delete') and st.session_state.confirm_delete == campaign_id:
-                st.warning("Are you sure you want to delete? This cannot be undone.")
+                st.warning("Are you sure you want to delete this campaign?")
                 
                 confirm_col1, confirm_col2 = st.columns(2)
                 with confirm_col1:
                     if st.button("Yes, Delete", key=f"confirm_delete_{campaign_id}"):
                         try:
-                            # Delete from database
-                            delete_campaign(st.session_state.campaigns[campaign_id]['id'])
+                            # Delete from database (soft delete, undoable from the sidebar)
+                            delete_campaign(campaign_data['campaign_id'])
+                            remember_campaign_delete(st.session_state, {"id": campaign_data['campaign_id'], "name": campaign_data['name']})
                             
                             # Delete from session state
-                            del st.session_state.campaigns[campaign_id]
+                            st.session_state.campaigns.pop(campaign_id, None)
                             
                             # Reset current campaign if it was the deleted one
                             if st.session_state.current_campaign_id == campaign_id:
@@ -189,6 +246,9 @@ with st.sidebar:
             else:
                 # Campaign select button
                 if st.button("Select this campaign", key=f"select_{campaign_id}", use_container_width=True):
+                    # Load the full campaign (with influencers) only when it is opened
+                    if campaign_id not in st.session_state.campaigns:
+                        reload_campaign(st.session_state, campaign_data['campaign_id'])
                     st.session_state.current_campaign_id = campaign_id
                     st.rerun()
                 
@@ -198,13 +258,17 @@ with st.sidebar:
                     st.session_state.open_expander = campaign_id
                     st.rerun()
     
+    if next_after is not None and st.button("Load more campaigns"):
+        st.session_state.campaign_list_pages += 1
+        st.rerun()
+    
   
    
 # Main content area
-if not st.session_state.campaigns:
+if not campaign_summaries and not campaign_search and not st.session_state.campaigns:
     st.info("Welcome to Campaign Manager! Get started by creating a new campaign in the sidebar.")
 else:
-    if st.session_state.current_campaign_id is None:
+    if st.session_state.current_campaign_id not in st.session_state.campaigns:
         st.info("Select a campaign from the sidebar or create a new one.")
     else:
         current_campaign = st.session_state.campaigns[st.session_state.current_campaign_id]
@@ -236,7 +300,7 @@ else:
         # Campaign tabs
         tab1, tab2, tab3 = st.tabs([" Dashboard", " Influencers", " Client Sharing"])
         
-        with tab1:
+        with tab1, span("render.dashboard_tab", "render"):
             st.header("Campaign Dashboard")
             
             # Display campaign metrics
@@ -262,43 +326,18 @@ else:
             if not current_campaign["influencers"]:
                 st.info("Add influencers to see performance charts")
             else:
-                # Create dataframe from influencers
-                influencers_df = pd.DataFrame(current_campaign["influencers"])
-                
-                # Platform distribution charts
+                # Platform distribution charts (cached per campaign revision)
                 chart_col1, chart_col2 = st.columns(2)
                 
-                with chart_col1:
+                with chart_col1, span("chart.platform_pie", "chart"):
                     # Platform distribution pie chart
-                    platform_counts = influencers_df['platform'].value_counts().reset_index()
-                    platform_counts.columns = ['Platform', 'Count']
-                    
-                    fig_platform = px.pie(
-                        platform_counts, 
-                        values='Count', 
-                        names='Platform',
-                        title='Influencers by Platform',
-                        hole=0.4,
-                        color_discrete_sequence=px.colors.qualitative.Pastel
-                    )
-                    st.plotly_chart(fig_platform, use_container_width=True)
+                    st.plotly_chart(platform_pie(current_campaign), use_container_width=True)
                 
-                with chart_col2:
+                with chart_col2, span("chart.post_type_bar", "chart"):
                     # Post type distribution
-                    post_counts = influencers_df['post_type'].value_counts().reset_index()
-                    post_counts.columns = ['Post Type', 'Count']
-                    
-                    fig_post = px.bar(
-                        post_counts,
-                        x='Post Type',
-                        y='Count',
-                        title='Content by Post Type',
-                        color='Post Type',
-                        color_discrete_sequence=px.colors.qualitative.Pastel
-                    )
-                    st.plotly_chart(fig_post, use_container_width=True)
+                    st.plotly_chart(post_type_bar(current_campaign), use_container_width=True)
         
-        with tab2:
+        with tab2, span("render.influencers_tab", "render"):
             st.header("Influencers Management")
             
             # Add new influencer form - using session state for field values
@@ -340,8 +379,8 @@ else:
                 # Submit button
                 submitted = st.form_submit_button("Add Influencer")
                 if submitted and name:
-                    # Create new influencer with numeric ID
-                    new_influencer_id = generate_numeric_id()
+                    # Create new influencer with an ID reserved from the database counter
+                    new_influencer_id = generate_numeric_ids(1)[0]
                     
                     # Create new influencer entry
                     new_influencer = {
@@ -381,7 +420,8 @@ else:
                 st.info("No influencers added yet")
             else:
                 # Create a dataframe for better display of all influencers with totals
-                influencer_df = pd.DataFrame(current_campaign["influencers"])
+                with span("frame.influencer_table", "frame"):
+                    influencer_df = pd.DataFrame(current_campaign["influencers"])
                 
                 # Calculate totals
                 totals = {
@@ -431,9 +471,7 @@ else:
                             # Delete button
                             if st.button("Delete", key=f"delete_{influencer['id']}"):
                                 try:
-                                    # First delete from database
-                                    delete_influencer(influencer['id'])
-                                    
+                                    # Removed from the database by save_campaign_data below
                                     # Update metrics before removing
                                     current_campaign["metrics"]["total_views"] -= int(influencer['views'])
                                     current_campaign["metrics"]["total_likes"] = current_campaign["metrics"].get("total_likes", 0) - int(influencer.get('likes', 0))
@@ -442,6 +480,7 @@ else:
                                     
                                     # Remove from list
                                     current_campaign["influencers"].pop(i)
+                                    remember_influencer_delete(st.session_state, current_campaign, [influencer])
                                     
                                     # Save updated campaign
                                     save_campaign_data()
@@ -451,7 +490,7 @@ else:
                                 except Exception as e:
                                     st.error(f"Error deleting influencer: {str(e)}")
         
-        with tab3:
+        with tab3, span("render.sharing_tab", "render"):
             st.header("Client Sharing")
             
             # Generate shareable link
@@ -594,4 +633,7 @@ def add_footer():
     st.markdown("---")
     st.markdown("Campaign Manager v1.0")
     st.markdown('</div>', unsafe_allow_html=True)
-add_footer()
\ No newline at end of file
+add_footer()
+
+# Show the admin timing panel (hidden unless requested) and export timings
+render_timing_panel()
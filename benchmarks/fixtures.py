@@ -0,0 +1,45 @@
+import numpy as np
+from synthetic import generate_influencers
+
+# Deterministic campaign fixtures for the benchmarks, built with the synthetic generator
+
+
+def make_campaign(campaign_id, influencer_count, seed=0):
+    """Build an in-memory campaign dict with influencer_count synthetic influencers"""
+    rng = np.random.default_rng(seed)
+    df = generate_influencers(rng, campaign_id, influencer_count, campaign_id * 10_000_000)
+    influencers = df.to_dict("records")
+
+    return {
+        "id": campaign_id,
+        "name": f"Benchmark {influencer_count}",
+        "created_at": "2025-01-01 00:00:00",
+        "share_token": f"bench{campaign_id}",
+        "budget": 100000.0,
+        "metrics": {
+            "total_reach": 0,
+            "total_views": int(df["views"].sum()),
+            "total_likes": int(df["likes"].sum()),
+            "total_shares": int(df["shares"].sum()),
+            "total_comments": int(df["comments"].sum()),
+        },
+        "sharing_settings": {
+            "include_dashboard": True,
+            "include_metrics": True,
+            "include_engagement_metrics": True,
+            "include_budget": True,
+            "include_influencer_details": True,
+        },
+        "influencers": influencers,
+    }
+
+
+def campaign_csv(campaign):
+    """Render a campaign's influencers in the CSV import template format"""
+    lines = ["name,platform,post_type,views,likes,shares,comments,post_url"]
+    for inf in campaign["influencers"]:
+        lines.append(
+            f"{inf['name']},{inf['platform']},{inf['post_type']},{inf['views']},"
+            f"{inf['likes']},{inf['shares']},{inf['comments']},{inf['post_url']}"
+        )
+    return "\n".join(lines) + "\n"
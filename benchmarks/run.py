@@ -0,0 +1,271 @@
+"""Benchmark the data layer and page renders against the local SQLite backend.
+
+Usage:
+    python -m benchmarks.run [--sizes 10,1000,100000] [--page-sizes 10,1000]
+                             [--repeat 3] [--skip-startup] [--output PATH] [--baseline PATH]
+
+Results are written as JSON. Pass --baseline with an earlier results file to
+print the ratio for every benchmark and flag regressions.
+"""
+import argparse
+import copy
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+# Benchmarks always run against an in-memory local stand-in, never a real
+# Supabase project or an existing SQLite file (tables are reset between runs).
+# Snapshot publishing is off for the save benchmarks and timed separately.
+os.environ["LTCO_BACKEND"] = "sqlite"
+os.environ["LTCO_SQLITE_PATH"] = ":memory:"
+os.environ["LTCO_SNAPSHOTS"] = "off"
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import db  # noqa: E402
+import snapshots  # noqa: E402
+from csv_import import read_influencer_csv, build_influencers, add_influencers_to_campaign, plan_upsert, apply_upsert  # noqa: E402
+from benchmarks.fixtures import make_campaign, campaign_csv  # noqa: E402
+from benchmarks.startup import page_imports, import_profile  # noqa: E402
+
+PAGES = [
+    "app.py",
+    "pages/campaign_dashboard.py",
+    "pages/influencer_management.py",
+    "pages/client_sharing.py",
+    "pages/client_view.py",
+]
+
+# Ratio above which a benchmark is reported as a regression against the baseline
+REGRESSION_THRESHOLD = 1.2
+
+
+def measure(func, repeat, setup=None, warmup=0):
+    """Run func repeat times (after untimed warmup runs) and return timing stats in milliseconds"""
+    for _ in range(warmup):
+        if setup:
+            setup()
+        func()
+
+    runs = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        func()
+        runs.append((time.perf_counter() - start) * 1000)
+
+    return {
+        "runs_ms": [round(run, 3) for run in runs],
+        "min_ms": round(min(runs), 3),
+        "median_ms": round(statistics.median(runs), 3),
+        "mean_ms": round(statistics.mean(runs), 3),
+    }
+
+
+def bench_data_layer(size, repeat):
+    """Time the db functions and CSV import path for one campaign size"""
+    results = []
+    campaign = make_campaign(1, size, seed=size)
+
+    def reset():
+        db.supabase.reset()
+
+    def save():
+        db.save_campaign(copy.deepcopy(campaign))
+
+    results.append(("db.save_campaign", measure(save, repeat, setup=reset)))
+
+    # Seed once for the read benchmarks
+    reset()
+    save()
+    results.append(("db.get_campaigns", measure(db.get_campaigns, repeat)))
+    results.append(("db.get_campaign_by_share_token",
+                    measure(lambda: db.get_campaign_by_share_token(campaign["share_token"]), repeat)))
+
+    csv_text = campaign_csv(campaign)
+
+    def import_csv():
+        target = make_campaign(2, 0)
+        df = read_influencer_csv(io.StringIO(csv_text))
+        new_influencers, totals = build_influencers(df)
+        add_influencers_to_campaign(target, new_influencers, totals)
+        db.save_campaign(target)
+
+    results.append(("csv_import", measure(import_csv, repeat, setup=reset)))
+
+    # Metric refresh: re-upload the same CSV in upsert mode with 1% of rows changed
+    refresh_df = read_influencer_csv(io.StringIO(csv_text))
+    refresh_df.loc[refresh_df.index[::100], "views"] += 1
+    state = {}
+
+    def seed_refresh():
+        reset()
+        state["campaign"] = copy.deepcopy(campaign)
+        db.save_campaign(state["campaign"])
+
+    def upsert_csv():
+        target = state["campaign"]
+        plan = plan_upsert(target, refresh_df)
+        db.save_campaign_changes(target, apply_upsert(target, plan))
+
+    results.append(("csv_import.upsert", measure(upsert_csv, repeat, setup=seed_refresh)))
+
+    with tempfile.TemporaryDirectory() as snapshot_dir:
+        snapshots.SNAPSHOT_DIR = snapshot_dir
+        results.append(("snapshots.publish_snapshot",
+                        measure(lambda: snapshots.publish_snapshot(copy.deepcopy(campaign)), repeat)))
+    return results
+
+
+def bench_pages(size, repeat):
+    """Time a headless AppTest render of the app and every page for one campaign size"""
+    from streamlit.testing.v1 import AppTest
+
+    campaign = make_campaign(1, size, seed=size)
+    db.supabase.reset()
+    db.save_campaign(copy.deepcopy(campaign))
+
+    campaigns = db.get_campaigns()
+
+    results = []
+    for page in PAGES:
+        state = {}
+
+        def setup():
+            # A fresh AppTest per run so every render starts from a new session
+            at = AppTest.from_file(os.path.join(ROOT, page), default_timeout=600)
+            if page.endswith("client_view.py"):
+                at.query_params["token"] = campaign["share_token"]
+            else:
+                at.session_state["campaigns"] = copy.deepcopy(campaigns)
+                at.session_state["current_campaign_id"] = str(campaign["id"])
+            state["at"] = at
+
+        def render():
+            state["at"].run()
+            if state["at"].exception:
+                raise RuntimeError(f"{page} raised: {state['at'].exception[0].message}")
+
+        results.append((f"render.{page}", measure(render, repeat, setup=setup, warmup=1)))
+
+    # The shared client link served from a published snapshot instead of the database
+    with tempfile.TemporaryDirectory() as snapshot_dir:
+        snapshots.SNAPSHOT_DIR = snapshot_dir
+        snapshots.SNAPSHOT_MODE = "sync"
+        try:
+            snapshots.publish_snapshot(campaigns[str(campaign["id"])])
+            page = "pages/client_view.py"
+            results.append(("render.pages/client_view.py[snapshot]",
+                            measure(render, repeat, setup=setup, warmup=1)))
+        finally:
+            snapshots.SNAPSHOT_MODE = "off"
+    return results
+
+
+def bench_startup(repeat):
+    """Time a cold import of every page's modules in a fresh interpreter"""
+    return [
+        (f"startup.{page}", measure(lambda: import_profile(page_imports(page)), repeat))
+        for page in PAGES
+    ]
+
+
+def git_revision():
+    """Return the current git commit, if available"""
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=ROOT, text=True).strip()
+    except Exception:
+        return None
+
+
+def compare(results, baseline):
+    """Print current vs baseline medians and return the regressed benchmark keys"""
+    previous = {f"{r['name']}[{r['size']}]": r for r in baseline["results"]}
+    regressions = []
+
+    print(f"{'benchmark':<50} {'baseline':>12} {'current':>12} {'ratio':>8}")
+    for result in results:
+        key = f"{result['name']}[{result['size']}]"
+        if key not in previous:
+            continue
+        old = previous[key]["median_ms"]
+        new = result["median_ms"]
+        ratio = new / old if old else float("inf")
+        flag = "  REGRESSION" if ratio > REGRESSION_THRESHOLD else ""
+        print(f"{key:<50} {old:>10.2f}ms {new:>10.2f}ms {ratio:>7.2f}x{flag}")
+        if flag:
+            regressions.append(key)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the data layer and page renders")
+    parser.add_argument("--sizes", default="10,1000,100000",
+                        help="influencer counts for the data layer benchmarks")
+    parser.add_argument("--page-sizes", default="10,1000",
+                        help="influencer counts for the page render benchmarks (empty to skip)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--skip-startup", action="store_true", help="skip the cold import benchmarks")
+    parser.add_argument("--output", help="results file (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--baseline", help="earlier results file to compare against")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args(argv)
+
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+    page_sizes = [int(s) for s in args.page_sizes.split(",") if s]
+
+    results = []
+    for size in sizes:
+        for name, stats in bench_data_layer(size, args.repeat):
+            results.append({"name": name, "size": size, **stats})
+            print(f"{name:<45} n={size:<8} median {stats['median_ms']:10.2f} ms")
+
+    for size in page_sizes:
+        for name, stats in bench_pages(size, args.repeat):
+            results.append({"name": name, "size": size, **stats})
+            print(f"{name:<45} n={size:<8} median {stats['median_ms']:10.2f} ms")
+
+    if not args.skip_startup:
+        for name, stats in bench_startup(args.repeat):
+            results.append({"name": name, "size": 0, **stats})
+            print(f"{name:<45} {'':<10} median {stats['median_ms']:10.2f} ms")
+
+    report = {
+        "meta": {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "backend": db.BACKEND,
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+
+    output = args.output or os.path.join(
+        ROOT, "benchmarks", "results", f"{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f))
+        if regressions and args.fail_on_regression:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
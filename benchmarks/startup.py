@@ -0,0 +1,80 @@
+"""Report what importing each page costs on a cold start.
+
+Usage:
+    python -m benchmarks.startup [--repeat 3] [--top 8]
+
+Every page's top-level imports are run in a fresh interpreter under
+`python -X importtime`, so the numbers match a new autoscaled container
+rather than a warm process. For each page this prints the total import time
+and the packages that took longest (cumulative, including their own imports).
+"""
+import argparse
+import ast
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PAGES = [
+    "app.py",
+    "pages/campaign_dashboard.py",
+    "pages/influencer_management.py",
+    "pages/client_sharing.py",
+    "pages/client_view.py",
+]
+
+
+def page_imports(path):
+    """Return the module-level import statements of a page as source lines"""
+    with open(os.path.join(ROOT, path), encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=path)
+    return [ast.unparse(node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))]
+
+
+def import_profile(statements):
+    """Run the import statements in a fresh interpreter and return {package: cumulative ms}"""
+    env = dict(os.environ, LTCO_BACKEND=os.environ.get("LTCO_BACKEND", "sqlite"))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "\n".join(statements)],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+    )
+
+    packages = {}
+    for line in result.stderr.splitlines():
+        # "import time:  self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # Only top-level entries; nested ones are already in their parent's cumulative time
+        if name.startswith(" ") and not name.startswith("  "):
+            packages[name.strip()] = int(cumulative) / 1000
+    return packages
+
+
+def profile_page(path, repeat):
+    """Return (median total ms, {package: median ms}) over repeat cold imports of a page"""
+    runs = [import_profile(page_imports(path)) for _ in range(repeat)]
+    names = set().union(*runs)
+    packages = {name: statistics.median(run.get(name, 0.0) for run in runs) for name in names}
+    total = statistics.median(sum(run.values()) for run in runs)
+    return total, packages
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Profile the cold-start import cost of every page")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--top", type=int, default=8, help="packages listed per page")
+    args = parser.parse_args(argv)
+
+    for page in PAGES:
+        total, packages = profile_page(page, args.repeat)
+        print(f"{page:<40} {total:10.1f} ms")
+        for name, ms in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+            print(f"    {name:<36} {ms:10.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
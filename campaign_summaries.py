@@ -0,0 +1,66 @@
+import argparse
+import sys
+
+# Campaign list projection (pure helpers; db.py does the I/O).
+#
+# campaign_summaries holds one row per live campaign with what the sidebar
+# shows: name, created_at, influencer count and metric totals. db.py
+# rewrites a campaign's row on every save (from the influencers it already
+# has in memory), removes it on delete and writes it again on restore, so
+# listing campaigns never loads influencers.
+#
+# The list is keyset-paginated on campaign_id, newest first (ids are
+# creation timestamps in milliseconds), and name search runs in the query.
+#
+# Supabase needs the same table as local_backend.SCHEMA. For fast
+# substring search over many campaigns add a trigram index:
+#   create extension if not exists pg_trgm;
+#   create index campaign_summaries_name_trgm on campaign_summaries using gin (name gin_trgm_ops);
+#
+# Usage:
+#     python campaign_summaries.py rebuild    # fill the table for existing campaigns once
+
+SUMMARY_PAGE_SIZE = 50
+
+METRIC_TOTALS = {
+    "views": "total_views",
+    "likes": "total_likes",
+    "shares": "total_shares",
+    "comments": "total_comments",
+}
+
+
+def summary_row(campaign, campaign_id, influencers=None):
+    """Build the campaign_summaries row for a campaign and its influencers"""
+    influencers = campaign.get("influencers", []) if influencers is None else influencers
+    row = {
+        "campaign_id": campaign_id,
+        "name": campaign.get("name"),
+        "created_at": campaign.get("created_at"),
+        "influencer_count": len(influencers),
+    }
+    for field, total in METRIC_TOTALS.items():
+        row[total] = sum(int(inf.get(field) or 0) for inf in influencers)
+    return row
+
+
+def name_pattern(search):
+    """Turn user search text into a case-insensitive substring pattern for ilike"""
+    escaped = search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Maintain the campaign list projection")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("rebuild", help="recompute the summary row of every campaign")
+    parser.parse_args(argv)
+
+    import db
+
+    print(f"Rebuilt {db.rebuild_campaign_summaries()} campaign summaries")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,326 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import shared_state
+from lazy_imports import lazy_import
+from profiling import timed
+
+# Only needed to build figures; cache hits never import them
+pd = lazy_import("pandas")
+px = lazy_import("plotly.express")
+go = lazy_import("plotly.graph_objects")
+
+# Shared chart builders with a process-wide figure cache.
+#
+# Figures are cached as serialized Plotly JSON, keyed by chart name, the
+# campaign's influencer fingerprint and the chart parameters. A cache hit
+# skips both the pandas aggregation and the Plotly Express construction.
+# The cache is an LRU bounded by the total size of the stored JSON. When
+# shared_state has a shared backend (sqlite/redis), misses fall through to
+# it so figures built by one app process are reused by the others; keys are
+# therefore hashed with a digest that is stable across processes.
+
+FIGURE_CACHE_BYTES = int(os.getenv("LTCO_FIGURE_CACHE_BYTES", str(64 * 1024 * 1024)))
+
+
+class FigureCache:
+    """Thread-safe LRU cache of JSON strings with a byte budget"""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """Return the cached JSON for key, or None"""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        """Store JSON for key, evicting least recently used entries over the budget"""
+        size = len(value)
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old)
+            self._entries[key] = value
+            self._bytes += size
+
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop all cached figures"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """Return cache size and hit counters"""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+figure_cache = FigureCache(FIGURE_CACHE_BYTES)
+
+
+def stable_hash(value):
+    """Return a digest of repr(value) that is the same in every process"""
+    return hashlib.blake2b(repr(value).encode(), digest_size=16).hexdigest()
+
+
+def influencers_fingerprint(campaign):
+    """Return a fingerprint of the influencer fields the charts depend on.
+
+    Memoized on the campaign dict until its revision (bumped by db.save_campaign)
+    or influencer count changes, so unchanged campaigns don't rehash every rerun.
+    """
+    influencers = campaign.get("influencers") or []
+    marker = (campaign.get("revision"), len(influencers))
+    memo = campaign.get("_fingerprint")
+    if memo is not None and memo[0] == marker:
+        return memo[1]
+
+    fingerprint = (len(influencers), stable_hash(tuple(
+        (inf.get("platform"), inf.get("post_type"), inf.get("views", 0),
+         inf.get("likes", 0), inf.get("shares", 0), inf.get("comments", 0))
+        for inf in influencers
+    )))
+    campaign["_fingerprint"] = (marker, fingerprint)
+    return fingerprint
+
+
+def _cached_json(key, build):
+    """Return the JSON for key from the cache, building and storing it on a miss"""
+    cached = figure_cache.get(key)
+    if cached is None:
+        shared_key = "fig:" + stable_hash(key)
+        cached = shared_state.cache_get(shared_key)
+        if cached is None:
+            cached = build()
+            shared_state.cache_set(shared_key, cached)
+        figure_cache.put(key, cached)
+    return cached
+
+
+def _cached_figure(name, campaign, params, build):
+    """Return a cached figure as a dict ready for st.plotly_chart"""
+    fingerprint = influencers_fingerprint(campaign) if campaign is not None else None
+    key = (name, fingerprint, params)
+    return json.loads(_cached_json(key, lambda: build().to_json()))
+
+
+def _influencers_df(campaign):
+    """Build the influencers DataFrame (only called on cache misses)"""
+    return pd.DataFrame(campaign["influencers"])
+
+
+def influencer_totals(campaign):
+    """Return summed views/likes/shares/comments over the campaign's influencers"""
+    def build():
+        df = _influencers_df(campaign)
+        return json.dumps({
+            col: int(df[col].sum()) if col in df.columns else 0
+            for col in ("views", "likes", "shares", "comments")
+        })
+
+    key = ("totals", influencers_fingerprint(campaign), None)
+    return json.loads(_cached_json(key, build))
+
+
+@timed("chart.build.platform_pie", kind="chart")
+def _build_platform_pie(campaign):
+    platform_counts = _influencers_df(campaign)['platform'].value_counts().reset_index()
+    platform_counts.columns = ['Platform', 'Count']
+
+    return px.pie(
+        platform_counts,
+        values='Count',
+        names='Platform',
+        title='Influencers by Platform',
+        hole=0.4,
+        color_discrete_sequence=px.colors.qualitative.Pastel
+    )
+
+
+def platform_pie(campaign):
+    """Influencers by platform donut chart"""
+    return _cached_figure("platform_pie", campaign, None, lambda: _build_platform_pie(campaign))
+
+
+@timed("chart.build.post_type_bar", kind="chart")
+def _build_post_type_bar(campaign):
+    post_counts = _influencers_df(campaign)['post_type'].value_counts().reset_index()
+    post_counts.columns = ['Post Type', 'Count']
+
+    return px.bar(
+        post_counts,
+        x='Post Type',
+        y='Count',
+        title='Content by Post Type',
+        color='Post Type',
+        color_discrete_sequence=px.colors.qualitative.Pastel
+    )
+
+
+def post_type_bar(campaign):
+    """Content by post type bar chart"""
+    return _cached_figure("post_type_bar", campaign, None, lambda: _build_post_type_bar(campaign))
+
+
+@timed("chart.build.views_by_platform", kind="chart")
+def _build_views_by_platform(campaign):
+    platform_views = _influencers_df(campaign).groupby('platform')['views'].sum().reset_index()
+
+    return px.bar(
+        platform_views,
+        x='platform',
+        y='views',
+        title='Views by Platform',
+        labels={'platform': 'Platform', 'views': 'Views'},
+        color='platform',
+        color_discrete_sequence=px.colors.qualitative.Pastel
+    )
+
+
+def views_by_platform(campaign):
+    """Total views per platform bar chart"""
+    return _cached_figure("views_by_platform", campaign, None, lambda: _build_views_by_platform(campaign))
+
+
+@timed("chart.build.engagement_by_platform", kind="chart")
+def _build_engagement_by_platform(campaign, title, axis_labels):
+    engagement_data = _influencers_df(campaign).groupby('platform').agg({
+        'likes': 'sum',
+        'shares': 'sum',
+        'comments': 'sum'
+    }).reset_index()
+
+    # Reshape for plotting
+    engagement_melted = pd.melt(
+        engagement_data,
+        id_vars=['platform'],
+        value_vars=['likes', 'shares', 'comments'],
+        var_name='Engagement Type',
+        value_name='Count'
+    )
+
+    return px.bar(
+        engagement_melted,
+        x='platform',
+        y='Count',
+        color='Engagement Type',
+        title=title,
+        labels={'platform': 'Platform', 'Count': 'Number of Engagements'} if axis_labels else None,
+        barmode='group',
+        color_discrete_sequence=px.colors.qualitative.Pastel
+    )
+
+
+def engagement_by_platform(campaign, title='Engagement by Platform', axis_labels=False):
+    """Grouped likes/shares/comments per platform bar chart"""
+    return _cached_figure(
+        "engagement_by_platform", campaign, (title, axis_labels),
+        lambda: _build_engagement_by_platform(campaign, title, axis_labels)
+    )
+
+
+@timed("chart.build.efficiency_gauge", kind="chart")
+def _build_efficiency_gauge(views_per_rupee, threshold):
+    gauge = {
+        'axis': {'range': [0, views_per_rupee * 2]},
+        'bar': {'color': "lightblue"},
+        'steps': [
+            {'range': [0, views_per_rupee/2], 'color': "lightgray"},
+            {'range': [views_per_rupee/2, views_per_rupee * 1.5], 'color': "gray"}
+        ],
+    }
+    if threshold:
+        gauge['threshold'] = {
+            'line': {'color': "red", 'width': 4},
+            'thickness': 0.75,
+            'value': views_per_rupee * 1.5
+        }
+
+    return go.Figure(go.Indicator(
+        mode="gauge+number",
+        value=views_per_rupee,
+        title={'text': "Views per ₹"},
+        gauge=gauge
+    ))
+
+
+def efficiency_gauge(views_per_rupee, threshold=False):
+    """Views per rupee gauge"""
+    return _cached_figure(
+        "efficiency_gauge", None, (views_per_rupee, threshold),
+        lambda: _build_efficiency_gauge(views_per_rupee, threshold)
+    )
+
+
+@timed("chart.build.number_indicator", kind="chart")
+def _build_number_indicator(value, title, mode):
+    fig = go.Figure()
+    fig.add_trace(go.Indicator(
+        mode=mode,
+        value=value,
+        title={"text": title},
+        domain={'x': [0, 1], 'y': [0, 1]}
+    ))
+    return fig
+
+
+def number_indicator(value, title, mode="number"):
+    """Single big-number indicator"""
+    return _cached_figure(
+        "number_indicator", None, (value, title, mode),
+        lambda: _build_number_indicator(value, title, mode)
+    )
+
+
+@timed("chart.build.metrics_trend", kind="chart")
+def _build_metrics_trend(trend, metric, period):
+    label = metric.capitalize()
+    return px.line(
+        trend,
+        x='bucket',
+        y=metric,
+        title=f'{label} Over Time',
+        labels={'bucket': 'Week' if period == 'week' else 'Date', metric: f'Total {label}'},
+        markers=True,
+        color_discrete_sequence=px.colors.qualitative.Pastel
+    )
+
+
+def metrics_trend(trend, metric='views', period='day'):
+    """Running total of one metric per day or week (trend from db.get_metric_trend)"""
+    data_key = stable_hash(tuple(zip(trend['bucket'].astype(str), trend[metric].tolist())))
+    return _cached_figure(
+        "metrics_trend", None, (data_key, metric, period),
+        lambda: _build_metrics_trend(trend, metric, period)
+    )
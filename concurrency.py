@@ -0,0 +1,210 @@
+import copy
+
+# Optimistic concurrency helpers for campaign saves (pure functions; db.py does the I/O).
+#
+# campaigns and influencers carry a version column. A campaign loaded from
+# the database remembers what it looked like in campaign["_base"]: the
+# campaign version, its editable fields and (version, values) for every
+# influencer. db.save_campaign writes the campaign row only if its version
+# still matches the base (compare-and-swap) and then writes just the
+# influencers that differ from the base, each only if its row is still at the
+# version in the base. An influencer another session saved in between is not
+# overwritten: the save reports it as a conflict (see db._write_influencers).
+#
+# When another session saved first, the stored campaign is merged into the
+# session's one: fields and influencers changed on only one side are kept,
+# metric totals combine both sides' increments, and the save is retried.
+# Only edits to the same field or influencer on both sides are a conflict.
+#
+# Each campaign update also stores a random save_token. If a save fails
+# without knowing whether the update committed (a lost response), the next
+# save finds its own token on the stored row and continues from that row
+# instead of merging its own changes in a second time.
+#
+# Supabase needs `version integer not null default 0` on both tables and
+# `save_token text` on campaigns.
+
+CAMPAIGN_FIELDS = ("name", "budget", "share_token", "sharing_settings", "metrics")
+
+INFLUENCER_FIELDS = ("name", "username", "platform", "post_type", "post_url",
+                     "views", "likes", "shares", "comments")
+
+METRIC_FIELDS = ("views", "likes", "shares", "comments")
+
+
+class EditConflictError(Exception):
+    """Raised when a save overlaps with changes another session saved first"""
+
+    def __init__(self, campaign_id, conflicts):
+        self.campaign_id = campaign_id
+        self.conflicts = conflicts
+        super().__init__(
+            "This campaign was changed by someone else while you were editing: "
+            + "; ".join(conflicts)
+        )
+
+
+def influencer_values(influencer):
+    """Return the saved fields of an influencer as a comparable tuple"""
+    values = []
+    for field in INFLUENCER_FIELDS:
+        value = influencer.get(field)
+        if field in METRIC_FIELDS:
+            values.append(int(value or 0))
+        else:
+            values.append("" if value is None else str(value))
+    return tuple(values)
+
+
+def remember_base(campaign):
+    """Record the campaign as last loaded or saved; later saves are compared against it"""
+    campaign["_base"] = {
+        "version": campaign.get("version", 0),
+        "fields": {field: copy.deepcopy(campaign.get(field)) for field in CAMPAIGN_FIELDS},
+        "influencers": {
+            inf["id"]: (inf.get("version", 0), influencer_values(inf))
+            for inf in campaign.get("influencers", [])
+        },
+    }
+    return campaign
+
+
+def detached_copy(campaign):
+    """Deep copy of a campaign (with its base) that can be edited and saved outside the session.
+
+    Used by background jobs; the session's own copy is reloaded through the
+    change feed once the job has saved.
+    """
+    return copy.deepcopy({key: value for key, value in campaign.items() if key not in ("_frame", "_ranking", "_fingerprint")})
+
+
+def base_metrics(base):
+    """Map influencer id -> metric tuple as of the base (what is stored before a save)"""
+    positions = [INFLUENCER_FIELDS.index(field) for field in METRIC_FIELDS]
+    return {
+        influencer_id: tuple(values[i] for i in positions)
+        for influencer_id, (_, values) in base["influencers"].items()
+    }
+
+
+def local_changes(campaign, candidates=None):
+    """Return (changed, deleted_ids): influencers new or edited since the base, and ids removed.
+
+    With candidates, only those influencers are checked and removals are not
+    looked for (the caller knows which rows it touched).
+    """
+    rows = campaign["_base"]["influencers"]
+    influencers = campaign.get("influencers", []) if candidates is None else candidates
+    changed = []
+    for inf in influencers:
+        known = rows.get(inf.get("id"))
+        if known is None or influencer_values(inf) != known[1]:
+            changed.append(inf)
+    if candidates is not None:
+        return changed, []
+    present = {inf.get("id") for inf in campaign.get("influencers", [])}
+    return changed, [influencer_id for influencer_id in rows if influencer_id not in present]
+
+
+def mark_saved(campaign, version, written, deleted_ids):
+    """Move the base forward after a successful save of written/deleted influencers"""
+    base = campaign["_base"]
+    base["version"] = version
+    base["fields"] = {field: copy.deepcopy(campaign.get(field)) for field in CAMPAIGN_FIELDS}
+    rows = base["influencers"]
+    for inf in written:
+        rows[inf["id"]] = (inf["version"], influencer_values(inf))
+    for influencer_id in deleted_ids:
+        rows.pop(influencer_id, None)
+
+
+def adopt_own_write(campaign, stored):
+    """Rebase the campaign on a stored row that this session's own earlier save wrote.
+
+    Nobody saved in between (the row still carries our save token), so the
+    session's values simply replace it on the next write; influencers are
+    left to local_changes, since their writes may not have happened.
+    """
+    base = campaign["_base"]
+    base["version"] = stored.get("version", 0)
+    base["fields"] = {field: copy.deepcopy(stored.get(field)) for field in CAMPAIGN_FIELDS}
+
+
+def _merge_metrics(ours, theirs, was):
+    """Combine metric totals by adding our increments to the stored values"""
+    ours, theirs, was = ours or {}, theirs or {}, was or {}
+    merged = dict(theirs)
+    for key, value in ours.items():
+        before = was.get(key, 0)
+        if isinstance(value, (int, float)) and isinstance(before, (int, float)):
+            merged[key] = theirs.get(key, 0) + value - before
+        elif value != was.get(key):
+            merged[key] = value
+    return merged
+
+
+def merge_campaign(campaign, current):
+    """Merge the stored campaign (current, freshly loaded) into the session's campaign.
+
+    Returns a list of conflict descriptions. Without conflicts the campaign is
+    updated in place and rebased on current, ready for the save to be retried;
+    with conflicts it is left untouched.
+    """
+    base = campaign["_base"]
+    conflicts = []
+
+    fields = {}
+    for field in CAMPAIGN_FIELDS:
+        ours, theirs, was = campaign.get(field), current.get(field), base["fields"].get(field)
+        if field == "metrics":
+            fields[field] = _merge_metrics(ours, theirs, was)
+        elif ours == was or ours == theirs:
+            fields[field] = theirs
+        elif theirs == was:
+            fields[field] = ours
+        else:
+            conflicts.append(f"campaign {field.replace('_', ' ')}")
+
+    rows = base["influencers"]
+    stored = {inf["id"]: inf for inf in current.get("influencers", [])}
+    merged = []
+    seen = set()
+    for inf in campaign.get("influencers", []):
+        influencer_id = inf.get("id")
+        seen.add(influencer_id)
+        known = rows.get(influencer_id)
+        theirs = stored.get(influencer_id)
+        if known is None:
+            # Added in this session
+            merged.append(inf)
+            continue
+        ours_changed = influencer_values(inf) != known[1]
+        if theirs is None:
+            if ours_changed:
+                conflicts.append(f"{inf.get('name')} was deleted")
+            continue
+        theirs_changed = theirs.get("version", 0) != known[0]
+        if not ours_changed:
+            merged.append(theirs)
+        elif theirs_changed and influencer_values(theirs) != influencer_values(inf):
+            conflicts.append(f"{inf.get('name')} was edited")
+        else:
+            merged.append(inf)
+
+    for influencer_id, (version, _) in rows.items():
+        theirs = stored.get(influencer_id)
+        if influencer_id not in seen and theirs is not None and theirs.get("version", 0) != version:
+            conflicts.append(f"{theirs.get('name')} was edited after you removed it")
+
+    # Added by the other session
+    merged.extend(inf for influencer_id, inf in stored.items()
+                  if influencer_id not in rows and influencer_id not in seen)
+
+    if conflicts:
+        return conflicts
+
+    campaign.update(fields)
+    campaign["influencers"][:] = merged
+    campaign["version"] = current.get("version", 0)
+    campaign["_base"] = current["_base"]
+    return []
@@ -0,0 +1,301 @@
+import hashlib
+import io
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+from db import generate_numeric_ids, save_campaign, save_campaign_changes
+
+# CSV import helpers shared by the Bulk Operations tab and the benchmarks
+#
+# Streamlit reruns the page on every widget interaction while a file sits in
+# the uploader. The page previews and checks the header from the first rows
+# only, and parses the whole file when the user plans or starts an import;
+# parsed uploads are cached by a hash of their bytes so that parse happens
+# once per file. Cached frames are shared and must not be modified in place.
+
+PREVIEW_ROWS = 5
+PARSED_CACHE_ENTRIES = 4
+
+REQUIRED_COLUMNS = ["name", "platform", "post_type", "views"]
+
+METRIC_COLUMNS = ["views", "likes", "shares", "comments"]
+TEXT_COLUMNS = ["name", "username", "platform", "post_type", "post_url"]
+
+# Fields compared when deciding whether a matched influencer changed
+COMPARED_COLUMNS = ["name", "post_type", "post_url"] + METRIC_COLUMNS
+
+
+def read_influencer_csv(file):
+    """Read an uploaded influencer CSV into a DataFrame"""
+    return pd.read_csv(file)
+
+
+def missing_columns(df):
+    """Return the required columns that are missing from the frame"""
+    return [col for col in REQUIRED_COLUMNS if col not in df.columns]
+
+
+_parsed_lock = threading.Lock()
+_parsed = OrderedDict()
+
+
+def upload_key(data):
+    """Content hash identifying an uploaded file's bytes"""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def parse_influencer_csv(data):
+    """Parse and validate CSV bytes once per distinct content.
+
+    Returns a dict with the content key, the parsed frame and the missing
+    required columns. Results for the last PARSED_CACHE_ENTRIES files are kept.
+    """
+    key = upload_key(data)
+    with _parsed_lock:
+        parsed = _parsed.get(key)
+        if parsed is not None:
+            _parsed.move_to_end(key)
+            return parsed
+
+    df = read_influencer_csv(io.BytesIO(data))
+    parsed = {"key": key, "frame": df, "missing": missing_columns(df)}
+
+    with _parsed_lock:
+        _parsed[key] = parsed
+        while len(_parsed) > PARSED_CACHE_ENTRIES:
+            _parsed.popitem(last=False)
+    return parsed
+
+
+def preview_influencer_csv(data, rows=PREVIEW_ROWS):
+    """Return the first rows of CSV bytes without parsing the whole file"""
+    with _parsed_lock:
+        parsed = _parsed.get(upload_key(data))
+    if parsed is not None:
+        return parsed["frame"].head(rows)
+    return pd.read_csv(io.BytesIO(data), nrows=rows)
+
+
+def build_influencers(df):
+    """Convert CSV rows to influencer records and return them with metric totals"""
+    new_influencers = []
+    totals = {
+        "total_views": 0,
+        "total_likes": 0,
+        "total_shares": 0,
+        "total_comments": 0
+    }
+
+    # One block of IDs for the whole file; per-row timestamps collide within a millisecond
+    for (_, row), new_influencer_id in zip(df.iterrows(), generate_numeric_ids(len(df))):
+        # Create new influencer entry
+        new_influencer = {
+            "id": new_influencer_id,
+            "name": row["name"],
+            "platform": row["platform"],
+            "post_type": row["post_type"],
+            "views": int(row["views"]),
+            "likes": int(row.get("likes", 0)),
+            "shares": int(row.get("shares", 0)),
+            "comments": int(row.get("comments", 0))
+        }
+
+        # Add username and post_url if they exist
+        if "username" in df.columns:
+            new_influencer["username"] = row.get("username", "")
+        if "post_url" in df.columns:
+            new_influencer["post_url"] = row.get("post_url", "")
+
+        new_influencers.append(new_influencer)
+
+        # Update totals
+        totals["total_views"] += new_influencer["views"]
+        totals["total_likes"] += new_influencer["likes"]
+        totals["total_shares"] += new_influencer["shares"]
+        totals["total_comments"] += new_influencer["comments"]
+
+    return new_influencers, totals
+
+
+def add_influencers_to_campaign(campaign, new_influencers, totals):
+    """Append imported influencers to a campaign and update its metrics"""
+    campaign["influencers"].extend(new_influencers)
+
+    metrics = campaign["metrics"]
+    for key, value in totals.items():
+        metrics[key] = metrics.get(key, 0) + value
+
+
+def natural_keys(df):
+    """Return the (username key, post URL key) Series used to match rows to influencers.
+
+    Both keys are scoped to the platform. Usernames are compared
+    case-insensitively without a leading '@'; blank values give a missing key.
+    """
+    platform = df["platform"].fillna("").astype(str).str.strip().str.lower() + "|"
+    username = df["username"].fillna("").astype(str).str.strip().str.lstrip("@").str.lower()
+    post_url = df["post_url"].fillna("").astype(str).str.strip().str.rstrip("/")
+
+    username_key = (platform + username).where(username.ne(""))
+    url_key = (platform + post_url).where(post_url.ne(""))
+    return username_key, url_key
+
+
+def _normalized_frame(df):
+    """Return the frame with every influencer column present and metrics as ints"""
+    frame = pd.DataFrame(index=df.index)
+    for col in TEXT_COLUMNS:
+        frame[col] = df[col].fillna("").astype(str).str.strip() if col in df.columns else ""
+    for col in METRIC_COLUMNS:
+        values = df[col] if col in df.columns else pd.Series(0, index=df.index)
+        frame[col] = pd.to_numeric(values, errors="coerce").fillna(0).astype("int64")
+    return frame
+
+
+def _lookup(keys, existing, column):
+    """Map keys to the row label of the first existing influencer with that key"""
+    known = existing[column].dropna()
+    table = pd.Series(known.index, index=known.values)
+    return keys.map(table[~table.index.duplicated(keep="first")])
+
+
+def plan_upsert(campaign, df):
+    """Match CSV rows to the campaign's influencers by natural key and work out the changes.
+
+    A row matches on (platform, username) when it has a username, otherwise on
+    (platform, post_url). Returns a dict with the records to insert (given ids
+    by apply_upsert) and update (keeping the existing id), the ids of
+    matched-but-unchanged influencers, rows dropped as duplicates within the
+    CSV and the resulting metric totals delta.
+    """
+    # Only columns present in the CSV are compared and overwritten on update
+    provided = [col for col in TEXT_COLUMNS + METRIC_COLUMNS if col in df.columns]
+    compared = [col for col in COMPARED_COLUMNS if col in provided]
+
+    incoming = _normalized_frame(df).reset_index(drop=True)
+    incoming["_ukey"], incoming["_pkey"] = natural_keys(incoming)
+
+    existing = pd.DataFrame(campaign["influencers"])
+    if existing.empty:
+        existing = pd.DataFrame(columns=["id"] + TEXT_COLUMNS + METRIC_COLUMNS)
+    existing = _normalized_frame(existing).assign(id=existing["id"]).reset_index(drop=True)
+    existing["_ukey"], existing["_pkey"] = natural_keys(existing)
+
+    # Hash-join on username first, then post URL for rows without a username match
+    target = _lookup(incoming["_ukey"], existing, "_ukey")
+    target = target.fillna(_lookup(incoming["_pkey"], existing, "_pkey"))
+
+    # Last occurrence wins when the CSV repeats a key or two rows hit the same influencer
+    key = incoming["_ukey"].fillna(incoming["_pkey"])
+    duplicated = (key.notna() & key.duplicated(keep="last")) | (target.notna() & target.duplicated(keep="last"))
+    incoming, target = incoming[~duplicated], target[~duplicated]
+
+    matched = target.notna()
+    inserts = incoming[~matched]
+    candidates = incoming[matched]
+    old = existing.loc[target[matched].astype("int64")].set_axis(candidates.index)
+
+    # Blank text cells keep the stored value instead of clearing it
+    candidates = candidates.copy()
+    for col in TEXT_COLUMNS:
+        if col in provided:
+            candidates[col] = candidates[col].mask(candidates[col].eq(""), old[col])
+
+    changed = pd.Series(False, index=candidates.index)
+    for col in compared:
+        changed |= candidates[col].ne(old[col])
+    updates, updates_old = candidates[changed], old[changed]
+
+    totals = {}
+    for col in METRIC_COLUMNS:
+        total = inserts[col].sum()
+        if col in compared:
+            total += (updates[col] - updates_old[col]).sum()
+        totals[f"total_{col}"] = int(total)
+
+    # New rows get their ids in apply_upsert, so previewing a plan reserves none
+    insert_records = inserts[TEXT_COLUMNS + METRIC_COLUMNS].to_dict("records")
+
+    update_records = updates[provided].to_dict("records")
+    for record, existing_id in zip(update_records, updates_old["id"].tolist()):
+        record["id"] = int(existing_id)
+
+    return {
+        "inserts": insert_records,
+        "updates": update_records,
+        "unchanged_ids": [int(i) for i in old.loc[~changed, "id"]],
+        "duplicates": int(duplicated.sum()),
+        "totals": totals,
+    }
+
+
+def apply_upsert(campaign, plan):
+    """Apply a plan_upsert result to the campaign in memory and return the changed records"""
+    for record, new_id in zip(plan["inserts"], generate_numeric_ids(len(plan["inserts"]))):
+        record["id"] = new_id
+
+    by_id = {inf["id"]: inf for inf in campaign["influencers"]}
+    for record in plan["updates"]:
+        by_id[record["id"]].update(record)
+    campaign["influencers"].extend(plan["inserts"])
+
+    metrics = campaign["metrics"]
+    for key, value in plan["totals"].items():
+        metrics[key] = metrics.get(key, 0) + value
+
+    return [by_id[record["id"]] for record in plan["updates"]] + plan["inserts"]
+
+
+def upsert_summary(plan):
+    """Counts of what an upsert import inserts, updates and leaves unchanged"""
+    return {
+        "inserted": len(plan["inserts"]),
+        "updated": len(plan["updates"]),
+        "unchanged": len(plan["unchanged_ids"]),
+        "duplicates": plan["duplicates"],
+    }
+
+
+def import_summary_message(summary):
+    """One-line description of an import_summary / upsert_summary result"""
+    message = (f"Import complete: {summary['inserted']} added, {summary['updated']} updated, "
+               f"{summary['unchanged']} unchanged")
+    if summary['duplicates']:
+        message += f", {summary['duplicates']} duplicate rows skipped"
+    return message
+
+
+def import_key(campaign, data_key, mode):
+    """Idempotency key for importing a file (by upload_key) into a campaign as last loaded.
+
+    Repeat submits of the same import (double clicks, reruns) share the key
+    until the campaign is saved; importing the file again after that is a
+    new import.
+    """
+    return upload_key(f"{campaign['id']}:{campaign.get('version', 0)}:{data_key}:{mode}".encode())
+
+
+def run_import(job, campaign, df, mode):
+    """Background job: import parsed CSV rows into a detached campaign copy and save it.
+
+    mode is "append" (every row is a new influencer) or "upsert" (match on
+    natural keys, see plan_upsert). Returns the counts and a message.
+    """
+    job.progress(0, len(df), "Matching rows" if mode == "upsert" else "Preparing rows")
+
+    def save_progress(done, total):
+        job.progress(done, total, "Saving influencers")
+
+    if mode == "upsert":
+        plan = plan_upsert(campaign, df)
+        changed = apply_upsert(campaign, plan)
+        summary = upsert_summary(plan)
+        save_campaign_changes(campaign, changed, progress=save_progress)
+    else:
+        new_influencers, totals = build_influencers(df)
+        add_influencers_to_campaign(campaign, new_influencers, totals)
+        summary = {"inserted": len(new_influencers), "updated": 0, "unchanged": 0, "duplicates": 0}
+        save_campaign(campaign, progress=save_progress)
+
+    return dict(summary, message=import_summary_message(summary))
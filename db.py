@@ -1,9 +1,29 @@
 import os
-from supabase import create_client
+import logging
 import uuid
 import time
+import secrets
+import threading
+from collections import OrderedDict
 from datetime import datetime
 from dotenv import load_dotenv
+from profiling import timed, count_query
+from telemetry import get_logger, log_event, track_operation, LOG_SAMPLE_EVERY
+import snapshots
+import shared_state
+import resilience
+from resilience import DB_TIMEOUT_SECONDS, BackendUnavailableError
+from campaign_summaries import SUMMARY_PAGE_SIZE, METRIC_TOTALS, summary_row, name_pattern
+from concurrency import (
+    EditConflictError, remember_base, base_metrics, local_changes, mark_saved, merge_campaign, adopt_own_write,
+    influencer_values
+)
+from replica import REPLICA_ENABLED, Replica
+from invalidation import create_read_cache
+from metrics_history import (
+    METRIC_FIELDS, RAW_RETENTION_DAYS, metric_values, metric_deltas, rollup_increments,
+    rollup_rows, cumulative_trend, now_timestamp, retention_cutoff
+)
 
 # Load environment variables
 load_dotenv()
@@ -12,57 +32,458 @@ load_dotenv()
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+# Storage backend: Supabase by default, or a local SQLite stand-in (LTCO_BACKEND=sqlite)
+BACKEND = os.getenv("LTCO_BACKEND", "supabase")
+SQLITE_PATH = os.getenv("LTCO_SQLITE_PATH", ":memory:")
+
+def _create_client():
+    if BACKEND == "sqlite":
+        from local_backend import create_local_client
+        return create_local_client(SQLITE_PATH)
+    from supabase import ClientOptions, create_client
+    return create_client(SUPABASE_URL, SUPABASE_KEY,
+                         options=ClientOptions(postgrest_client_timeout=DB_TIMEOUT_SECONDS))
+
+class _LazyClient:
+    """Creates the backend client on first use, so importing db stays cheap on cold start"""
+    
+    def __init__(self):
+        self._client = None
+        self._lock = threading.Lock()
+    
+    def _get(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = _create_client()
+        return self._client
+    
+    def __getattr__(self, name):
+        return getattr(self._get(), name)
+
+supabase = _LazyClient()
+
+logger = get_logger("db")
+
+def _execute(query, op, rows=0, idempotent=True):
+    """Run a Supabase query, counting each round trip and recording its latency under op.
+    
+    Transient failures are retried if the query is idempotent, and calls fail
+    fast while the backend circuit breaker is open (see resilience.py).
+    """
+    def attempt():
+        count_query()
+        with track_operation(op, rows=rows):
+            return query.execute()
+    return resilience.call(attempt, op, idempotent=idempotent)
+
+def _live(query):
+    """Restrict a query to rows that are not soft-deleted"""
+    return query.is_('deleted_at', 'null')
+
+# Campaign reads can be served from a local replica (LTCO_REPLICA=on, see
+# replica.py); writes always go to the primary. Every write stamps updated_at
+# so the replica can sync incrementally.
+_replica = None
+_replica_lock = threading.Lock()
+
+def get_replica():
+    """Return this process's local read replica, creating it on first use"""
+    global _replica
+    if _replica is None:
+        with _replica_lock:
+            if _replica is None:
+                _replica = Replica(supabase, execute=_execute, keep_deleted_hours=PURGE_AFTER_HOURS)
+    return _replica
+
+def _reader():
+    """Client for campaign reads: the synced local replica if enabled, otherwise the primary"""
+    return get_replica().reader() if REPLICA_ENABLED else supabase
+
+# Shared links are served from a read cache invalidated by row-change events
+# (LTCO_CHANGE_SOURCE, see invalidation.py), created on first use
+_read_cache = None
+
+def get_read_cache():
+    """Return this process's share-token read cache"""
+    global _read_cache
+    if _read_cache is None:
+        with _replica_lock:
+            if _read_cache is None:
+                _read_cache = create_read_cache(supabase, SUPABASE_URL, SUPABASE_KEY)
+    return _read_cache
+
+# Rows per insert request when appending metric history
+HISTORY_BATCH_SIZE = 1000
+
+# Saves retried after merging another session's changes before giving up
+MERGE_ATTEMPTS = 3
+
+# Influencer ids per delete request (keeps the PostgREST filter URL short)
+DELETE_BATCH_SIZE = 200
+
+# Deletes are soft: campaigns and influencers get a deleted_at tombstone, every
+# read skips tombstoned rows, and purge_deleted() (purge.py, run off-peak)
+# removes them for good once they are older than PURGE_AFTER_HOURS. Supabase
+# needs `deleted_at timestamptz` on both tables (a partial index
+# `where deleted_at is not null` keeps the purge scan small).
+PURGE_AFTER_HOURS = float(os.getenv("LTCO_PURGE_AFTER_HOURS", "24"))
+PURGE_BATCH_SIZE = 1000
+
+# Purged campaigns are removed DELETE_BATCH_SIZE at a time, each batch in one
+# call and one database transaction. Supabase needs the same function as
+# local_backend.RPC_FUNCTIONS:
+#   create function delete_campaign_cascade(p_campaign_ids bigint[]) returns json
+#   language plpgsql as $$
+#   declare removed_influencers int; removed_campaigns int;
+#   begin
+#     delete from influencer_metric_deltas where campaign_id = any(p_campaign_ids);
+#     delete from campaign_metric_rollups where campaign_id = any(p_campaign_ids);
+#     delete from campaign_summaries where campaign_id = any(p_campaign_ids);
+#     delete from influencers where campaign_id = any(p_campaign_ids);
+#     get diagnostics removed_influencers = row_count;
+#     delete from campaigns where id = any(p_campaign_ids);
+#     get diagnostics removed_campaigns = row_count;
+#     return json_build_object('campaigns', removed_campaigns, 'influencers', removed_influencers);
+#   end $$;
+
+# Share tokens: random URL-safe strings, unique per campaign. Supabase needs
+# the same guarantee as local_backend.SCHEMA:
+#   create unique index campaigns_share_token_idx on campaigns (share_token);
+SHARE_TOKEN_BYTES = 12
+SHARE_TOKEN_ATTEMPTS = 5
+
+# In-process share_token -> campaign id map, so a shared link resolves with a
+# primary-key lookup. Entries are verified against the fetched row, so a
+# regenerated or deleted token can never resolve to the wrong campaign.
+TOKEN_MAP_SIZE = int(os.getenv("LTCO_TOKEN_MAP_SIZE", "100000"))
+_token_ids = OrderedDict()
+_token_lock = threading.Lock()
+
+def _remember_token(token, campaign_id):
+    """Record token -> campaign id, evicting the least recently used entries"""
+    if not token:
+        return
+    with _token_lock:
+        _token_ids[token] = campaign_id
+        _token_ids.move_to_end(token)
+        while len(_token_ids) > TOKEN_MAP_SIZE:
+            _token_ids.popitem(last=False)
+
+def _forget_token(token):
+    with _token_lock:
+        _token_ids.pop(token, None)
+
+def _cached_token_id(token):
+    with _token_lock:
+        campaign_id = _token_ids.get(token)
+        if campaign_id is not None:
+            _token_ids.move_to_end(token)
+        return campaign_id
 
 def generate_numeric_id():
     """Generate a unique numeric ID based on the current timestamp"""
     return int(time.time() * 1000)  # Milliseconds since epoch as an integer
 
-def save_campaign(campaign_data):
-    """Save campaign data to Supabase"""
-    # Use an integer ID instead of UUID
-    campaign_id = campaign_data.get('id')
-    if not campaign_id or not isinstance(campaign_id, int):
-        campaign_id = generate_numeric_id()
-    
-    # Format the data for Supabase
+# Influencer IDs are reserved from a counter row (rows created together as one
+# block), so concurrent adds and imports (in any process) never get
+# overlapping IDs; no influencer ID comes from the clock alone. The counter
+# never drops below the timestamp * 1000 the IDs were derived from before,
+# so it stays above every ID minted that way. Supabase
+# needs the same table and function as local_backend (one atomic statement):
+#   create table id_counters (name text primary key, next_id bigint not null);
+#   create function reserve_ids(p_name text, p_count bigint, p_floor bigint) returns bigint
+#   language sql as $$
+#     insert into id_counters as c (name, next_id) values (p_name, p_floor + p_count)
+#     on conflict (name) do update set next_id = greatest(c.next_id, p_floor) + p_count
+#     returning next_id - p_count;
+#   $$;
+
+def generate_numeric_ids(count):
+    """Reserve count unique numeric IDs for new influencers (one for a form add, a block for a CSV import)"""
+    if count <= 0:
+        return []
+    # A retry after a lost response just skips a block, so this is safe to retry
+    first = _execute(
+        supabase.rpc('reserve_ids', {'p_name': 'influencers', 'p_count': count,
+                                     'p_floor': generate_numeric_id() * 1000}),
+        'id_counters.reserve'
+    ).data
+    return list(range(first, first + count))
+
+def _campaign_record(campaign_data, campaign_id):
+    """Format campaign data with only the fields in the campaigns table"""
     supabase_campaign = {
         'id': campaign_id,
         'name': campaign_data.get('name'),
         'created_at': campaign_data.get('created_at'),
         'share_token': campaign_data.get('share_token'),
         'budget': campaign_data.get('budget', 0),
-        'metrics': campaign_data.get('metrics', {})
+        'metrics': campaign_data.get('metrics', {}),
+        'updated_at': now_timestamp()
     }
     
     # Add sharing settings if they exist
     if 'sharing_settings' in campaign_data:
         supabase_campaign['sharing_settings'] = campaign_data['sharing_settings']
     
-    # Insert or update campaign
-    result = supabase.table('campaigns').upsert(supabase_campaign).execute()
+    return supabase_campaign
+
+@timed()
+def save_campaign(campaign_data, batch_size=500, progress=None):
+    """Save campaign data to Supabase.
+    
+    A campaign loaded from the database is written only if nobody saved it
+    since (compare-and-swap on its version), and only influencers that
+    changed are written. Non-overlapping changes saved by another session
+    are merged in and the save retried; overlapping ones raise
+    EditConflictError without writing anything (see concurrency.py).
+    progress(done, total) is called after each influencer batch.
+    """
+    return _save_campaign(campaign_data, None, batch_size, progress)[0]
+
+@timed()
+def save_campaign_changes(campaign_data, changed_influencers, batch_size=500, progress=None):
+    """Save the campaign row and only the given new/changed influencers (in batches).
     
-    # Handle influencers
-    if 'influencers' in campaign_data:
-        for influencer in campaign_data['influencers']:
-            influencer['campaign_id'] = campaign_id
-            save_influencer(influencer)
+    campaign_data['influencers'] must already contain the changes; the other
+    influencers are not compared or rewritten. Returns the rows written.
+    """
+    return _save_campaign(campaign_data, changed_influencers, batch_size, progress)[1]
+
+def _save_campaign(campaign_data, candidates, batch_size, progress=None):
+    """Write a campaign with optimistic concurrency; returns (campaign_id, influencers written)"""
+    # Use an integer ID instead of UUID
+    campaign_id = campaign_data.get('id')
+    if not campaign_id or not isinstance(campaign_id, int):
+        campaign_id = generate_numeric_id()
+
+    # Bump the in-memory revision so cached chart figures for this campaign are rebuilt
+    campaign_data['revision'] = campaign_data.get('revision', 0) + 1
     
-    return campaign_id
+    if '_base' not in campaign_data:
+        # Not loaded from the database (e.g. just created): write everything
+        version = campaign_data.get('version', 0) + 1
+        supabase_campaign = dict(_campaign_record(campaign_data, campaign_id), version=version)
+        _execute(supabase.table('campaigns').upsert(supabase_campaign), 'campaigns.upsert', rows=1)
+        campaign_data['version'] = version
+        written, deleted = campaign_data.get('influencers', []), []
+        _assign_missing_ids(written)
+        remember_base(campaign_data)
+        # Influencers join the base as they are written (mark_saved), so a failed write is retried by the next save
+        campaign_data['_base']['influencers'].clear()
+        # Stored metrics before this save, to record what changed
+        previous = _stored_metrics(
+            _live(supabase.table('influencers').select('id', *METRIC_FIELDS).eq('campaign_id', campaign_id))
+        ) if written else {}
+    else:
+        # Token of an earlier save of this campaign that failed without knowing whether it was written
+        unconfirmed = campaign_data.get('_pending_save')
+        for attempt in range(MERGE_ATTEMPTS):
+            base = campaign_data['_base']
+            version = base['version'] + 1
+            # Tags the row with this attempt, so a write whose response was lost can be recognized
+            save_token = campaign_data['_pending_save'] = uuid.uuid4().hex
+            supabase_campaign = dict(_campaign_record(campaign_data, campaign_id), version=version, save_token=save_token)
+            try:
+                swapped = _execute(
+                    _live(supabase.table('campaigns').update(supabase_campaign)
+                          .eq('id', campaign_id).eq('version', base['version'])),
+                    'campaigns.update_if_version', rows=1, idempotent=False
+                ).data
+            except BackendUnavailableError:
+                # The update may have committed before the response was lost
+                current = _fetch_campaign(supabase, campaign_id)
+                if current is None or current.get('save_token') != save_token:
+                    raise
+                swapped = True
+            if swapped:
+                break
+            
+            current = _fetch_campaign(supabase, campaign_id)
+            if unconfirmed and current is not None and current.get('save_token') == unconfirmed:
+                # The stored row is this session's own earlier save that reported a failure:
+                # start from it instead of merging our changes in a second time
+                adopt_own_write(campaign_data, current)
+                unconfirmed = None
+                continue
+            
+            # Someone else saved first: merge their campaign into ours and retry
+            conflicts = ["the campaign was deleted"] if current is None else merge_campaign(campaign_data, current)
+            log_event(logger, logging.INFO, "campaign.save_conflict",
+                      campaign_id=campaign_id, attempt=attempt, conflicts=len(conflicts))
+            if conflicts:
+                raise EditConflictError(campaign_id, conflicts)
+            campaign_data['revision'] += 1
+        else:
+            raise EditConflictError(campaign_id, ["it is being saved by others too often; try again"])
+        
+        campaign_data['version'] = version
+        # The campaign row is stored: if writing influencers fails below, the next
+        # save must start from it rather than merge our metric totals in twice
+        mark_saved(campaign_data, version, [], [])
+        del campaign_data['_pending_save']
+        written, deleted = local_changes(campaign_data, candidates)
+        _assign_missing_ids(written)
+        previous = base_metrics(base)
+    
+    _remember_token(supabase_campaign['share_token'], campaign_id)
+    
+    # Handle influencers: rows this session loaded are written only if nobody changed them since
+    expected = {}
+    for inf in written:
+        inf['campaign_id'] = campaign_id
+        known = campaign_data['_base']['influencers'].get(inf['id'])
+        if known:
+            expected[inf['id']] = known[0]
+        inf['version'] = (known[0] if known else inf.get('version', 0)) + 1
+    lost = _write_influencers(campaign_id, written, deleted, previous, batch_size, progress, expected)
+    if lost:
+        lost_ids = {inf['id'] for inf in lost}
+        written = [inf for inf in written if inf['id'] not in lost_ids]
+    mark_saved(campaign_data, version, written, deleted)
+    
+    # Refresh the sidebar summary and the static client view snapshot (both need the full influencer list)
+    if lost:
+        # The session's copy no longer matches what is stored: summarize the stored rows instead
+        _refresh_summaries({campaign_id})
+        snapshots.unpublish_campaign(campaign_id)
+    elif 'influencers' in campaign_data:
+        _save_summary(campaign_data, campaign_id)
+        snapshots.publish(dict(campaign_data, id=campaign_id))
+    
+    # Let other sessions and processes reload this campaign
+    shared_state.publish_change(campaign_id)
+    if lost:
+        raise EditConflictError(campaign_id, [f"{inf.get('name')} was edited" for inf in lost])
+    return campaign_id, len(written)
 
-def save_influencer(influencer_data):
-    """Save influencer data to Supabase with only the fields in your schema"""
-    # For influencer ID, also use numeric ID
-    influencer_id = influencer_data.get('id')
-    if not influencer_id or not isinstance(influencer_id, int):
-        influencer_id = generate_numeric_id()
+def _assign_missing_ids(influencers):
+    """Give new influencers without a numeric ID one, so later saves update the same row"""
+    missing = [inf for inf in influencers if not isinstance(inf.get('id'), int)]
+    for inf, influencer_id in zip(missing, generate_numeric_ids(len(missing))):
+        inf['id'] = influencer_id
+
+# Influencers loaded by a session are written only if their row is still at
+# the version the session loaded (one call per batch), so an edit saved by
+# another session in between is reported as a conflict instead of being
+# overwritten. Supabase needs the same function as local_backend.RPC_FUNCTIONS:
+#   create function upsert_influencers_if_version(p_rows jsonb) returns setof bigint
+#   language plpgsql as $$
+#   declare r jsonb; rec influencers;
+#   begin
+#     for r in select * from jsonb_array_elements(p_rows) loop
+#       rec := jsonb_populate_record(null::influencers, r);
+#       if r->>'expected_version' is null then
+#         insert into influencers select rec.* on conflict (id) do update set
+#           campaign_id = excluded.campaign_id, name = excluded.name, username = excluded.username,
+#           platform = excluded.platform, post_type = excluded.post_type,
+#           post_url = case when r ? 'post_url' then excluded.post_url else influencers.post_url end,
+#           views = excluded.views, likes = excluded.likes, shares = excluded.shares,
+#           comments = excluded.comments, version = excluded.version,
+#           deleted_at = excluded.deleted_at, updated_at = excluded.updated_at;
+#       else
+#         update influencers set
+#           campaign_id = rec.campaign_id, name = rec.name, username = rec.username,
+#           platform = rec.platform, post_type = rec.post_type,
+#           post_url = case when r ? 'post_url' then rec.post_url else post_url end,
+#           views = rec.views, likes = rec.likes, shares = rec.shares, comments = rec.comments,
+#           version = rec.version, deleted_at = rec.deleted_at, updated_at = rec.updated_at
+#         where id = rec.id and version = (r->>'expected_version')::int and deleted_at is null;
+#         if not found then return next rec.id; end if;
+#       end if;
+#     end loop;
+#   end $$;
+
+def _write_influencers(campaign_id, influencers, deleted_ids, previous, batch_size, progress=None, expected=None):
+    """Upsert and delete influencer rows in batches and record their metric changes.
     
-    # Print for debugging
-    print(f"Saving influencer with username: {influencer_data.get('username', 'No username')}")
+    expected maps influencer id -> the row version the session loaded; those
+    rows are written only if still at it. Returns the influencers that were
+    not written because another session changed them first (their metric
+    increments are taken back out of the campaign totals).
+    """
+    expected = expected or {}
+    if deleted_ids:
+        # The save republishes the snapshot and summary itself
+        _tombstone_influencers(deleted_ids)
     
-    # Format the data for Supabase
+    rejected = set()
+    for start in range(0, len(influencers), batch_size):
+        batch = [dict(_influencer_record(inf), expected_version=expected.get(inf['id']))
+                 for inf in influencers[start:start + batch_size]]
+        try:
+            response = _execute(supabase.rpc('upsert_influencers_if_version', {'p_rows': batch}),
+                                'influencers.upsert_if_version', rows=len(batch))
+        except Exception as e:
+            log_event(logger, logging.ERROR, "influencer.upsert_bulk_failed",
+                      campaign_id=campaign_id, batch_start=start, batch_rows=len(batch), error=e)
+            raise
+        rejected.update(response.data or [])
+        if progress is not None:
+            progress(start + len(batch), len(influencers))
+    
+    lost = _lost_writes([inf for inf in influencers if inf['id'] in rejected]) if rejected else []
+    if lost:
+        log_event(logger, logging.INFO, "influencer.save_conflict", campaign_id=campaign_id, rows=len(lost))
+        _withdraw_metrics(campaign_id, lost, previous)
+        lost_ids = {inf['id'] for inf in lost}
+        influencers = [inf for inf in influencers if inf['id'] not in lost_ids]
+    _record_metric_changes(campaign_id, influencers, previous)
+    return lost
+
+def _lost_writes(influencers):
+    """The influencers whose rows hold another session's write rather than ours.
+    
+    A row already at our new version with our values is our own write
+    repeated (a batch retried after a lost response).
+    """
+    stored = {row['id']: row for row in _execute(
+        supabase.table('influencers').select('*').in_('id', [inf['id'] for inf in influencers]),
+        'influencers.select'
+    ).data}
+    return [
+        inf for inf in influencers
+        if not (inf['id'] in stored and stored[inf['id']].get('deleted_at') is None
+                and stored[inf['id']].get('version') == inf['version']
+                and influencer_values(stored[inf['id']]) == influencer_values(inf))
+    ]
+
+def _withdraw_metrics(campaign_id, lost, previous):
+    """Take the increments of influencer writes that were not made back out of the campaign totals"""
+    zero = (0,) * len(METRIC_FIELDS)
+    change = {METRIC_TOTALS[field]: 0 for field in METRIC_FIELDS}
+    for inf in lost:
+        for field, now, then in zip(METRIC_FIELDS, metric_values(inf), previous.get(inf['id'], zero)):
+            change[METRIC_TOTALS[field]] += now - then
+    if not any(change.values()):
+        return
+    
+    # Compare-and-swap like a save, so a concurrent save merges instead of overwriting the correction
+    for _ in range(MERGE_ATTEMPTS):
+        rows = _execute(_live(supabase.table('campaigns').select('version', 'metrics').eq('id', campaign_id)),
+                        'campaigns.select_by_id').data
+        if not rows:
+            return
+        stored = rows[0]
+        metrics = dict(stored.get('metrics') or {})
+        for total, value in change.items():
+            metrics[total] = metrics.get(total, 0) - value
+        swapped = _execute(
+            _live(supabase.table('campaigns').update({'metrics': metrics, 'version': stored['version'] + 1,
+                                                      'updated_at': now_timestamp()})
+                  .eq('id', campaign_id).eq('version', stored['version'])),
+            'campaigns.update_if_version', rows=1, idempotent=False
+        ).data
+        if swapped:
+            return
+    log_event(logger, logging.WARNING, "campaign.metrics_withdraw_failed", campaign_id=campaign_id, change=change)
+
+def _influencer_record(influencer_data):
+    """Format influencer data with only the fields in the influencers table"""
+    # Format the data for Supabase (callers give new influencers a reserved ID first, see _assign_missing_ids)
     supabase_influencer = {
-        'id': influencer_id,
+        'id': influencer_data['id'],
         'campaign_id': influencer_data.get('campaign_id'),
         'name': influencer_data.get('name'),
         'username': influencer_data.get('username', ''),  # Ensure username is included
@@ -71,43 +492,232 @@ def save_influencer(influencer_data):
         'views': influencer_data.get('views', 0),
         'likes': influencer_data.get('likes', 0),
         'shares': influencer_data.get('shares', 0),
-        'comments': influencer_data.get('comments', 0)
+        'comments': influencer_data.get('comments', 0),
+        'deleted_at': None,  # Saving a row (e.g. after an undo) brings it back
+        'updated_at': now_timestamp()
     }
     
     # Add post_url if it exists
     if 'post_url' in influencer_data:
         supabase_influencer['post_url'] = influencer_data.get('post_url', '')
     
+    # Row version, bumped by every campaign save that writes the row
+    if 'version' in influencer_data:
+        supabase_influencer['version'] = influencer_data['version']
+
     # Remove cost field if it's not in the table schema
     if 'cost' in supabase_influencer:
         del supabase_influencer['cost']
+
+    return supabase_influencer
+
+@timed()
+def save_influencer(influencer_data):
+    """Save influencer data to Supabase with only the fields in your schema"""
+    _assign_missing_ids([influencer_data])
+    supabase_influencer = _influencer_record(influencer_data)
+    influencer_id = supabase_influencer['id']
     
-    # Print for debugging
-    print(f"Inserting/updating influencer record: {supabase_influencer}")
+    # Sampled debug logging - no formatting happens unless debug is enabled
+    log_event(logger, logging.DEBUG, "influencer.upsert", sample_every=LOG_SAMPLE_EVERY,
+              influencer_id=influencer_id, campaign_id=supabase_influencer['campaign_id'])
     
     try:
         # Insert or update influencer
-        result = supabase.table('influencers').upsert(supabase_influencer).execute()
-        print(f"Database operation result: {result}")
+        _execute(supabase.table('influencers').upsert(supabase_influencer), 'influencers.upsert', rows=1)
         return influencer_id
     except Exception as e:
-        print(f"Error saving influencer: {str(e)}")
+        log_event(logger, logging.ERROR, "influencer.upsert_failed",
+                  influencer_id=influencer_id, campaign_id=supabase_influencer['campaign_id'], error=e)
         raise
+    finally:
+        # The campaign's summary, shared link snapshot and other sessions' copies no longer match its rows
+        _campaigns_changed({supabase_influencer['campaign_id']})
+
+@timed()
+def save_influencers_bulk(influencers, batch_size=500):
+    """Upsert many influencers in batches of batch_size rows per request"""
+    _assign_missing_ids(influencers)
+    saved = 0
+    for start in range(0, len(influencers), batch_size):
+        batch = [_influencer_record(inf) for inf in influencers[start:start + batch_size]]
+        # Tombstoned rows count from zero, so bringing one back records its metrics again
+        previous = _stored_metrics(
+            _live(supabase.table('influencers').select('id', *METRIC_FIELDS).in_('id', [inf['id'] for inf in batch]))
+        )
+        try:
+            _execute(supabase.table('influencers').upsert(batch), 'influencers.upsert_bulk', rows=len(batch))
+        except Exception as e:
+            log_event(logger, logging.ERROR, "influencer.upsert_bulk_failed",
+                      batch_start=start, batch_rows=len(batch), error=e)
+            raise
+        _record_metric_changes(None, batch, previous)
+        saved += len(batch)
+    
+    # Rows written here bypass save_campaign: bring summaries, snapshots and other sessions up to date too
+    _campaigns_changed({inf.get('campaign_id') for inf in influencers})
+    return saved
+
+def _campaigns_changed(campaign_ids):
+    """Bring everything derived from these campaigns up to date after influencer writes outside save_campaign.
+    
+    Rebuilds their sidebar summaries from the stored rows, withdraws their
+    shared link snapshots and tells other sessions and processes (read
+    caches, the replica) to reload them, like delete_campaign does.
+    """
+    campaign_ids = set(campaign_ids) - {None}
+    if not campaign_ids:
+        return
+    _refresh_summaries(campaign_ids)
+    for campaign_id in campaign_ids:
+        # The link is served live until the next save_campaign republishes it
+        snapshots.unpublish_campaign(campaign_id)
+        shared_state.publish_change(campaign_id)
+
+def _stored_metrics(query):
+    """Map influencer id -> stored metric tuple for the rows the query selects"""
+    response = _execute(query, 'influencers.select_metrics')
+    return {row['id']: metric_values(row) for row in response.data}
 
+def _record_metric_changes(campaign_id, influencers, previous, event=None):
+    """Append metric deltas for changed influencers and add them to the day/week rollups.
+    
+    History is best effort: a failure is logged and never fails the save itself.
+    """
+    deltas = metric_deltas([inf for inf in influencers if inf.get('id') is not None],
+                           previous, campaign_id, now_timestamp(), event)
+    if not deltas:
+        return 0
+    
+    try:
+        for start in range(0, len(deltas), HISTORY_BATCH_SIZE):
+            batch = deltas[start:start + HISTORY_BATCH_SIZE]
+            # Rows whose idempotency key is already stored (a retried batch) are skipped
+            _execute(supabase.table('influencer_metric_deltas').upsert(batch, on_conflict='idempotency_key', ignore_duplicates=True),
+                     'metric_deltas.insert', rows=len(batch))
+        
+        # Incremented in place by the database, so concurrent saves can't lose each other's deltas;
+        # not retried, since a retry after a lost response would add them twice
+        rows = rollup_rows(rollup_increments(deltas))
+        _execute(supabase.rpc('add_metric_rollups', {'p_rows': rows}),
+                 'metric_rollups.add', rows=len(rows), idempotent=False)
+    except Exception as e:
+        log_event(logger, logging.ERROR, "metrics_history.record_failed",
+                  campaign_id=campaign_id, deltas=len(deltas), error=e)
+        return 0
+    return len(deltas)
+
+@timed()
+def get_metric_trend(campaign_id, period='day', by_platform=False):
+    """Get running totals of a campaign's metrics per day or week as a DataFrame"""
+    try:
+        response = _execute(
+            supabase.table('campaign_metric_rollups').select('*')
+            .eq('campaign_id', campaign_id).eq('period', period).order('bucket'),
+            'metric_rollups.select'
+        )
+    except Exception as e:
+        log_event(logger, logging.WARNING, "metrics_history.trend_failed", campaign_id=campaign_id, error=e)
+        return cumulative_trend([], by_platform)
+    return cumulative_trend(response.data, by_platform)
+
+@timed()
+def compact_metric_history(older_than_days=RAW_RETENTION_DAYS):
+    """Delete raw metric deltas older than the retention window (rollups keep their totals)"""
+    response = _execute(
+        supabase.table('influencer_metric_deltas').delete().lt('recorded_at', retention_cutoff(older_than_days)),
+        'metric_deltas.delete'
+    )
+    log_event(logger, logging.INFO, "metrics_history.compacted", deleted=len(response.data))
+    return len(response.data)
+
+@timed()
+def backfill_metric_history():
+    """Record current metrics as the starting point for campaigns that have no history yet"""
+    recorded = 0
+    campaigns = _execute(_live(supabase.table('campaigns').select('id')), 'campaigns.select').data
+    for campaign in campaigns:
+        campaign_id = campaign['id']
+        has_history = _execute(
+            supabase.table('campaign_metric_rollups').select('campaign_id').eq('campaign_id', campaign_id).limit(1),
+            'metric_rollups.select'
+        ).data
+        if has_history:
+            continue
+        influencers = _execute(
+            _live(supabase.table('influencers').select('id', 'campaign_id', 'platform', *METRIC_FIELDS)
+                  .eq('campaign_id', campaign_id)),
+            'influencers.select'
+        ).data
+        recorded += _record_metric_changes(campaign_id, influencers, {})
+    return recorded
+
+def _save_summary(campaign_data, campaign_id):
+    """Rewrite the campaign's campaign_summaries row; a failure only leaves the sidebar stale"""
+    try:
+        _execute(supabase.table('campaign_summaries').upsert(summary_row(campaign_data, campaign_id), on_conflict='campaign_id'),
+                 'campaign_summaries.upsert', rows=1)
+    except Exception as e:
+        log_event(logger, logging.ERROR, "campaign_summaries.save_failed", campaign_id=campaign_id, error=e)
+
+@timed()
+def get_campaign_summaries(search=None, after=None, limit=SUMMARY_PAGE_SIZE):
+    """Get one page of the campaign list, newest first, without loading influencers.
+    
+    Pass the returned cursor as after to get the next page (None when there
+    are no more). search matches campaign names case-insensitively.
+    """
+    query = supabase.table('campaign_summaries').select('*')
+    if search:
+        query = query.ilike('name', name_pattern(search))
+    if after is not None:
+        query = query.lt('campaign_id', after)
+    rows = _execute(query.order('campaign_id', desc=True).limit(limit + 1), 'campaign_summaries.select').data
+    next_after = rows[limit - 1]['campaign_id'] if len(rows) > limit else None
+    return rows[:limit], next_after
+
+@timed()
+def count_campaigns():
+    """Count live campaigns"""
+    response = _execute(supabase.table('campaign_summaries').select('campaign_id', count='exact').limit(1),
+                        'campaign_summaries.count')
+    return response.count or 0
+
+def _refresh_summaries(campaign_ids=None):
+    """Recompute summary rows from the stored influencers of the given (default: all) live campaigns"""
+    query = _live(supabase.table('campaigns').select('id', 'name', 'created_at'))
+    if campaign_ids is not None:
+        query = query.in_('id', sorted(campaign_ids))
+    campaigns = _execute(query, 'campaigns.select').data
+    for campaign in campaigns:
+        influencers = _execute(
+            _live(supabase.table('influencers').select(*METRIC_FIELDS).eq('campaign_id', campaign['id'])),
+            'influencers.select_metrics'
+        ).data
+        _save_summary(dict(campaign, influencers=influencers), campaign['id'])
+    return len(campaigns)
+
+@timed()
+def rebuild_campaign_summaries():
+    """Recompute the summary row of every live campaign (e.g. to fill the table once)"""
+    return _refresh_summaries()
+
+@timed()
 def get_campaigns():
     """Get all campaigns from Supabase"""
-    response = supabase.table('campaigns').select('*').execute()
+    client = _reader()
+    response = _execute(_live(client.table('campaigns').select('*')), 'campaigns.select')
     campaigns = {}
     
     for campaign in response.data:
         campaign_id = campaign['id']
         # Get influencers for this campaign
-        influencers_response = supabase.table('influencers').select('*').eq('campaign_id', campaign_id).execute()
+        influencers_response = _execute(_live(client.table('influencers').select('*').eq('campaign_id', campaign_id)), 'influencers.select')
+        
+        log_event(logger, logging.DEBUG, "campaign.loaded",
+                  campaign_id=campaign_id, influencers=len(influencers_response.data))
         
-        # Print for debugging
-        print(f"Retrieved {len(influencers_response.data)} influencers for campaign {campaign_id}")
-        for inf in influencers_response.data:
-            print(f"Influencer: {inf.get('name')}, Username: {inf.get('username', 'No username')}")
+        _remember_token(campaign['share_token'], campaign_id)
         
         campaigns[str(campaign_id)] = {  # Convert ID to string for dictionary key
             'id': campaign_id,
@@ -116,27 +726,62 @@ def get_campaigns():
             'share_token': campaign['share_token'],
             'budget': campaign.get('budget', 0),
             'metrics': campaign['metrics'],
+            'version': campaign.get('version', 0),
             'influencers': influencers_response.data
         }
         
         # Add sharing settings if they exist
         if 'sharing_settings' in campaign:
             campaigns[str(campaign_id)]['sharing_settings'] = campaign['sharing_settings']
+        
+        # Remember what was loaded so saves only write what changed
+        remember_base(campaigns[str(campaign_id)])
     
     return campaigns
 
+@timed()
+def mint_share_token():
+    """Generate a share token that no campaign uses yet"""
+    for _ in range(SHARE_TOKEN_ATTEMPTS):
+        token = secrets.token_urlsafe(SHARE_TOKEN_BYTES)
+        taken = _execute(supabase.table('campaigns').select('id').eq('share_token', token).limit(1),
+                         'campaigns.select_by_token')
+        if not taken.data:
+            return token
+    raise RuntimeError(f"Could not mint a unique share token in {SHARE_TOKEN_ATTEMPTS} attempts")
+
+@timed()
 def get_campaign_by_share_token(token):
-    """Get campaign by share token"""
-    response = supabase.table('campaigns').select('*').eq('share_token', token).execute()
+    """Get campaign by share token (the result is shared between callers; don't modify it)"""
+    cache = get_read_cache()
+    cached = cache.get(token)
+    if cached is not None:
+        return cached
+    generation = cache.generation
     
-    if not response.data:
-        return None
+    campaign = None
+    client = _reader()
+    
+    # Known tokens resolve by primary key; the row must still carry this token
+    campaign_id = _cached_token_id(token)
+    if campaign_id is not None:
+        response = _execute(_live(client.table('campaigns').select('*').eq('id', campaign_id)), 'campaigns.select_by_id')
+        if response.data and response.data[0]['share_token'] == token:
+            campaign = response.data[0]
+        else:
+            _forget_token(token)
+    
+    if campaign is None:
+        response = _execute(_live(client.table('campaigns').select('*').eq('share_token', token)).limit(1), 'campaigns.select_by_token')
+        if not response.data:
+            return None
+        campaign = response.data[0]
+        _remember_token(token, campaign['id'])
     
-    campaign = response.data[0]
     campaign_id = campaign['id']
     
     # Get influencers for this campaign
-    influencers_response = supabase.table('influencers').select('*').eq('campaign_id', campaign_id).execute()
+    influencers_response = _execute(_live(client.table('influencers').select('*').eq('campaign_id', campaign_id)), 'influencers.select')
     
     result = {
         'id': campaign_id,
@@ -152,18 +797,195 @@ def get_campaign_by_share_token(token):
     if 'sharing_settings' in campaign:
         result['sharing_settings'] = campaign['sharing_settings']
     
+    cache.put(token, result, generation)
     return result
 
+@timed()
+def get_campaign(campaign_id):
+    """Get one campaign with its influencers by id, or None if it no longer exists"""
+    return _fetch_campaign(_reader(), campaign_id)
+
+def _fetch_campaign(client, campaign_id):
+    """Load a campaign from client (the primary when the result must be current, e.g. to merge)"""
+    response = _execute(_live(client.table('campaigns').select('*').eq('id', campaign_id)), 'campaigns.select_by_id')
+    if not response.data:
+        return None
+    campaign = response.data[0]
+    _remember_token(campaign['share_token'], campaign_id)
+    
+    influencers_response = _execute(_live(client.table('influencers').select('*').eq('campaign_id', campaign_id)), 'influencers.select')
+    
+    result = {
+        'id': campaign_id,
+        'name': campaign['name'],
+        'created_at': campaign['created_at'],
+        'share_token': campaign['share_token'],
+        'budget': campaign.get('budget', 0),
+        'metrics': campaign['metrics'],
+        'version': campaign.get('version', 0),
+        'save_token': campaign.get('save_token'),
+        'influencers': influencers_response.data
+    }
+    
+    if 'sharing_settings' in campaign:
+        result['sharing_settings'] = campaign['sharing_settings']
+    
+    return remember_base(result)
+
+@timed()
 def delete_influencer(influencer_id):
-    """Delete an influencer from Supabase"""
-    response = supabase.table('influencers').delete().eq('id', influencer_id).execute()
-    return response.data
+    """Soft-delete an influencer (see delete_influencers_bulk)"""
+    return delete_influencers_bulk([influencer_id])
+
+@timed()
+def delete_influencers_bulk(influencer_ids, batch_size=DELETE_BATCH_SIZE):
+    """Tombstone many influencers with one flag update per batch_size ids; returns the rows marked.
+    
+    Rows stay in the table until purge_deleted() removes them, and saving the
+    same influencers again (an undo) brings them back. The metrics of the rows
+    marked are recorded as negative deltas (the undo records them again).
+    """
+    removed = _tombstone_influencers(influencer_ids, batch_size)
+    _campaigns_changed({row['campaign_id'] for row in removed})
+    return len(removed)
+
+def _tombstone_influencers(influencer_ids, batch_size=DELETE_BATCH_SIZE):
+    """Mark influencers deleted and record their negative deltas; returns the rows marked"""
+    influencer_ids = list(influencer_ids)
+    deleted_at = now_timestamp()
+    removed = []
+    for start in range(0, len(influencer_ids), batch_size):
+        batch = influencer_ids[start:start + batch_size]
+        response = _execute(
+            _live(supabase.table('influencers').update({'deleted_at': deleted_at, 'updated_at': deleted_at}).in_('id', batch)),
+            'influencers.soft_delete', rows=len(batch)
+        )
+        removed.extend(response.data)
+        zeroed = [dict(row, **dict.fromkeys(METRIC_FIELDS, 0)) for row in response.data]
+        _record_metric_changes(None, zeroed, {row['id']: metric_values(row) for row in response.data}, 'deleted')
+    return removed
 
+@timed()
 def delete_campaign(campaign_id):
-    """Delete a campaign and all its influencers from Supabase"""
-    # First delete all influencers
-    supabase.table('influencers').delete().eq('campaign_id', campaign_id).execute()
+    """Soft-delete a campaign; restore_campaign() undoes it until purge_deleted() runs"""
+    deleted_at = now_timestamp()
+    response = _execute(
+        _live(supabase.table('campaigns').update({'deleted_at': deleted_at, 'updated_at': deleted_at}).eq('id', campaign_id)),
+        'campaigns.soft_delete', rows=1
+    )
+    _execute(supabase.table('campaign_summaries').delete().eq('campaign_id', campaign_id), 'campaign_summaries.delete')
+    
+    # Stop serving its shared link snapshot
+    snapshots.unpublish_campaign(campaign_id)
+    shared_state.publish_change(campaign_id, "deleted")
+    return len(response.data)
+
+@timed()
+def restore_campaign(campaign_id):
+    """Undo delete_campaign; returns the campaign as get_campaign does, or None if it was purged"""
+    response = _execute(supabase.table('campaigns').update({'deleted_at': None, 'updated_at': now_timestamp()}).eq('id', campaign_id),
+                        'campaigns.restore', rows=1)
+    if not response.data:
+        return None
+    
+    campaign = _fetch_campaign(supabase, campaign_id)
+    _save_summary(campaign, campaign_id)
+    snapshots.publish(campaign)
+    shared_state.publish_change(campaign_id)
+    return campaign
+
+@timed()
+def purge_deleted(older_than_hours=PURGE_AFTER_HOURS, batch_size=PURGE_BATCH_SIZE):
+    """Hard-delete campaigns and influencers soft-deleted more than older_than_hours ago.
     
-    # Then delete the campaign
-    response = supabase.table('campaigns').delete().eq('id', campaign_id).execute()
-    return response.data
\ No newline at end of file
+    Campaigns go through delete_campaign_cascade (one call and transaction
+    per DELETE_BATCH_SIZE campaigns, with their influencers and metric
+    history); loose influencers are removed batch_size at a time. Returns
+    {'campaigns': n, 'influencers': n}.
+    """
+    cutoff = retention_cutoff(older_than_hours / 24)
+    purged = {'campaigns': 0, 'influencers': 0}
+    
+    campaigns = _execute(supabase.table('campaigns').select('id').lt('deleted_at', cutoff),
+                         'campaigns.select_deleted').data
+    campaign_ids = [campaign['id'] for campaign in campaigns]
+    for start in range(0, len(campaign_ids), DELETE_BATCH_SIZE):
+        batch = campaign_ids[start:start + DELETE_BATCH_SIZE]
+        removed = _execute(supabase.rpc('delete_campaign_cascade', {'p_campaign_ids': batch}),
+                           'campaigns.delete_cascade', rows=len(batch)).data
+        purged['campaigns'] += removed['campaigns']
+        purged['influencers'] += removed['influencers']
+    
+    while True:
+        rows = _execute(supabase.table('influencers').select('id').lt('deleted_at', cutoff).limit(batch_size),
+                        'influencers.select_deleted').data
+        if not rows:
+            break
+        ids = [row['id'] for row in rows]
+        for start in range(0, len(ids), DELETE_BATCH_SIZE):
+            batch = ids[start:start + DELETE_BATCH_SIZE]
+            response = _execute(supabase.table('influencers').delete().in_('id', batch),
+                                'influencers.purge', rows=len(batch))
+            purged['influencers'] += len(response.data)
+    
+    log_event(logger, logging.INFO, "purge.completed", cutoff=cutoff, **purged)
+    return purged
+
+# Background jobs (see jobs.py) are tracked in a jobs table so their progress
+# survives reruns and can be read by any session. Supabase needs:
+#   create table jobs (
+#     id text primary key, kind text, label text, campaign_id bigint,
+#     status text, done bigint default 0, total bigint, message text,
+#     result jsonb, error text, created_at timestamptz, started_at timestamptz,
+#     finished_at timestamptz, updated_at timestamptz, idempotency_key text
+#   );
+#   create index jobs_campaign_idx on jobs (campaign_id, created_at);
+#   create unique index jobs_idempotency_key_idx on jobs (idempotency_key);
+#
+# idempotency_key is the dedup record for submitted work: a second submit with
+# the key of a queued, running or finished job gets that job back instead of
+# starting another. A failed job releases its key so the work can be retried.
+
+@timed()
+def create_job(job):
+    """Insert a job row unless a job holds the same idempotency_key; returns the id of the job holding it"""
+    inserted = _execute(
+        supabase.table('jobs').upsert(job, on_conflict='idempotency_key', ignore_duplicates=True),
+        'jobs.insert', rows=1
+    ).data
+    if inserted:
+        return inserted[0]['id']
+    existing = _execute(
+        supabase.table('jobs').select('id').eq('idempotency_key', job['idempotency_key']).limit(1),
+        'jobs.select_by_key'
+    ).data
+    return existing[0]['id'] if existing else job['id']
+
+def update_job(job_id, **fields):
+    """Update a job's status/progress fields (also its heartbeat, updated_at)"""
+    fields['updated_at'] = now_timestamp()
+    _execute(supabase.table('jobs').update(fields).eq('id', job_id), 'jobs.update', rows=1)
+
+@timed()
+def get_jobs(job_ids=None, campaign_id=None, statuses=None, limit=20):
+    """Get jobs by id and/or campaign and status, newest first"""
+    query = supabase.table('jobs').select('*')
+    if job_ids is not None:
+        query = query.in_('id', list(job_ids))
+    if campaign_id is not None:
+        query = query.eq('campaign_id', campaign_id)
+    if statuses is not None:
+        query = query.in_('status', list(statuses))
+    return _execute(query.order('created_at', desc=True).limit(limit), 'jobs.select').data
+
+def fail_stale_jobs(statuses, older_than_seconds):
+    """Mark jobs in statuses without a heartbeat for older_than_seconds as failed (their process died)"""
+    cutoff = retention_cutoff(older_than_seconds / 86400)
+    response = _execute(
+        supabase.table('jobs').update({
+            'status': 'failed', 'error': 'Interrupted: the app process running it stopped',
+            'finished_at': now_timestamp(), 'updated_at': now_timestamp(), 'idempotency_key': None,
+        }).in_('status', list(statuses)).lt('updated_at', cutoff),
+        'jobs.fail_stale'
+    )
+    return len(response.data)
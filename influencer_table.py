@@ -0,0 +1,159 @@
+from lazy_imports import lazy_import
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+# Filterable influencer table shared by the dashboard and the client view.
+#
+# Pages render their filter controls and table inside an st.fragment, so a
+# filter change reruns only that section instead of the whole script. The
+# DataFrame the fragment filters is built once per campaign revision and
+# memoized on the campaign dict (like charts.influencers_fingerprint).
+#
+# The table is ranked, not sorted: RankingIndex (also memoized per revision)
+# keeps each sort column's row order once it has been asked for, plus metric
+# totals per platform/post type group. A rerun then only masks the stored
+# order by the filters and takes the first rows, and the TOTAL row comes from
+# the group totals, so just RANKING_PAGE_SIZE rows are formatted and sent to
+# the browser until the user asks for more ("load more").
+
+# Rows shown at first and added by each "load more"
+RANKING_PAGE_SIZE = 100
+
+# Sort option -> (column, ascending)
+SORT_COLUMNS = {
+    "Name": ("name", True),
+    "Username": ("username", True),
+    "Views": ("views", False),
+    "Likes": ("likes", False),
+    "Shares": ("shares", False),
+    "Comments": ("comments", False),
+}
+
+COLUMN_LABELS = {
+    "name": "Name",
+    "username": "Username",
+    "platform": "Platform",
+    "post_type": "Post Type",
+    "views": "Views",
+    "post_url": "Post URL",
+    "likes": "Likes",
+    "shares": "Shares",
+    "comments": "Comments",
+}
+
+NUMERIC_COLUMNS = ["views", "likes", "shares", "comments"]
+
+
+def influencer_frame(campaign):
+    """Return the campaign's influencers as a DataFrame, rebuilt only when the campaign changes.
+
+    Callers must not modify the returned frame in place.
+    """
+    influencers = campaign.get("influencers") or []
+    marker = (campaign.get("revision"), len(influencers))
+    memo = campaign.get("_frame")
+    if memo is not None and memo[0] == marker:
+        return memo[1]
+
+    df = pd.DataFrame(influencers)
+    # Snapshots that hide engagement leave those fields out of the rows
+    for column in NUMERIC_COLUMNS:
+        if column not in df.columns:
+            df[column] = 0
+    campaign["_frame"] = (marker, df)
+    return df
+
+
+def filter_options(df, column):
+    """Return the selectbox options for filtering on a column"""
+    return ["All"] + list(df[column].unique())
+
+
+class RankingIndex:
+    """Group totals and cached sort orders for ranking one campaign revision's influencers"""
+
+    def __init__(self, df):
+        self.df = df
+        grouped = df.groupby(["platform", "post_type"], dropna=False)
+        # Group number of every row, and per group its key, row count and metric sums
+        self.group_of = grouped.ngroup().to_numpy()
+        self.groups = grouped[NUMERIC_COLUMNS].sum().assign(rows=grouped.size()).reset_index()
+        self._orders = {}
+
+    def _matching_groups(self, platform, post_type):
+        keep = np.ones(len(self.groups), dtype=bool)
+        if platform != "All":
+            keep &= (self.groups["platform"] == platform).to_numpy()
+        if post_type != "All":
+            keep &= (self.groups["post_type"] == post_type).to_numpy()
+        return keep
+
+    def totals(self, platform="All", post_type="All"):
+        """Number of matching rows and their metric sums, from the group totals"""
+        matched = self.groups[self._matching_groups(platform, post_type)]
+        return int(matched["rows"].sum()), {col: int(matched[col].sum()) for col in NUMERIC_COLUMNS}
+
+    def order(self, sort_by):
+        """Row positions in sort_by order (stable), computed once per sort option"""
+        order = self._orders.get(sort_by)
+        if order is None:
+            column, ascending = SORT_COLUMNS[sort_by]
+            ranked = self.df[column].reset_index(drop=True).sort_values(ascending=ascending, kind="stable")
+            order = self._orders[sort_by] = ranked.index.to_numpy()
+        return order
+
+    def rank(self, platform="All", post_type="All", sort_by="Name", limit=None):
+        """The first `limit` matching rows in sort order (all of them if limit is None)"""
+        order = self.order(sort_by)
+        if platform != "All" or post_type != "All":
+            order = order[self._matching_groups(platform, post_type)[self.group_of[order]]]
+        return self.df.iloc[order[:limit]]
+
+
+def ranking_index(campaign):
+    """Return the campaign's RankingIndex, rebuilt only when the campaign changes"""
+    df = influencer_frame(campaign)
+    memo = campaign.get("_ranking")
+    if memo is not None and memo[0] is df:
+        return memo[1]
+
+    index = RankingIndex(df)
+    campaign["_ranking"] = (df, index)
+    return index
+
+
+def table_limit(session_state, key, filters):
+    """Rows to show in a ranked table; back to one page whenever the filters or sort change"""
+    state = session_state.get(key)
+    if state is None or state[0] != filters:
+        state = session_state[key] = (filters, RANKING_PAGE_SIZE)
+    return state[1]
+
+
+def show_more(session_state, key):
+    """Button callback: show another page of rows in the table under key"""
+    filters, limit = session_state[key]
+    session_state[key] = (filters, limit + RANKING_PAGE_SIZE)
+
+
+def display_table(rows, columns, totals=None):
+    """Format rows for st.dataframe with a TOTAL row at the bottom.
+
+    totals maps numeric columns to their sums over every matching row (not
+    only those shown); without it the shown rows are summed.
+    """
+    display_df = rows[columns].copy()
+
+    total_row = {}
+    for col in columns:
+        if col in NUMERIC_COLUMNS:
+            display_df[col] = display_df[col].apply(lambda x: f"{x:,}")
+            total_row[col] = f"{totals[col] if totals is not None else rows[col].sum():,}"
+        else:
+            total_row[col] = ""
+    total_row[columns[0]] = "TOTAL"
+
+    display_df = pd.concat([display_df, pd.DataFrame([total_row])], ignore_index=True)
+    display_df.columns = [COLUMN_LABELS.get(col, col) for col in columns]
+    return display_df
@@ -0,0 +1,279 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import shared_state
+from telemetry import get_logger, log_event
+
+# Read cache for shared links, kept current by row-change events.
+#
+# db.get_campaign_by_share_token serves repeat reads of a link from a
+# process-wide LRU keyed by share token. Entries are dropped precisely: a
+# change to a campaign row invalidates that campaign and its old and new
+# tokens, and a change to an influencer row invalidates its campaign.
+# Changes arrive from one or more sources:
+#
+#   feed      shared_state's change feed, i.e. saves and deletes made through
+#             db.py in any app process. Always on.
+#   sqlite    a row_changes log filled by SQLite triggers on the local
+#             stand-in (LocalClient.enable_change_log), polled before reads.
+#             Catches writes that bypass db.py; used for tests.
+#   realtime  Supabase Realtime postgres_changes on campaigns and
+#             influencers, pushed to a background thread. Needs the tables in
+#             the realtime publication, and full old rows so deletes and token
+#             changes name the campaign and the old token:
+#               alter publication supabase_realtime add table campaigns, influencers;
+#               alter table campaigns replica identity full;
+#               alter table influencers replica identity full;
+#
+# LTCO_CHANGE_SOURCE picks sqlite or realtime in addition to the feed. While
+# a push source is not subscribed the cache is bypassed, and entries also
+# expire after LTCO_READ_CACHE_TTL seconds as a backstop. Cached campaigns are
+# shared between sessions and must be treated as read-only.
+
+READ_CACHE_SIZE = int(os.getenv("LTCO_READ_CACHE_SIZE", "256"))
+READ_CACHE_TTL = float(os.getenv("LTCO_READ_CACHE_TTL", "60"))
+CHANGE_SOURCE = os.getenv("LTCO_CHANGE_SOURCE", "feed").lower()
+
+# row_changes rows read per poll request, and how many old rows are kept
+CHANGE_LOG_BATCH = 5000
+CHANGE_LOG_KEEP = 100000
+
+logger = get_logger("invalidation")
+
+
+class ReadCache:
+    """LRU of campaigns by share token with per-campaign and per-token invalidation"""
+
+    def __init__(self, max_entries=READ_CACHE_SIZE, ttl=READ_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._tokens = {}
+        self._sources = []
+        # Bumped by every invalidation, so a read that raced one isn't cached
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def add_source(self, source):
+        self._sources.append(source)
+        source.start(self)
+
+    def _ready(self):
+        for source in self._sources:
+            try:
+                source.poll(self)
+            except Exception as e:
+                log_event(logger, logging.WARNING, "invalidation.poll_failed",
+                          source=type(source).__name__, error=e)
+                return False
+            if not source.ready:
+                return False
+        return True
+
+    def get(self, token):
+        """Return the cached campaign for token, or None"""
+        if self.max_entries <= 0 or not self._ready():
+            return None
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None or entry[2] < time.monotonic():
+                self.misses += 1
+                return None
+            self._entries.move_to_end(token)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, token, campaign, generation):
+        """Cache campaign under token unless something was invalidated since generation was read"""
+        if self.max_entries <= 0:
+            return
+        campaign_id = _campaign_key(campaign["id"])
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._entries[token] = (campaign_id, campaign, time.monotonic() + self.ttl)
+            self._entries.move_to_end(token)
+            self._tokens.setdefault(campaign_id, set()).add(token)
+            while len(self._entries) > self.max_entries:
+                evicted, (evicted_id, _, _) = self._entries.popitem(last=False)
+                self._drop_token_index(evicted_id, evicted)
+
+    def _drop_token_index(self, campaign_id, token):
+        tokens = self._tokens.get(campaign_id)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens[campaign_id]
+
+    def apply_change(self, campaign_ids=(), tokens=()):
+        """Invalidate the given campaigns and tokens; a None campaign id clears everything"""
+        with self._lock:
+            self.generation += 1
+            if any(campaign_id is None for campaign_id in campaign_ids):
+                self._clear()
+                return
+            for campaign_id in campaign_ids:
+                for token in self._tokens.pop(_campaign_key(campaign_id), ()):
+                    if self._entries.pop(token, None) is not None:
+                        self.invalidations += 1
+            for token in tokens:
+                entry = self._entries.pop(token, None) if token else None
+                if entry is not None:
+                    self._drop_token_index(entry[0], token)
+                    self.invalidations += 1
+
+    def invalidate_campaign(self, campaign_id):
+        self.apply_change(campaign_ids=[campaign_id])
+
+    def invalidate_token(self, token):
+        self.apply_change(tokens=[token])
+
+    def _clear(self):
+        self.invalidations += len(self._entries)
+        self._entries.clear()
+        self._tokens.clear()
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self._clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "sources": [type(source).__name__ for source in self._sources],
+            }
+
+
+def _campaign_key(campaign_id):
+    try:
+        return int(campaign_id)
+    except (TypeError, ValueError):
+        return campaign_id
+
+
+def row_change(table, record=None, old_record=None):
+    """Turn a campaigns/influencers row change into (campaign ids, share tokens) to invalidate"""
+    record, old_record = record or {}, old_record or {}
+    if table == "campaigns":
+        ids = {record.get("id"), old_record.get("id")} - {None}
+        tokens = {record.get("share_token"), old_record.get("share_token")} - {None}
+        return list(ids) or [None], list(tokens)
+    # Without its campaign id (e.g. a delete without full old rows) everything is dropped
+    ids = {record.get("campaign_id"), old_record.get("campaign_id")} - {None}
+    return list(ids) or [None], []
+
+
+class FeedSource:
+    """Invalidations from shared_state's change feed (writes made through db.py)"""
+
+    ready = True
+
+    def start(self, cache):
+        self._seq = shared_state.latest_seq()
+
+    def poll(self, cache):
+        if shared_state.latest_seq() == self._seq:
+            return
+        events, latest = shared_state.changes_since(self._seq)
+        if events is None:
+            cache.clear()
+        else:
+            cache.apply_change(campaign_ids=[campaign_id for campaign_id, _, _ in events])
+        self._seq = latest
+
+
+class ChangeLogSource:
+    """Invalidations from the local stand-in's trigger-maintained row_changes log"""
+
+    ready = True
+
+    def __init__(self, client):
+        self._client = client
+        self._polls = 0
+
+    def start(self, cache):
+        self._client.enable_change_log()
+        rows = self._client.table("row_changes").select("seq").order("seq", desc=True).limit(1).execute().data
+        self._seq = rows[0]["seq"] if rows else 0
+
+    def poll(self, cache):
+        while True:
+            rows = (self._client.table("row_changes").select("*").gt("seq", self._seq)
+                    .order("seq").limit(CHANGE_LOG_BATCH).execute().data)
+            if not rows:
+                break
+            # Log rows carry the campaign (new and old) for both tables, and tokens for campaigns
+            campaign_ids, tokens = set(), set()
+            for row in rows:
+                campaign_ids.update({row["campaign_id"], row["old_campaign_id"]} - {None} or {None})
+                tokens.update({row["share_token"], row["old_share_token"]} - {None})
+            cache.apply_change(list(campaign_ids), list(tokens))
+            self._seq = rows[-1]["seq"]
+            if len(rows) < CHANGE_LOG_BATCH:
+                break
+
+        self._polls += 1
+        if self._polls % 1000 == 0:
+            self._client.table("row_changes").delete().lt("seq", self._seq - CHANGE_LOG_KEEP).execute()
+
+
+class RealtimeSource:
+    """Invalidations pushed by Supabase Realtime (runs an event loop on a daemon thread)"""
+
+    def __init__(self, url, key):
+        self._url = f"{url}/realtime/v1"
+        self._key = key
+        self.ready = False
+
+    def start(self, cache):
+        threading.Thread(target=asyncio.run, args=(self._listen(cache),),
+                         name="ltco-realtime", daemon=True).start()
+
+    def poll(self, cache):
+        pass
+
+    async def _listen(self, cache):
+        from realtime import AsyncRealtimeClient, RealtimeSubscribeStates
+
+        def on_change(payload):
+            data = payload["data"]
+            cache.apply_change(*row_change(data["table"], data.get("record"), data.get("old_record")))
+
+        def on_state(state, error):
+            subscribed = state == RealtimeSubscribeStates.SUBSCRIBED
+            if not subscribed:
+                # Changes may have been missed while not subscribed
+                cache.clear()
+                log_event(logger, logging.WARNING, "invalidation.realtime_down", state=str(state), error=error)
+            self.ready = subscribed
+
+        client = AsyncRealtimeClient(self._url, self._key)
+        await client.connect()
+        channel = client.channel("ltco-read-cache")
+        for table in ("campaigns", "influencers"):
+            channel.on_postgres_changes("*", callback=on_change, table=table, schema="public")
+        await channel.subscribe(on_state)
+        await asyncio.Event().wait()
+
+
+def create_read_cache(client, supabase_url=None, supabase_key=None):
+    """Build the share-token read cache with the change sources LTCO_CHANGE_SOURCE selects"""
+    cache = ReadCache()
+    cache.add_source(FeedSource())
+    if CHANGE_SOURCE == "sqlite":
+        cache.add_source(ChangeLogSource(client))
+    elif CHANGE_SOURCE == "realtime":
+        cache.add_source(RealtimeSource(supabase_url, supabase_key))
+    return cache
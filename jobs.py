@@ -0,0 +1,188 @@
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import db
+from metrics_history import now_timestamp
+from telemetry import get_logger, log_event
+
+# Background jobs for long operations (CSV imports and their bulk upserts).
+#
+# Saves from the forms and the influencer editor deliberately stay in the
+# script thread: save_campaign writes only the rows that changed since the
+# campaign was loaded, and the page has to handle an edit conflict or an
+# unavailable backend right away, while the edits are still on screen.
+#
+# A job runs on a process-wide thread pool rather than in the Streamlit
+# script thread, so the page stays responsive and the work finishes even if
+# the session reruns or the browser disconnects. Its status, progress and
+# result are kept in the jobs table (db.py), so any session can show them:
+# render_jobs() polls the table from an auto-refreshing fragment while jobs
+# this session started are running and reruns the page when one finishes.
+#
+# Job functions take a JobContext first and report progress through it.
+# They must not touch st.session_state or call Streamlit, and should work on
+# their own copy of any session data (see concurrency.detached_copy).
+
+JOB_WORKERS = int(os.getenv("LTCO_JOB_WORKERS", "2"))
+
+# Minimum seconds between progress writes for one job
+PROGRESS_INTERVAL = 0.5
+
+# Running jobs whose heartbeat (updated_at) is older than this were orphaned by a stopped process
+JOB_STALE_SECONDS = int(os.getenv("LTCO_JOB_STALE_SECONDS", "900"))
+
+# Seconds between status polls in the progress panel
+POLL_SECONDS = 1.0
+
+ACTIVE_STATUSES = ("queued", "running")
+
+logger = get_logger("jobs")
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _pool():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                try:
+                    db.fail_stale_jobs(ACTIVE_STATUSES, JOB_STALE_SECONDS)
+                except Exception as e:
+                    log_event(logger, logging.WARNING, "jobs.fail_stale_failed", error=e)
+                _executor = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="ltco-job")
+    return _executor
+
+
+class JobContext:
+    """Handed to a running job for reporting progress"""
+
+    def __init__(self, job_id):
+        self.job_id = job_id
+        self._last_write = 0.0
+
+    def progress(self, done, total=None, message=None):
+        """Record progress; writes are throttled to one per PROGRESS_INTERVAL except when done"""
+        now = time.monotonic()
+        finished = total is not None and done >= total
+        if not finished and now - self._last_write < PROGRESS_INTERVAL:
+            return
+        self._last_write = now
+
+        fields = {'done': done}
+        if total is not None:
+            fields['total'] = total
+        if message is not None:
+            fields['message'] = message
+        try:
+            db.update_job(self.job_id, **fields)
+        except Exception as e:
+            # Progress is informational; the job itself carries on
+            log_event(logger, logging.WARNING, "jobs.progress_failed", job_id=self.job_id, error=e)
+
+
+def submit(kind, func, *args, label=None, campaign_id=None, idempotency_key=None, **kwargs):
+    """Queue func(job_context, *args, **kwargs) on the job pool and return the job id.
+
+    If a job with the same idempotency_key is queued, running or finished,
+    nothing is queued and that job's id is returned instead (so a double
+    click or rerun doesn't do the work twice).
+    """
+    job_id = uuid.uuid4().hex
+    existing_id = db.create_job({
+        'id': job_id,
+        'kind': kind,
+        'label': label or kind,
+        'campaign_id': campaign_id,
+        'status': 'queued',
+        'done': 0,
+        'created_at': now_timestamp(),
+        'updated_at': now_timestamp(),
+        'idempotency_key': idempotency_key or job_id,
+    })
+    if existing_id != job_id:
+        log_event(logger, logging.INFO, "jobs.deduplicated", job_id=existing_id, kind=kind)
+        return existing_id
+    _pool().submit(_run, job_id, kind, func, args, kwargs)
+    return job_id
+
+
+def _run(job_id, kind, func, args, kwargs):
+    start = time.perf_counter()
+    # Everything is inside the try: the pool would drop an exception silently and leave the job "running"
+    try:
+        db.update_job(job_id, status='running', started_at=now_timestamp())
+        result = func(JobContext(job_id), *args, **kwargs)
+        db.update_job(job_id, status='succeeded', result=result, finished_at=now_timestamp())
+    except Exception as e:
+        log_event(logger, logging.ERROR, "jobs.failed", job_id=job_id, kind=kind, error=e)
+        try:
+            # Release the idempotency key so the same work can be submitted again
+            db.update_job(job_id, status='failed', error=str(e), finished_at=now_timestamp(), idempotency_key=None)
+        except Exception as update_error:
+            # Left to fail_stale_jobs once its heartbeat is old enough
+            log_event(logger, logging.ERROR, "jobs.fail_update_failed", job_id=job_id, error=update_error)
+        return
+    log_event(logger, logging.INFO, "jobs.succeeded", job_id=job_id, kind=kind,
+              duration_ms=round((time.perf_counter() - start) * 1000, 1))
+
+
+def watch(session_state, job_id):
+    """Show a job's progress in this session until it finishes"""
+    watched = session_state.setdefault('watched_jobs', [])
+    if job_id not in watched:
+        watched.append(job_id)
+
+
+def _job_label(job):
+    return job['label'] or job['kind']
+
+
+def render_jobs(session_state, campaign_id=None):
+    """Progress bars for the jobs this session started and other running jobs of the campaign.
+
+    Shown, and polled every POLL_SECONDS, only while a job this session
+    started is queued or running; otherwise the jobs table isn't queried.
+    When a watched job finishes the whole page reruns (so it shows the saved
+    data) and the outcome is left in session_state['job_message'] as
+    (level, text); a job can word the success text by returning
+    {'message': ...}.
+    """
+    import streamlit as st
+
+    def panel():
+        watched = session_state.get('watched_jobs', [])
+        jobs = {job['id']: job for job in db.get_jobs(job_ids=watched)} if watched else {}
+        if campaign_id is not None:
+            for job in db.get_jobs(campaign_id=campaign_id, statuses=ACTIVE_STATUSES):
+                jobs.setdefault(job['id'], job)
+
+        finished = [job for job in jobs.values() if job['id'] in watched and job['status'] not in ACTIVE_STATUSES]
+        if finished:
+            session_state['watched_jobs'] = [job_id for job_id in watched if job_id not in {job['id'] for job in finished}]
+            job = finished[-1]
+            if job['status'] == 'succeeded':
+                result = job['result'] if isinstance(job['result'], dict) else {}
+                session_state['job_message'] = ('success', result.get('message') or f"{_job_label(job)} finished")
+            else:
+                session_state['job_message'] = ('error', f"{_job_label(job)} failed: {job['error']}")
+            st.rerun()
+
+        for job in jobs.values():
+            if job['status'] not in ACTIVE_STATUSES:
+                continue
+            total = job['total'] or 0
+            fraction = min(job['done'] / total, 1.0) if total else 0.0
+            text = f"{_job_label(job)}: {job['message'] or job['status']}"
+            if total:
+                text += f" ({job['done']:,}/{total:,})"
+            st.progress(fraction, text=text)
+
+    # Watched jobs are dropped once finished, so this queries the table only while one is queued or running
+    if session_state.get('watched_jobs'):
+        st.fragment(panel, run_every=POLL_SECONDS)()
@@ -0,0 +1,50 @@
+import importlib
+import threading
+import time
+
+# Deferred imports for heavy libraries (pandas, Plotly).
+#
+# `px = lazy_import("plotly.express")` binds a proxy that imports the module
+# the first time an attribute is used, so modules can keep their usual
+# `px.bar(...)` code while pages that never build a figure never pay for
+# the import. How long each deferred import took is kept for the timing
+# panel; benchmarks/startup.py reports the import cost of every page.
+
+_lock = threading.Lock()
+_import_ms = {}
+
+
+class LazyModule:
+    """Module proxy that imports the real module on first attribute access"""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def _load(self):
+        if self._module is None:
+            with _lock:
+                if self._module is None:
+                    start = time.perf_counter()
+                    module = importlib.import_module(self._name)
+                    _import_ms[self._name] = round((time.perf_counter() - start) * 1000, 1)
+                    self._module = module
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module {self._name!r} ({state})>"
+
+
+def lazy_import(name):
+    """Return a proxy for module name that defers the import until first use"""
+    return LazyModule(name)
+
+
+def import_times():
+    """Return {module: milliseconds} for deferred imports that have happened in this process"""
+    with _lock:
+        return dict(_import_ms)
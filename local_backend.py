@@ -0,0 +1,566 @@
+import json
+import re
+import sqlite3
+import threading
+
+# SQLite stand-in for the Supabase client.
+#
+# Implements the small part of the supabase-py query builder that db.py uses
+# (table().select/insert/upsert/update/delete, eq/in_/... filters, order,
+# limit/range, execute, and rpc() for the database functions) on top of a local SQLite database, so benchmarks and
+# local runs don't need a Supabase project. Enable it with LTCO_BACKEND=sqlite.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS campaigns (
+    id INTEGER PRIMARY KEY,
+    name TEXT,
+    created_at TEXT,
+    share_token TEXT,
+    budget REAL DEFAULT 0,
+    metrics TEXT,
+    sharing_settings TEXT,
+    version INTEGER DEFAULT 0,
+    deleted_at TEXT,
+    updated_at TEXT
+);
+
+CREATE TABLE IF NOT EXISTS influencers (
+    id INTEGER PRIMARY KEY,
+    campaign_id INTEGER,
+    name TEXT,
+    username TEXT DEFAULT '',
+    platform TEXT,
+    post_type TEXT,
+    post_url TEXT,
+    views INTEGER DEFAULT 0,
+    likes INTEGER DEFAULT 0,
+    shares INTEGER DEFAULT 0,
+    comments INTEGER DEFAULT 0,
+    version INTEGER DEFAULT 0,
+    deleted_at TEXT,
+    updated_at TEXT
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS campaigns_share_token_idx ON campaigns (share_token);
+
+CREATE INDEX IF NOT EXISTS influencers_campaign_id_idx ON influencers (campaign_id);
+
+-- Append-only log of metric changes (values are deltas from the previous recording)
+CREATE TABLE IF NOT EXISTS influencer_metric_deltas (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    influencer_id INTEGER,
+    campaign_id INTEGER,
+    platform TEXT,
+    recorded_at TEXT,
+    views INTEGER DEFAULT 0,
+    likes INTEGER DEFAULT 0,
+    shares INTEGER DEFAULT 0,
+    comments INTEGER DEFAULT 0
+);
+
+CREATE INDEX IF NOT EXISTS influencer_metric_deltas_campaign_idx ON influencer_metric_deltas (campaign_id, recorded_at);
+CREATE INDEX IF NOT EXISTS influencer_metric_deltas_recorded_idx ON influencer_metric_deltas (recorded_at);
+
+-- Summed deltas per campaign, platform and day/week bucket
+CREATE TABLE IF NOT EXISTS campaign_metric_rollups (
+    campaign_id INTEGER,
+    platform TEXT,
+    period TEXT,
+    bucket TEXT,
+    views INTEGER DEFAULT 0,
+    likes INTEGER DEFAULT 0,
+    shares INTEGER DEFAULT 0,
+    comments INTEGER DEFAULT 0,
+    PRIMARY KEY (campaign_id, platform, period, bucket)
+);
+
+-- One row per live campaign for the sidebar list (see campaign_summaries.py)
+CREATE TABLE IF NOT EXISTS campaign_summaries (
+    campaign_id INTEGER PRIMARY KEY,
+    name TEXT,
+    created_at TEXT,
+    influencer_count INTEGER DEFAULT 0,
+    total_views INTEGER DEFAULT 0,
+    total_likes INTEGER DEFAULT 0,
+    total_shares INTEGER DEFAULT 0,
+    total_comments INTEGER DEFAULT 0
+);
+
+-- Background jobs started from the UI (see jobs.py)
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT,
+    label TEXT,
+    campaign_id INTEGER,
+    status TEXT,
+    done INTEGER DEFAULT 0,
+    total INTEGER,
+    message TEXT,
+    result TEXT,
+    error TEXT,
+    created_at TEXT,
+    started_at TEXT,
+    finished_at TEXT,
+    updated_at TEXT
+);
+
+CREATE INDEX IF NOT EXISTS jobs_campaign_idx ON jobs (campaign_id, created_at);
+
+-- Next free id per id space, handed out in blocks (see db.generate_numeric_ids)
+CREATE TABLE IF NOT EXISTS id_counters (
+    name TEXT PRIMARY KEY,
+    next_id INTEGER NOT NULL
+);
+
+-- Sync position of a local read replica (see replica.py)
+CREATE TABLE IF NOT EXISTS replica_watermarks (
+    table_name TEXT PRIMARY KEY,
+    watermark TEXT,
+    synced_at TEXT
+);
+"""
+
+# Indexes on columns in ADDED_COLUMNS, created once those columns exist
+INDEXES = """
+CREATE INDEX IF NOT EXISTS campaigns_updated_at_idx ON campaigns (updated_at, id);
+CREATE INDEX IF NOT EXISTS influencers_updated_at_idx ON influencers (updated_at, id);
+CREATE UNIQUE INDEX IF NOT EXISTS influencer_metric_deltas_idempotency_key_idx ON influencer_metric_deltas (idempotency_key);
+CREATE UNIQUE INDEX IF NOT EXISTS jobs_idempotency_key_idx ON jobs (idempotency_key);
+"""
+
+# Row change log for cache invalidation tests (see invalidation.py); only
+# installed by LocalClient.enable_change_log() since it adds a write per row
+CHANGE_LOG_SCHEMA = """
+CREATE TABLE IF NOT EXISTS row_changes (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    table_name TEXT,
+    row_id INTEGER,
+    campaign_id INTEGER,
+    old_campaign_id INTEGER,
+    share_token TEXT,
+    old_share_token TEXT
+);
+
+CREATE TRIGGER IF NOT EXISTS campaigns_log_insert AFTER INSERT ON campaigns BEGIN
+    INSERT INTO row_changes (table_name, row_id, campaign_id, share_token)
+    VALUES ('campaigns', NEW.id, NEW.id, NEW.share_token);
+END;
+CREATE TRIGGER IF NOT EXISTS campaigns_log_update AFTER UPDATE ON campaigns BEGIN
+    INSERT INTO row_changes (table_name, row_id, campaign_id, old_campaign_id, share_token, old_share_token)
+    VALUES ('campaigns', NEW.id, NEW.id, OLD.id, NEW.share_token, OLD.share_token);
+END;
+CREATE TRIGGER IF NOT EXISTS campaigns_log_delete AFTER DELETE ON campaigns BEGIN
+    INSERT INTO row_changes (table_name, row_id, old_campaign_id, old_share_token)
+    VALUES ('campaigns', OLD.id, OLD.id, OLD.share_token);
+END;
+
+CREATE TRIGGER IF NOT EXISTS influencers_log_insert AFTER INSERT ON influencers BEGIN
+    INSERT INTO row_changes (table_name, row_id, campaign_id)
+    VALUES ('influencers', NEW.id, NEW.campaign_id);
+END;
+CREATE TRIGGER IF NOT EXISTS influencers_log_update AFTER UPDATE ON influencers BEGIN
+    INSERT INTO row_changes (table_name, row_id, campaign_id, old_campaign_id)
+    VALUES ('influencers', NEW.id, NEW.campaign_id, OLD.campaign_id);
+END;
+CREATE TRIGGER IF NOT EXISTS influencers_log_delete AFTER DELETE ON influencers BEGIN
+    INSERT INTO row_changes (table_name, row_id, old_campaign_id)
+    VALUES ('influencers', OLD.id, OLD.campaign_id);
+END;
+"""
+
+# Columns added after the first release, added to existing database files on open
+ADDED_COLUMNS = {
+    "campaigns": {"version": "INTEGER DEFAULT 0", "deleted_at": "TEXT", "updated_at": "TEXT", "save_token": "TEXT"},
+    "influencers": {"version": "INTEGER DEFAULT 0", "deleted_at": "TEXT", "updated_at": "TEXT"},
+    "influencer_metric_deltas": {"idempotency_key": "TEXT"},
+    "jobs": {"idempotency_key": "TEXT"},
+}
+
+# Columns stored as JSON text locally (jsonb in Supabase)
+JSON_COLUMNS = {
+    "campaigns": {"metrics", "sharing_settings"},
+    "jobs": {"result"},
+}
+
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+def _identifier(name):
+    """Validate a table or column name before putting it into SQL"""
+    if not _IDENTIFIER.match(name):
+        raise ValueError(f"Invalid identifier: {name!r}")
+    return f'"{name}"'
+
+
+class LocalResponse:
+    """Mimics the APIResponse returned by supabase-py"""
+
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+    def __repr__(self):
+        return f"LocalResponse(rows={len(self.data)}, count={self.count})"
+
+
+class LocalQuery:
+    """Chainable query builder with the same method names as supabase-py"""
+
+    def __init__(self, client, table):
+        self._client = client
+        self._table = table
+        self._action = "select"
+        self._columns = "*"
+        self._count = None
+        self._payload = None
+        self._on_conflict = None
+        self._ignore_duplicates = False
+        self._filters = []
+        self._order = []
+        self._limit = None
+        self._offset = None
+
+    # Actions
+
+    def select(self, *columns, count=None):
+        columns = ",".join(columns) if columns else "*"
+        self._columns = columns
+        self._count = count
+        return self
+
+    def insert(self, json_data, **kwargs):
+        self._action = "insert"
+        self._payload = json_data
+        return self
+
+    def upsert(self, json_data, on_conflict="", ignore_duplicates=False, **kwargs):
+        self._action = "upsert"
+        self._payload = json_data
+        self._on_conflict = on_conflict or None
+        self._ignore_duplicates = ignore_duplicates
+        return self
+
+    def update(self, json_data, **kwargs):
+        self._action = "update"
+        self._payload = json_data
+        return self
+
+    def delete(self, **kwargs):
+        self._action = "delete"
+        return self
+
+    # Filters
+
+    def _filter(self, column, operator, value):
+        self._filters.append((f"{_identifier(column)} {operator} ?", [self._encode(column, value)]))
+        return self
+
+    def eq(self, column, value):
+        return self._filter(column, "=", value)
+
+    def neq(self, column, value):
+        return self._filter(column, "!=", value)
+
+    def gt(self, column, value):
+        return self._filter(column, ">", value)
+
+    def gte(self, column, value):
+        return self._filter(column, ">=", value)
+
+    def lt(self, column, value):
+        return self._filter(column, "<", value)
+
+    def lte(self, column, value):
+        return self._filter(column, "<=", value)
+
+    def like(self, column, pattern):
+        self._filters.append((f"{_identifier(column)} LIKE ? ESCAPE '\\'", [pattern]))
+        return self
+
+    def ilike(self, column, pattern):
+        self._filters.append((f"lower({_identifier(column)}) LIKE lower(?) ESCAPE '\\'", [pattern]))
+        return self
+
+    def in_(self, column, values):
+        values = list(values)
+        if not values:
+            self._filters.append(("0", []))
+        else:
+            placeholders = ",".join("?" * len(values))
+            self._filters.append((f"{_identifier(column)} IN ({placeholders})", values))
+        return self
+
+    def is_(self, column, value):
+        if value in (None, "null"):
+            self._filters.append((f"{_identifier(column)} IS NULL", []))
+        elif value == "not.null":
+            self._filters.append((f"{_identifier(column)} IS NOT NULL", []))
+        else:
+            raise ValueError(f"Unsupported is_ value: {value!r}")
+        return self
+
+    # Modifiers
+
+    def order(self, column, desc=False, **kwargs):
+        self._order.append(f"{_identifier(column)} {'DESC' if desc else 'ASC'}")
+        return self
+
+    def limit(self, size, **kwargs):
+        self._limit = int(size)
+        return self
+
+    def range(self, start, end, **kwargs):
+        self._offset = int(start)
+        self._limit = int(end) - int(start) + 1
+        return self
+
+    # Execution
+
+    def _encode(self, column, value):
+        if column in JSON_COLUMNS.get(self._table, ()) and value is not None:
+            return json.dumps(value)
+        if isinstance(value, bool):
+            return int(value)
+        return value
+
+    def _decode(self, row):
+        row = dict(row)
+        for column in JSON_COLUMNS.get(self._table, ()):
+            if isinstance(row.get(column), str):
+                row[column] = json.loads(row[column])
+        return row
+
+    def _where(self):
+        if not self._filters:
+            return "", []
+        params = []
+        for _, filter_params in self._filters:
+            params.extend(filter_params)
+        return " WHERE " + " AND ".join(sql for sql, _ in self._filters), params
+
+    def _select_columns(self):
+        if self._columns.strip() == "*":
+            return "*"
+        return ", ".join(_identifier(col.strip()) for col in self._columns.split(","))
+
+    def execute(self):
+        with self._client._lock:
+            if self._action == "select":
+                return self._execute_select()
+            if self._action in ("insert", "upsert"):
+                return self._execute_write()
+            if self._action == "update":
+                return self._execute_update()
+            return self._execute_delete()
+
+    def _execute_select(self):
+        where, params = self._where()
+        table = _identifier(self._table)
+        sql = f"SELECT {self._select_columns()} FROM {table}{where}"
+        if self._order:
+            sql += " ORDER BY " + ", ".join(self._order)
+        if self._limit is not None:
+            sql += f" LIMIT {self._limit}"
+            if self._offset:
+                sql += f" OFFSET {self._offset}"
+
+        rows = [self._decode(row) for row in self._client._conn.execute(sql, params)]
+
+        count = None
+        if self._count:
+            count = self._client._conn.execute(f"SELECT COUNT(*) FROM {table}{where}", params).fetchone()[0]
+        return LocalResponse(rows, count)
+
+    def _execute_write(self):
+        records = self._payload if isinstance(self._payload, list) else [self._payload]
+        if not records:
+            return LocalResponse([])
+
+        table = _identifier(self._table)
+        conflict = self._on_conflict or "id"
+        conflict_sql = ", ".join(_identifier(col.strip()) for col in conflict.split(","))
+        conn = self._client._conn
+
+        data = []
+        conn.execute("BEGIN")
+        try:
+            for record in records:
+                columns = list(record.keys())
+                column_sql = ", ".join(_identifier(col) for col in columns)
+                placeholders = ", ".join("?" * len(columns))
+                sql = f"INSERT INTO {table} ({column_sql}) VALUES ({placeholders})"
+
+                if self._action == "upsert":
+                    updates = [col for col in columns if col not in conflict.split(",")]
+                    if self._ignore_duplicates or not updates:
+                        sql += f" ON CONFLICT ({conflict_sql}) DO NOTHING"
+                    else:
+                        assignments = ", ".join(f"{_identifier(col)} = excluded.{_identifier(col)}" for col in updates)
+                        sql += f" ON CONFLICT ({conflict_sql}) DO UPDATE SET {assignments}"
+
+                values = [self._encode(col, record[col]) for col in columns]
+                data.extend(self._decode(row) for row in conn.execute(sql + " RETURNING *", values))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return LocalResponse(data)
+
+    def _execute_update(self):
+        where, params = self._where()
+        columns = list(self._payload.keys())
+        assignments = ", ".join(f"{_identifier(col)} = ?" for col in columns)
+        values = [self._encode(col, self._payload[col]) for col in columns]
+        sql = f"UPDATE {_identifier(self._table)} SET {assignments}{where} RETURNING *"
+        rows = self._client._conn.execute(sql, values + params).fetchall()
+        return LocalResponse([self._decode(row) for row in rows])
+
+    def _execute_delete(self):
+        where, params = self._where()
+        sql = f"DELETE FROM {_identifier(self._table)}{where} RETURNING *"
+        rows = self._client._conn.execute(sql, params).fetchall()
+        return LocalResponse([self._decode(row) for row in rows])
+
+
+def _delete_campaign_cascade(conn, p_campaign_ids):
+    """Delete campaigns with their influencers and metric history (mirrors the Supabase function)"""
+    marks = ", ".join("?" * len(p_campaign_ids))
+    for table in ("influencer_metric_deltas", "campaign_metric_rollups", "campaign_summaries"):
+        conn.execute(f"DELETE FROM {table} WHERE campaign_id IN ({marks})", p_campaign_ids)
+    influencers = conn.execute(f"DELETE FROM influencers WHERE campaign_id IN ({marks})", p_campaign_ids).rowcount
+    campaigns = conn.execute(f"DELETE FROM campaigns WHERE id IN ({marks})", p_campaign_ids).rowcount
+    return {"campaigns": campaigns, "influencers": influencers}
+
+
+def _reserve_ids(conn, p_name, p_count, p_floor):
+    """Reserve p_count consecutive ids and return the first (mirrors the Supabase function)"""
+    return conn.execute(
+        "INSERT INTO id_counters (name, next_id) VALUES (?, ? + ?) "
+        "ON CONFLICT (name) DO UPDATE SET next_id = MAX(next_id, ?) + ? RETURNING next_id - ?",
+        (p_name, p_floor, p_count, p_floor, p_count, p_count)
+    ).fetchone()[0]
+
+
+def _add_metric_rollups(conn, p_rows):
+    """Add each row's metrics to its rollup bucket in place (mirrors the Supabase function)"""
+    conn.executemany(
+        "INSERT INTO campaign_metric_rollups (campaign_id, platform, period, bucket, views, likes, shares, comments) "
+        "VALUES (:campaign_id, :platform, :period, :bucket, :views, :likes, :shares, :comments) "
+        "ON CONFLICT (campaign_id, platform, period, bucket) DO UPDATE SET "
+        "views = campaign_metric_rollups.views + excluded.views, "
+        "likes = campaign_metric_rollups.likes + excluded.likes, "
+        "shares = campaign_metric_rollups.shares + excluded.shares, "
+        "comments = campaign_metric_rollups.comments + excluded.comments",
+        p_rows
+    )
+    return len(p_rows)
+
+
+def _upsert_influencers_if_version(conn, p_rows):
+    """Write influencer rows, each only if still at its expected_version; returns the ids that were not.
+
+    Rows without an expected_version (new ones) are upserted unconditionally
+    (mirrors the Supabase function).
+    """
+    rejected = []
+    for row in p_rows:
+        row = dict(row)
+        expected = row.pop("expected_version", None)
+        columns = {column: _identifier(column) for column in row}
+        changed = [name for column, name in columns.items() if column != "id"]
+        if expected is None:
+            updates = ", ".join(f"{name} = excluded.{name}" for name in changed)
+            conn.execute(
+                f"INSERT INTO influencers ({', '.join(columns.values())}) VALUES ({', '.join('?' * len(columns))}) "
+                f"ON CONFLICT (id) DO UPDATE SET {updates}",
+                list(row.values())
+            )
+            continue
+        assignments = ", ".join(f"{name} = ?" for name in changed)
+        values = [value for column, value in row.items() if column != "id"]
+        updated = conn.execute(
+            f"UPDATE influencers SET {assignments} WHERE id = ? AND version = ? AND deleted_at IS NULL",
+            values + [row["id"], expected]
+        ).rowcount
+        if not updated:
+            rejected.append(row["id"])
+    return rejected
+
+
+# Database functions callable through client.rpc(), each run in one transaction
+RPC_FUNCTIONS = {
+    "add_metric_rollups": _add_metric_rollups,
+    "delete_campaign_cascade": _delete_campaign_cascade,
+    "reserve_ids": _reserve_ids,
+    "upsert_influencers_if_version": _upsert_influencers_if_version,
+}
+
+
+class LocalRPC:
+    """Mimics the builder returned by supabase-py's client.rpc()"""
+
+    def __init__(self, client, name, params):
+        if name not in RPC_FUNCTIONS:
+            raise ValueError(f"Unknown database function: {name!r}")
+        self._client = client
+        self._function = RPC_FUNCTIONS[name]
+        self._params = params or {}
+
+    def execute(self):
+        conn = self._client._conn
+        with self._client._lock:
+            conn.execute("BEGIN")
+            try:
+                data = self._function(conn, **self._params)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return LocalResponse(data)
+
+
+class LocalClient:
+    """Minimal Supabase-compatible client backed by SQLite"""
+
+    def __init__(self, path=":memory:"):
+        self.path = path
+        self._lock = threading.RLock()
+        # Autocommit mode; multi-row writes open their own transaction
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL" if path != ":memory:" else "PRAGMA journal_mode=MEMORY")
+        self._conn.executescript(SCHEMA)
+        self._add_missing_columns()
+        self._conn.executescript(INDEXES)
+
+    def _add_missing_columns(self):
+        for table, columns in ADDED_COLUMNS.items():
+            existing = {row[1] for row in self._conn.execute(f"PRAGMA table_info({_identifier(table)})")}
+            for column, definition in columns.items():
+                if column not in existing:
+                    self._conn.execute(f"ALTER TABLE {_identifier(table)} ADD COLUMN {_identifier(column)} {definition}")
+
+    def enable_change_log(self):
+        """Log every campaign and influencer row change to row_changes"""
+        with self._lock:
+            self._conn.executescript(CHANGE_LOG_SCHEMA)
+
+    def table(self, name):
+        return LocalQuery(self, name)
+
+    def rpc(self, name, params=None):
+        return LocalRPC(self, name, params)
+
+    def reset(self):
+        """Delete all rows from every table"""
+        with self._lock:
+            tables = [row[0] for row in self._conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'"
+            )]
+            for table in tables:
+                self._conn.execute(f"DELETE FROM {_identifier(table)}")
+
+
+def create_local_client(path=":memory:"):
+    """Create a local SQLite-backed client with the app schema"""
+    return LocalClient(path)
@@ -0,0 +1,183 @@
+import argparse
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+
+from lazy_imports import lazy_import
+
+pd = lazy_import("pandas")
+
+# Influencer metric history helpers (pure functions; db.py does the I/O).
+#
+# Every save that changes an influencer's views/likes/shares/comments appends
+# one row to influencer_metric_deltas holding the *change* since the last
+# recorded value (a new influencer's first row is its full value). The same
+# deltas are summed into campaign_metric_rollups per campaign, platform and
+# day/week bucket as they are written, so trend queries read a few hundred
+# rollup rows instead of the raw log. Raw deltas older than
+# LTCO_METRICS_RAW_DAYS are pruned by db.compact_metric_history().
+#
+# Deleting an influencer records its metrics as a negative delta, and saving
+# it again (an undo) records them as a positive one, so the trend follows the
+# campaign's live totals.
+#
+# Each delta row carries an idempotency key, "<influencer id>:<row version>"
+# (plus ":deleted" for a delete), so a retried insert of the same batch adds
+# nothing twice.
+#
+# Rollups are incremented in the database (add_metric_rollups, one
+# insert ... on conflict do update), so concurrent saves never overwrite each
+# other's increments. Supabase needs the same two tables as
+# local_backend.SCHEMA, with a unique constraint on campaign_metric_rollups
+# (campaign_id, platform, period, bucket) and on influencer_metric_deltas
+# (idempotency_key):
+#   alter table influencer_metric_deltas add column idempotency_key text;
+#   create unique index influencer_metric_deltas_idempotency_key_idx
+#     on influencer_metric_deltas (idempotency_key);
+#   create function add_metric_rollups(p_rows jsonb) returns integer
+#   language sql as $$
+#     with added as (
+#       insert into campaign_metric_rollups as r
+#         (campaign_id, platform, period, bucket, views, likes, shares, comments)
+#       select campaign_id, platform, period, bucket, views, likes, shares, comments
+#       from jsonb_to_recordset(p_rows) as x(campaign_id bigint, platform text, period text,
+#         bucket text, views bigint, likes bigint, shares bigint, comments bigint)
+#       on conflict (campaign_id, platform, period, bucket) do update set
+#         views = r.views + excluded.views, likes = r.likes + excluded.likes,
+#         shares = r.shares + excluded.shares, comments = r.comments + excluded.comments
+#       returning 1
+#     )
+#     select count(*)::integer from added;
+#   $$;
+#
+# Usage:
+#     python metrics_history.py backfill    # seed history for existing campaigns once
+#     python metrics_history.py compact     # prune old raw deltas (run daily)
+
+METRIC_FIELDS = ("views", "likes", "shares", "comments")
+
+PERIODS = ("day", "week")
+
+RAW_RETENTION_DAYS = int(os.getenv("LTCO_METRICS_RAW_DAYS", "30"))
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def now_timestamp():
+    """Current UTC time in the format stored in recorded_at"""
+    return datetime.now(timezone.utc).strftime(TIMESTAMP_FORMAT)
+
+
+def retention_cutoff(days=RAW_RETENTION_DAYS):
+    """recorded_at value before which raw deltas may be pruned"""
+    return (datetime.now(timezone.utc) - timedelta(days=days)).strftime(TIMESTAMP_FORMAT)
+
+
+def bucket_start(recorded_at, period):
+    """Return the bucket (YYYY-MM-DD of the day, or of the week's Monday) for a timestamp"""
+    day = recorded_at[:10]
+    if period == "day":
+        return day
+    date = datetime.strptime(day, "%Y-%m-%d")
+    return (date - timedelta(days=date.weekday())).strftime("%Y-%m-%d")
+
+
+def metric_values(record):
+    """Return the tracked metrics of an influencer as a tuple of ints"""
+    return tuple(int(record.get(field) or 0) for field in METRIC_FIELDS)
+
+
+def metric_deltas(influencers, previous, campaign_id, recorded_at, event=None):
+    """Build delta rows for influencers whose metrics differ from previous.
+
+    previous maps influencer id -> metric tuple as currently stored; ids that
+    are missing count as starting from zero. Influencers without a version
+    get no idempotency key; event (e.g. "deleted") is appended to the others.
+    """
+    zero = (0,) * len(METRIC_FIELDS)
+    rows = []
+    for influencer in influencers:
+        current = metric_values(influencer)
+        before = previous.get(influencer["id"], zero)
+        if current == before:
+            continue
+        key = f"{influencer['id']}:{influencer['version']}" if influencer.get("version") else None
+        row = {
+            "influencer_id": influencer["id"],
+            "campaign_id": influencer.get("campaign_id", campaign_id),
+            "platform": influencer.get("platform"),
+            "recorded_at": recorded_at,
+            "idempotency_key": f"{key}:{event}" if key and event else key,
+        }
+        row.update({field: now - then for field, now, then in zip(METRIC_FIELDS, current, before)})
+        rows.append(row)
+    return rows
+
+
+def rollup_increments(deltas):
+    """Sum delta rows into {(campaign_id, platform, period, bucket): [views, likes, shares, comments]}"""
+    increments = {}
+    for row in deltas:
+        values = [row[field] for field in METRIC_FIELDS]
+        for period in PERIODS:
+            key = (row["campaign_id"], row["platform"] or "", period, bucket_start(row["recorded_at"], period))
+            total = increments.get(key)
+            if total is None:
+                increments[key] = list(values)
+            else:
+                for i, value in enumerate(values):
+                    total[i] += value
+    return increments
+
+
+def rollup_rows(increments):
+    """Turn rollup increments into rows for add_metric_rollups"""
+    rows = []
+    for (campaign_id, platform, period, bucket), values in increments.items():
+        row = {"campaign_id": campaign_id, "platform": platform, "period": period, "bucket": bucket}
+        row.update(zip(METRIC_FIELDS, values))
+        rows.append(row)
+    return rows
+
+
+def cumulative_trend(rollups, by_platform=False):
+    """Turn rollup rows into a running-total DataFrame ordered by bucket.
+
+    Columns are bucket (datetime), views, likes, shares, comments and, with
+    by_platform, platform.
+    """
+    columns = ["bucket", *METRIC_FIELDS] + (["platform"] if by_platform else [])
+    if not rollups:
+        return pd.DataFrame(columns=columns)
+
+    df = pd.DataFrame(rollups)
+    keys = ["platform", "bucket"] if by_platform else ["bucket"]
+    df = df.groupby(keys, as_index=False)[list(METRIC_FIELDS)].sum().sort_values(keys)
+    if by_platform:
+        df[list(METRIC_FIELDS)] = df.groupby("platform")[list(METRIC_FIELDS)].cumsum()
+    else:
+        df[list(METRIC_FIELDS)] = df[list(METRIC_FIELDS)].cumsum()
+    df["bucket"] = pd.to_datetime(df["bucket"])
+    return df[columns].reset_index(drop=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Maintain the influencer metric history")
+    sub = parser.add_subparsers(dest="command", required=True)
+    compact = sub.add_parser("compact", help="delete raw deltas that are already in the rollups")
+    compact.add_argument("--days", type=int, default=RAW_RETENTION_DAYS,
+                         help="keep raw deltas from the last N days")
+    sub.add_parser("backfill", help="record current metrics for campaigns without any history")
+    args = parser.parse_args(argv)
+
+    import db
+
+    if args.command == "compact":
+        print(f"Deleted {db.compact_metric_history(args.days)} raw metric deltas")
+    else:
+        print(f"Recorded {db.backfill_metric_history()} starting metric values")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
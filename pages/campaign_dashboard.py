@@ -1,9 +1,14 @@
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
 from datetime import datetime
-from db import save_campaign
+from db import save_campaign, get_metric_trend
+from profiling import start_rerun, span, render_timing_panel, fragment_timings
+from shared_state import bootstrap_session, reload_campaign
+from concurrency import EditConflictError
+from resilience import BackendUnavailableError
+from charts import platform_pie, views_by_platform, post_type_bar, engagement_by_platform, efficiency_gauge, influencer_totals, metrics_trend
+from influencer_table import (
+    influencer_frame, ranking_index, filter_options, table_limit, show_more, display_table, RANKING_PAGE_SIZE
+)
 
 # Set page configuration - MUST BE THE FIRST STREAMLIT COMMAND
 st.set_page_config(
@@ -12,6 +17,9 @@ st.set_page_config(
     layout="wide"
 )
 
+# Start recording per-rerun timings
+start_rerun("campaign_dashboard")
+
 # Hide Streamlit's default GitHub link and menu
 hide_streamlit_elements = """
 <style>
@@ -27,10 +35,12 @@ header {visibility: hidden;}
 """
 st.markdown(hide_streamlit_elements, unsafe_allow_html=True)
 
-# Check if session state is initialized
-if 'campaigns' not in st.session_state or 'current_campaign_id' not in st.session_state:
-    st.error("Please navigate to the main page first to select or create a campaign.")
-    st.stop()
+# Set up the session (or open the ?campaign_id= deep link) and pick up changes from other sessions
+bootstrap_session(st.session_state, st.query_params)
+
+# Tell the user if their last save clashed with someone else's
+if 'save_conflict' in st.session_state:
+    st.warning(st.session_state.pop('save_conflict'))
 
 # Check if a campaign is selected
 if st.session_state.current_campaign_id is None:
@@ -45,291 +55,237 @@ current_campaign = st.session_state.campaigns[st.session_state.current_campaign_
 # Helper function to save campaign data
 def save_campaign_data():
     """Save campaign data to database"""
-    save_campaign(current_campaign)
+    try:
+        save_campaign(current_campaign)
+    except EditConflictError as e:
+        # Someone else saved overlapping changes first: show theirs instead
+        reload_campaign(st.session_state, current_campaign['id'])
+        st.session_state.save_conflict = str(e)
+        st.rerun()
+    except BackendUnavailableError as e:
+        # Nothing was lost: the edits stay in this session and go out with the next save
+        st.session_state.save_conflict = f"{e}. Your changes were not saved yet."
+        st.rerun()
 
-# Page header
-st.title(f"Dashboard: {current_campaign['name']}")
+# The page is split into sections. Those with widgets are st.fragment, so
+# interacting with one (budget editor, trend selector, table filters) reruns
+# only that section; saves still rerun the whole page so every section sees them.
 
-# Campaign budget section
-st.header("Campaign Budget")
-budget_col1, budget_col2 = st.columns(2)
+@st.fragment
+def budget_section(campaign):
+    """Current budget and the budget editor"""
+    with fragment_timings("campaign_dashboard", "budget"):
+        st.header("Campaign Budget")
+        budget_col1, budget_col2 = st.columns(2)
+        
+        with budget_col1:
+            # Display current budget
+            current_budget = campaign.get('budget', 0.0)
+            st.metric("Total Budget", f"₹{current_budget:,.2f}")
+        
+        with budget_col2:
+            # Allow editing the budget
+            new_budget = st.number_input(
+                "Edit Budget (₹)",
+                min_value=0.0,
+                value=float(current_budget),
+                step=1000.0,
+                format="%.2f"
+            )
+            
+            if st.button("Update Budget"):
+                campaign['budget'] = float(new_budget)
+                save_campaign_data()
+                # Full rerun so the KPI tiles and efficiency gauge pick up the new budget
+                st.rerun()
 
-with budget_col1:
-    # Display current budget
-    current_budget = current_campaign.get('budget', 0.0)
-    st.metric("Total Budget", f"₹{current_budget:,.2f}")
 
-with budget_col2:
-    # Allow editing the budget
-    new_budget = st.number_input(
-        "Edit Budget (₹)",
-        min_value=0.0,
-        value=float(current_budget),
-        step=1000.0,
-        format="%.2f"
-    )
+def kpi_section(campaign):
+    """Headline metric tiles (read from the stored campaign totals, no frame needed)"""
+    st.header("Campaign Analytics")
+    metrics = campaign['metrics']
+    budget = campaign.get('budget', 0)
     
-    if st.button("Update Budget"):
-        current_campaign['budget'] = float(new_budget)
-        save_campaign_data()
-        st.success("Budget updated successfully!")
-        st.rerun()
-
-# Campaign analytics section
-st.header("Campaign Analytics")
+    # Display key metrics in a prominent way
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Total Views", f"{metrics['total_views']:,}")
+    with col2:
+        st.metric("Budget", f"₹{budget:,.2f}")
+    
+    # Calculate cost per view if views > 0 and budget > 0
+    if metrics['total_views'] > 0 and budget > 0:
+        cost_per_view = budget / metrics['total_views']
+        with col3:
+            st.metric("Budget per View", f"₹{cost_per_view:.4f}")
+    
+    # Display engagement metrics
+    col4, col5, col6 = st.columns(3)
+    with col4:
+        st.metric("Total Likes", f"{metrics.get('total_likes', 0):,}")
+    with col5:
+        st.metric("Total Shares", f"{metrics.get('total_shares', 0):,}")
+    with col6:
+        st.metric("Total Comments", f"{metrics.get('total_comments', 0):,}")
 
-# Display key metrics in a prominent way
-col1, col2, col3 = st.columns(3)
-with col1:
-    st.metric("Total Views", f"{current_campaign['metrics']['total_views']:,}")
-with col2:
-    st.metric("Budget", f"₹{current_campaign.get('budget', 0):,.2f}")
 
-# Calculate cost per view if views > 0 and budget > 0
-if current_campaign['metrics']['total_views'] > 0 and current_campaign.get('budget', 0) > 0:
-    cost_per_view = current_campaign.get('budget', 0) / current_campaign['metrics']['total_views']
-    with col3:
-        st.metric("Budget per View", f"₹{cost_per_view:.4f}")
+@st.fragment
+def trend_section(campaign):
+    """Growth over time from the metric history rollups"""
+    with fragment_timings("campaign_dashboard", "trend"), span("chart.metrics_trend", "chart"):
+        trend_cols = st.columns(2)
+        with trend_cols[0]:
+            trend_metric = st.selectbox("Trend Metric", ["views", "likes", "shares", "comments"],
+                                        format_func=str.capitalize, key="trend_metric")
+        with trend_cols[1]:
+            trend_period = st.radio("Trend Period", ["day", "week"], horizontal=True,
+                                    format_func=lambda p: "Daily" if p == "day" else "Weekly", key="trend_period")
+        
+        trend = get_metric_trend(campaign['id'], period=trend_period)
+        if trend.empty:
+            st.info("Growth history is recorded from the next time influencer metrics change")
+        else:
+            st.plotly_chart(metrics_trend(trend, trend_metric, trend_period), use_container_width=True)
 
-# Display engagement metrics
-col4, col5, col6 = st.columns(3)
-with col4:
-    total_likes = current_campaign['metrics'].get('total_likes', 0)
-    st.metric("Total Likes", f"{total_likes:,}")
-with col5:
-    total_shares = current_campaign['metrics'].get('total_shares', 0)
-    st.metric("Total Shares", f"{total_shares:,}")
-with col6:
-    total_comments = current_campaign['metrics'].get('total_comments', 0)
-    st.metric("Total Comments", f"{total_comments:,}")
 
-# Create dataframe from influencers data for visualization
-if not current_campaign["influencers"]:
-    st.info("Add influencers to view analytics and charts")
-else:
-    # Convert influencers list to DataFrame
-    influencers_df = pd.DataFrame(current_campaign["influencers"])
-    
+def charts_section(campaign):
+    """Performance and engagement charts (figures are cached per campaign revision)"""
     # Charts Row 1
     st.subheader("Performance Analysis")
     chart_col1, chart_col2 = st.columns(2)
     
-    with chart_col1:
+    with chart_col1, span("chart.platform_pie", "chart"):
         # Platform distribution pie chart
-        platform_counts = influencers_df['platform'].value_counts().reset_index()
-        platform_counts.columns = ['Platform', 'Count']
-        
-        fig_platform = px.pie(
-            platform_counts, 
-            values='Count', 
-            names='Platform',
-            title='Influencers by Platform',
-            hole=0.4,
-            color_discrete_sequence=px.colors.qualitative.Pastel
-        )
-        st.plotly_chart(fig_platform, use_container_width=True)
+        st.plotly_chart(platform_pie(campaign), use_container_width=True)
     
-    with chart_col2:
+    with chart_col2, span("chart.views_by_platform", "chart"):
         # Views by platform bar chart
-        platform_views = influencers_df.groupby('platform')['views'].sum().reset_index()
-        
-        fig_views = px.bar(
-            platform_views,
-            x='platform',
-            y='views',
-            title='Views by Platform',
-            labels={'platform': 'Platform', 'views': 'Views'},
-            color='platform',
-            color_discrete_sequence=px.colors.qualitative.Pastel
-        )
-        st.plotly_chart(fig_views, use_container_width=True)
+        st.plotly_chart(views_by_platform(campaign), use_container_width=True)
     
     # Charts Row 2
     chart_col3, chart_col4 = st.columns(2)
     
-    with chart_col3:
+    with chart_col3, span("chart.post_type_bar", "chart"):
         # Post type distribution
-        post_counts = influencers_df['post_type'].value_counts().reset_index()
-        post_counts.columns = ['Post Type', 'Count']
-        
-        fig_post = px.bar(
-            post_counts,
-            x='Post Type',
-            y='Count',
-            title='Content by Post Type',
-            color='Post Type',
-            color_discrete_sequence=px.colors.qualitative.Pastel
-        )
-        st.plotly_chart(fig_post, use_container_width=True)
+        st.plotly_chart(post_type_bar(campaign), use_container_width=True)
     
-    # Removed Campaign Budget Overview pie chart from chart_col4
-    # with chart_col4:
-    #     # Budget allocation
-    #     # Create a pie chart showing how the budget is distributed
-    #     # This is conceptual since we don't allocate budget per influencer anymore
-    #     total_influencers = len(influencers_df)
-    #     if total_influencers > 0 and current_campaign.get('budget', 0) > 0:
-    #         # Just for visualization, we'll distribute budget equally
-    #         fig_budget = px.pie(
-    #             names=['Allocated Budget'],
-    #             values=[current_campaign.get('budget', 0)],
-    #             title='Campaign Budget Overview',
-    #             color_discrete_sequence=px.colors.qualitative.Pastel
-    #         )
-    #         fig_budget.update_traces(textinfo='value+percent')
-    #         st.plotly_chart(fig_budget, use_container_width=True)
-    #     else:
-    #         st.info("Set a budget for your campaign to see budget visualization")
+    with chart_col4:
+        # Trend controls only rerun the trend chart
+        trend_section(campaign)
     
     # Charts Row 3 - Engagement Metrics
     st.subheader("Engagement Analysis")
     engagement_col1, engagement_col2 = st.columns(2)
     
-    with engagement_col1:
+    with engagement_col1, span("chart.engagement_by_platform", "chart"):
         # Engagement breakdown by platform
-        engagement_data = influencers_df.groupby('platform').agg({
-            'likes': 'sum',
-            'shares': 'sum',
-            'comments': 'sum'
-        }).reset_index()
-        
-        # Reshape for plotting
-        engagement_melted = pd.melt(
-            engagement_data,
-            id_vars=['platform'],
-            value_vars=['likes', 'shares', 'comments'],
-            var_name='Engagement Type',
-            value_name='Count'
-        )
-        
-        fig_engagement_breakdown = px.bar(
-            engagement_melted,
-            x='platform',
-            y='Count',
-            color='Engagement Type',
-            title='Engagement Breakdown by Platform',
-            labels={'platform': 'Platform', 'Count': 'Number of Engagements'},
-            barmode='group',
-            color_discrete_sequence=px.colors.qualitative.Pastel
+        st.plotly_chart(
+            engagement_by_platform(campaign, title='Engagement Breakdown by Platform', axis_labels=True),
+            use_container_width=True
         )
-        st.plotly_chart(fig_engagement_breakdown, use_container_width=True)
     
-    with engagement_col2:
+    with engagement_col2, span("chart.efficiency_gauge", "chart"):
         # Budget efficiency - Views per theoretical budget allocation
-        total_views = influencers_df['views'].sum()
-        campaign_budget = current_campaign.get('budget', 0)
+        total_views = influencer_totals(campaign)['views']
+        campaign_budget = campaign.get('budget', 0)
         
         if total_views > 0 and campaign_budget > 0:
             # Calculate views per rupee
             views_per_rupee = total_views / campaign_budget
             
             # Create a gauge chart for budget efficiency
-            fig = go.Figure(go.Indicator(
-                mode="gauge+number",
-                value=views_per_rupee,
-                title={'text': "Views per ₹"},
-                gauge={
-                    'axis': {'range': [0, views_per_rupee * 2]},
-                    'bar': {'color': "lightblue"},
-                    'steps': [
-                        {'range': [0, views_per_rupee/2], 'color': "lightgray"},
-                        {'range': [views_per_rupee/2, views_per_rupee * 1.5], 'color': "gray"}
-                    ],
-                }
-            ))
-            st.plotly_chart(fig, use_container_width=True)
+            st.plotly_chart(efficiency_gauge(views_per_rupee), use_container_width=True)
         else:
             st.info("Need views and budget to calculate efficiency")
-    
-    # Detailed influencer performance
-    st.header("Influencer Performance")
-    
-    # Add filters
-    st.subheader("Filter Data")
-    filter_col1, filter_col2, filter_col3 = st.columns(3)
-    
-    with filter_col1:
-        # Platform filter
-        platforms = ['All'] + list(influencers_df['platform'].unique())
-        selected_platform = st.selectbox("Platform", platforms)
-    
-    with filter_col2:
-        # Post type filter
-        post_types = ['All'] + list(influencers_df['post_type'].unique())
-        selected_post_type = st.selectbox("Post Type", post_types)
-    
-    with filter_col3:
-        # Sort options
-        sort_options = ['Name', 'Views', 'Likes', 'Shares', 'Comments']
-        sort_by = st.selectbox("Sort By", sort_options)
-    
-    # Apply filters
-    filtered_df = influencers_df.copy()
-    if selected_platform != 'All':
-        filtered_df = filtered_df[filtered_df['platform'] == selected_platform]
-    
-    if selected_post_type != 'All':
-        filtered_df = filtered_df[filtered_df['post_type'] == selected_post_type]
-    
-    # Apply sorting
-    if sort_by == 'Name':
-        filtered_df = filtered_df.sort_values('name')
-    elif sort_by == 'Views':
-        filtered_df = filtered_df.sort_values('views', ascending=False)
-    elif sort_by == 'Likes':
-        filtered_df = filtered_df.sort_values('likes', ascending=False)
-    elif sort_by == 'Shares':
-        filtered_df = filtered_df.sort_values('shares', ascending=False)
-    elif sort_by == 'Comments':
-        filtered_df = filtered_df.sort_values('comments', ascending=False)
-    
-    # Display filtered influencer data
-    if not filtered_df.empty:
-        st.subheader(f"Showing {len(filtered_df)} Influencers")
+
+
+@st.fragment
+def influencer_table_section(campaign):
+    """Filterable influencer performance table and its CSV export"""
+    with fragment_timings("campaign_dashboard", "influencer_table"):
+        # Built once per campaign revision and shared across fragment reruns
+        with span("frame.influencers", "frame"):
+            influencers_df = influencer_frame(campaign)
         
-        # Create a clean display dataframe
-        display_df = filtered_df[['name', 'username', 'platform', 'post_type', 'views', 'likes', 'shares', 'comments']]
-        display_df.columns = ['Name', 'Username', 'Platform', 'Post Type', 'Views', 'Likes', 'Shares', 'Comments']
+        # Detailed influencer performance
+        st.header("Influencer Performance")
         
-        # Format numeric columns
-        display_df['Views'] = display_df['Views'].apply(lambda x: f"{x:,}")
-        display_df['Likes'] = display_df['Likes'].apply(lambda x: f"{x:,}")
-        display_df['Shares'] = display_df['Shares'].apply(lambda x: f"{x:,}")
-        display_df['Comments'] = display_df['Comments'].apply(lambda x: f"{x:,}")
+        # Add filters
+        st.subheader("Filter Data")
+        filter_col1, filter_col2, filter_col3 = st.columns(3)
         
-        # Calculate totals row
-        totals = {
-            'Name': 'TOTAL',
-            'Username': '',
-            'Platform': '',
-            'Post Type': '',
-            'Views': f"{filtered_df['views'].sum():,}",
-            'Likes': f"{filtered_df['likes'].sum():,}",
-            'Shares': f"{filtered_df['shares'].sum():,}",
-            'Comments': f"{filtered_df['comments'].sum():,}"
-        }
+        with filter_col1:
+            # Platform filter
+            selected_platform = st.selectbox("Platform", filter_options(influencers_df, 'platform'))
         
-        # Add totals row to dataframe
-        display_df = pd.concat([display_df, pd.DataFrame([totals])], ignore_index=True)
+        with filter_col2:
+            # Post type filter
+            selected_post_type = st.selectbox("Post Type", filter_options(influencers_df, 'post_type'))
         
-        # Display the dataframe
-        st.dataframe(display_df, use_container_width=True)
-    else:
-        st.info("No influencers match the selected filters")
-    
-    # Export options
-    st.subheader("Export Data")
-    
-    # Create CSV data
-    csv = filtered_df.to_csv(index=False)
-    
-    st.download_button(
-        label="Export to CSV",
-        data=csv,
-        file_name=f"{current_campaign['name']}_influencers.csv",
-        mime="text/csv"
-    )
+        with filter_col3:
+            # Sort options
+            sort_options = ['Name', 'Views', 'Likes', 'Shares', 'Comments']
+            sort_by = st.selectbox("Sort By", sort_options)
+        
+        # Only the top rows are ranked and shown; totals come from the precomputed group sums
+        filters = (selected_platform, selected_post_type, sort_by)
+        limit = table_limit(st.session_state, "dashboard_table_rows", filters)
+        with span("frame.filter_sort", "frame"):
+            ranking = ranking_index(campaign)
+            matched, totals = ranking.totals(selected_platform, selected_post_type)
+            top_df = ranking.rank(*filters, limit=limit)
+        
+        # Display filtered influencer data
+        if matched:
+            st.subheader(f"Showing {len(top_df):,} of {matched:,} Influencers")
+            
+            # Clean display dataframe with a totals row
+            display_df = display_table(
+                top_df, ['name', 'username', 'platform', 'post_type', 'views', 'likes', 'shares', 'comments'], totals
+            )
+            
+            # Display the dataframe
+            with span("render.influencer_table", "render"):
+                st.dataframe(display_df, use_container_width=True)
+            
+            if len(top_df) < matched:
+                st.button(f"Load {min(RANKING_PAGE_SIZE, matched - len(top_df)):,} more",
+                          on_click=show_more, args=(st.session_state, "dashboard_table_rows"))
+        else:
+            st.info("No influencers match the selected filters")
+        
+        # Export options
+        st.subheader("Export Data")
+        
+        # The CSV of every matching row is only built when the button is clicked
+        def export_csv():
+            with span("frame.export_csv", "frame"):
+                return ranking.rank(*filters).to_csv(index=False)
+        
+        st.download_button(
+            label="Export to CSV",
+            data=export_csv,
+            file_name=f"{campaign['name']}_influencers.csv",
+            mime="text/csv"
+        )
+
+
+# Page header
+st.title(f"Dashboard: {current_campaign['name']}")
+
+budget_section(current_campaign)
+
+kpi_section(current_campaign)
+
+if not current_campaign["influencers"]:
+    st.info("Add influencers to view analytics and charts")
+else:
+    charts_section(current_campaign)
+    influencer_table_section(current_campaign)
 
 # Footer
 st.markdown("---")
-st.markdown("Campaign Manager v1.0 | Campaign Dashboard")
\ No newline at end of file
+st.markdown("Campaign Manager v1.0 | Campaign Dashboard")
+
+# Show the admin timing panel (hidden unless requested) and export timings
+render_timing_panel()
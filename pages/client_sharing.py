@@ -1,10 +1,13 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
 import uuid
 from datetime import datetime
-from db import save_campaign
+from db import save_campaign, mint_share_token
+from profiling import start_rerun, span, render_timing_panel
+from shared_state import bootstrap_session, reload_campaign
+from concurrency import EditConflictError
+from resilience import BackendUnavailableError
+from charts import platform_pie, post_type_bar, engagement_by_platform, views_by_platform, number_indicator
 
 # Set page configuration - MUST BE THE FIRST STREAMLIT COMMAND
 st.set_page_config(
@@ -13,6 +16,9 @@ st.set_page_config(
     layout="wide"
 )
 
+# Start recording per-rerun timings
+start_rerun("client_sharing")
+
 # Hide Streamlit's default GitHub link and menu
 hide_streamlit_elements = """
 <style>
@@ -28,10 +34,12 @@ header {visibility: hidden;}
 """
 st.markdown(hide_streamlit_elements, unsafe_allow_html=True)
 
-# Check if session state is initialized
-if 'campaigns' not in st.session_state or 'current_campaign_id' not in st.session_state:
-    st.error("Please navigate to the main page first to select or create a campaign.")
-    st.stop()
+# Set up the session (or open the ?campaign_id= deep link) and pick up changes from other sessions
+bootstrap_session(st.session_state, st.query_params)
+
+# Tell the user if their last save clashed with someone else's
+if 'save_conflict' in st.session_state:
+    st.warning(st.session_state.pop('save_conflict'))
 
 # Check if a campaign is selected
 if st.session_state.current_campaign_id is None:
@@ -46,7 +54,17 @@ current_campaign = st.session_state.campaigns[st.session_state.current_campaign_
 # Helper function to save campaign data
 def save_campaign_data():
     """Save campaign data to database"""
-    save_campaign(current_campaign)
+    try:
+        save_campaign(current_campaign)
+    except EditConflictError as e:
+        # Someone else saved overlapping changes first: show theirs instead
+        reload_campaign(st.session_state, current_campaign['id'])
+        st.session_state.save_conflict = str(e)
+        st.rerun()
+    except BackendUnavailableError as e:
+        # Nothing was lost: the edits stay in this session and go out with the next save
+        st.session_state.save_conflict = f"{e}. Your changes were not saved yet."
+        st.rerun()
 
 # Page header
 st.title(f"Client Sharing: {current_campaign['name']}")
@@ -54,7 +72,7 @@ st.title(f"Client Sharing: {current_campaign['name']}")
 # Create tabs for different sections
 tab1, tab2 = st.tabs(["Sharing Settings", "Preview Client View"])
 
-with tab1:
+with tab1, span("render.settings_tab", "render"):
     st.header("Configure Sharing Settings")
     
     # Display current token
@@ -91,7 +109,7 @@ with tab1:
     with col2:
         if st.button("Generate New Token"):
             # Generate new token
-            new_token = str(uuid.uuid4())[:8]
+            new_token = mint_share_token()
             current_campaign['share_token'] = new_token
             save_campaign_data()
             st.success("New token generated!")
@@ -200,7 +218,7 @@ with tab1:
         save_campaign_data()
         st.success("Sharing settings saved successfully!")
 
-with tab2:
+with tab2, span("render.preview_tab", "render"):
     st.header("Client View Preview")
     
     # Get sharing settings
@@ -259,117 +277,46 @@ with tab2:
     if sharing_settings.get('include_dashboard', True) and current_campaign["influencers"]:
         st.subheader("Campaign Analytics")
         
-        # Convert influencers list to DataFrame
-        influencers_df = pd.DataFrame(current_campaign["influencers"])
-        
-        # Charts Row 1
+        # Charts Row 1 (figures are cached per campaign revision)
         chart_col1, chart_col2 = st.columns(2)
         
-        with chart_col1:
+        with chart_col1, span("chart.platform_pie", "chart"):
             # Platform distribution pie chart
-            platform_counts = influencers_df['platform'].value_counts().reset_index()
-            platform_counts.columns = ['Platform', 'Count']
-            
-            fig_platform = px.pie(
-                platform_counts, 
-                values='Count', 
-                names='Platform',
-                title='Influencers by Platform',
-                hole=0.4,
-                color_discrete_sequence=px.colors.qualitative.Pastel
-            )
-            st.plotly_chart(fig_platform, use_container_width=True)
+            st.plotly_chart(platform_pie(current_campaign), use_container_width=True)
         
-        with chart_col2:
+        with chart_col2, span("chart.post_type_bar", "chart"):
             # Post type distribution
-            post_counts = influencers_df['post_type'].value_counts().reset_index()
-            post_counts.columns = ['Post Type', 'Count']
-            
-            fig_post = px.bar(
-                post_counts,
-                x='Post Type',
-                y='Count',
-                title='Content by Post Type',
-                color='Post Type',
-                color_discrete_sequence=px.colors.qualitative.Pastel
-            )
-            st.plotly_chart(fig_post, use_container_width=True)
+            st.plotly_chart(post_type_bar(current_campaign), use_container_width=True)
         
         # Show engagement charts if enabled
         if sharing_settings.get('include_engagement_metrics', True):
             engagement_cols = st.columns(2)
             
-            with engagement_cols[0]:
+            with engagement_cols[0], span("chart.engagement_by_platform", "chart"):
                 # Engagement by platform
-                platform_engagement = influencers_df.groupby('platform').agg({
-                    'likes': 'sum',
-                    'shares': 'sum',
-                    'comments': 'sum'
-                }).reset_index()
-                
-                # Reshape for plotting
-                platform_engagement_melted = pd.melt(
-                    platform_engagement,
-                    id_vars=['platform'],
-                    value_vars=['likes', 'shares', 'comments'],
-                    var_name='Engagement Type',
-                    value_name='Count'
-                )
-                
-                fig_engagement = px.bar(
-                    platform_engagement_melted,
-                    x='platform',
-                    y='Count',
-                    color='Engagement Type',
-                    title='Engagement by Platform',
-                    barmode='group',
-                    color_discrete_sequence=px.colors.qualitative.Pastel
-                )
-                st.plotly_chart(fig_engagement, use_container_width=True)
+                st.plotly_chart(engagement_by_platform(current_campaign), use_container_width=True)
             
-            with engagement_cols[1]:
+            with engagement_cols[1], span("chart.views_by_platform", "chart"):
                 # Views by platform
-                platform_views = influencers_df.groupby('platform')['views'].sum().reset_index()
-                
-                fig_views = px.bar(
-                    platform_views,
-                    x='platform',
-                    y='views',
-                    title='Views by Platform',
-                    labels={'platform': 'Platform', 'views': 'Views'},
-                    color='platform',
-                    color_discrete_sequence=px.colors.qualitative.Pastel
-                )
-                st.plotly_chart(fig_views, use_container_width=True)
+                st.plotly_chart(views_by_platform(current_campaign), use_container_width=True)
         
         # Show budget charts if enabled
         if sharing_settings.get('include_budget', False) and current_campaign.get('budget', 0) > 0:
             budget_cols = st.columns(2)
             
-            with budget_cols[0]:
+            with budget_cols[0], span("chart.budget_indicator", "chart"):
                 # Budget overview
-                fig_budget = go.Figure()
-                fig_budget.add_trace(go.Indicator(
-                    mode="number+delta",
-                    value=current_campaign.get('budget', 0),
-                    title={"text": "Campaign Budget (₹)"},
-                    domain={'x': [0, 1], 'y': [0, 1]}
-                ))
-                st.plotly_chart(fig_budget, use_container_width=True)
+                st.plotly_chart(
+                    number_indicator(current_campaign.get('budget', 0), "Campaign Budget (₹)", mode="number+delta"),
+                    use_container_width=True
+                )
             
-            with budget_cols[1]:
+            with budget_cols[1], span("chart.efficiency_indicator", "chart"):
                 # Budget efficiency (views per rupee)
                 if current_campaign['metrics']['total_views'] > 0:
                     views_per_rupee = current_campaign['metrics']['total_views'] / current_campaign.get('budget', 1)
                     
-                    fig_efficiency = go.Figure()
-                    fig_efficiency.add_trace(go.Indicator(
-                        mode="number",
-                        value=views_per_rupee,
-                        title={"text": "Views per ₹"},
-                        domain={'x': [0, 1], 'y': [0, 1]}
-                    ))
-                    st.plotly_chart(fig_efficiency, use_container_width=True)
+                    st.plotly_chart(number_indicator(views_per_rupee, "Views per ₹"), use_container_width=True)
     
     # Show influencer details if enabled
     if sharing_settings.get('include_influencer_details', True) and current_campaign["influencers"]:
@@ -449,4 +396,7 @@ with tab2:
 
 # Footer
 st.markdown("---")
-st.markdown("Campaign Manager v1.0 | Client Sharing Module")
\ No newline at end of file
+st.markdown("Campaign Manager v1.0 | Client Sharing Module")
+
+# Show the admin timing panel (hidden unless requested) and export timings
+render_timing_panel()
@@ -1,11 +1,12 @@
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
 from datetime import datetime
 import io
-import base64
 from db import get_campaign_by_share_token
+from profiling import start_rerun, span, render_timing_panel, fragment_timings
+from snapshots import load_snapshot, campaign_figures
+from influencer_table import (
+    influencer_frame, ranking_index, filter_options, table_limit, show_more, display_table, RANKING_PAGE_SIZE
+)
 
 # Set page configuration - MUST BE THE FIRST STREAMLIT COMMAND
 st.set_page_config(
@@ -21,6 +22,9 @@ st.set_page_config(
     }
 )
 
+# Start recording per-rerun timings
+start_rerun("client_view")
+
 # Add CSS to hide the sidebar completely and remove other navigation elements
 st.markdown("""
 <style>
@@ -53,51 +57,9 @@ st.markdown("""
     .stSidebar {
         pointer-events: none;
     }
-    
-    /* Style the download button to match Streamlit buttons */
-    .download-button {
-        display: inline-block;
-        padding: 0.25em 0.75em;
-        background-color: #0e1117;
-        color: #fafafa;
-        text-align: center;
-        text-decoration: none;
-        font-weight: 400;
-        font-size: 0.875rem;
-        border-radius: 0.25rem;
-        border: 1px solid #3b3e46;
-        cursor: pointer;
-        line-height: 1.6;
-        user-select: none;
-        transition: color 150ms ease 0s, border-color 150ms ease 0s, background-color 150ms ease 0s;
-    }
-    .download-button:hover {
-        border-color: rgb(128, 132, 149);
-        color: rgb(255, 255, 255);
-    }
 </style>
 """, unsafe_allow_html=True)
 
-# Helper function for CSV export
-def get_csv_download_link(campaign, filtered_df=None):
-    """Generate a CSV and return a download link"""
-    # Use filtered data if available, otherwise use all influencers
-    if filtered_df is not None and not filtered_df.empty:
-        df = filtered_df.copy()
-    else:
-        df = pd.DataFrame(campaign['influencers'])
-    
-    # Convert to CSV
-    csv = df.to_csv(index=False)
-    
-    # Create base64 encoded string
-    b64_csv = base64.b64encode(csv.encode()).decode()
-    
-    # Create download link
-    href = f'<a style="text-decoration: none;" href="data:text/csv;base64,{b64_csv}" download="{campaign["name"]}_influencers.csv" class="download-button">Download Data</a>'
-    
-    return href
-
 # Get the share token from the query params using the non-experimental API
 token = st.query_params.get("token", None)
 
@@ -105,13 +67,26 @@ if not token:
     st.error("No share token provided in the URL.")
     st.stop()
 
-# Get campaign data by token directly from database
-campaign = get_campaign_by_share_token(token)
+# Serve the published snapshot if there is one, otherwise query the database
+with span("snapshot.load"):
+    snapshot = load_snapshot(token)
+
+if snapshot:
+    campaign = snapshot['campaign']
+else:
+    campaign = get_campaign_by_share_token(token)
 
 if not campaign:
     st.error("Invalid or expired share token. Please check your link.")
     st.stop()
 
+# The loaded campaign is shared with other sessions (read cache, loaded snapshots), so the
+# frame and ranking memos go on this session's own shallow copy, kept until the shared one changes
+held = st.session_state.get("client_campaign")
+if held is None or held[0] is not campaign:
+    held = st.session_state["client_campaign"] = (campaign, dict(campaign))
+campaign = held[1]
+
 # Use campaign name as the page title
 st.title(f"{campaign['name']}")
 
@@ -147,9 +122,6 @@ st.write(f"**Date:** {datetime.now().strftime('%B %d, %Y')}")
 if sharing_settings.get('custom_message'):
     st.info(sharing_settings['custom_message'])
 
-# Store filtered_df for export
-filtered_df = None
-
 # Show metrics if enabled
 if sharing_settings.get('include_metrics', True):
     st.subheader("Campaign Performance")
@@ -175,251 +147,157 @@ if sharing_settings.get('include_metrics', True):
         with metric_cols2[1]:
             st.metric("Total Comments", f"{campaign['metrics'].get('total_comments', 0):,}")
 
+# Snapshots leave the influencer rows out when details aren't shared, but keep their count
+influencer_count = campaign.get('influencer_count', len(campaign['influencers']))
+
 # Show dashboard/charts if enabled and influencers exist
-if sharing_settings.get('include_dashboard', True) and campaign['influencers']:
+if sharing_settings.get('include_dashboard', True) and influencer_count:
     st.subheader("Performance Charts")
     
-    # Create dataframe from influencers
-    influencers_df = pd.DataFrame(campaign['influencers'])
+    # Snapshots carry pre-rendered figures; live campaigns use the figure cache
+    figures = snapshot['charts'] if snapshot else campaign_figures(campaign, sharing_settings)
     
     chart_cols = st.columns(2)
     
-    with chart_cols[0]:
-        # Platform distribution pie chart - Added from Campaign Dashboard
-        platform_counts = influencers_df['platform'].value_counts().reset_index()
-        platform_counts.columns = ['Platform', 'Count']
-
-        fig_platform = px.pie(
-            platform_counts,
-            values='Count',
-            names='Platform',
-            title='Influencers by Platform',
-            hole=0.4,
-            color_discrete_sequence=px.colors.qualitative.Pastel
-        )
-        st.plotly_chart(fig_platform, use_container_width=True)
+    with chart_cols[0], span("chart.platform_pie", "chart"):
+        # Platform distribution pie chart
+        st.plotly_chart(figures['platform_pie'], use_container_width=True)
     
-    with chart_cols[1]:
+    with chart_cols[1], span("chart.views_by_platform", "chart"):
         # Views by platform
-        platform_views = influencers_df.groupby('platform')['views'].sum().reset_index()
-        
-        fig_views = px.bar(
-            platform_views,
-            x='platform',
-            y='views',
-            title='Views by Platform',
-            labels={'platform': 'Platform', 'views': 'Views'},
-            color='platform',
-            color_discrete_sequence=px.colors.qualitative.Pastel
-        )
-        st.plotly_chart(fig_views, use_container_width=True)
+        st.plotly_chart(figures['views_by_platform'], use_container_width=True)
+    
+    if figures['metrics_trend']:
+        with span("chart.metrics_trend", "chart"):
+            # Cumulative views per day from the metric history
+            st.plotly_chart(figures['metrics_trend'], use_container_width=True)
     
     # Show engagement charts if enabled
     if sharing_settings.get('include_engagement_metrics', True):
         st.subheader("Engagement Analysis") # Added subheader for clarity
         engagement_cols = st.columns(2)
         
-        with engagement_cols[0]:
+        with engagement_cols[0], span("chart.engagement_by_platform", "chart"):
             # Engagement by platform
-            platform_engagement = influencers_df.groupby('platform').agg({
-                'likes': 'sum',
-                'shares': 'sum',
-                'comments': 'sum'
-            }).reset_index()
-            
-            # Reshape for plotting
-            platform_engagement_melted = pd.melt(
-                platform_engagement,
-                id_vars=['platform'],
-                value_vars=['likes', 'shares', 'comments'],
-                var_name='Engagement Type',
-                value_name='Count'
-            )
-            
-            fig_engagement = px.bar(
-                platform_engagement_melted,
-                x='platform',
-                y='Count',
-                color='Engagement Type',
-                title='Engagement by Platform',
-                barmode='group',
-                color_discrete_sequence=px.colors.qualitative.Pastel
-            )
-            st.plotly_chart(fig_engagement, use_container_width=True)
+            st.plotly_chart(figures['engagement_by_platform'], use_container_width=True)
         
-        with engagement_cols[1]:
+        with engagement_cols[1], span("chart.efficiency_gauge", "chart"):
             # Budget efficiency - Views per theoretical budget allocation - Added from Campaign Dashboard
-            total_views = influencers_df['views'].sum()
-            campaign_budget = campaign.get('budget', 0) # Use campaign variable
-
-            if total_views > 0 and campaign_budget > 0:
-                # Calculate views per rupee
-                views_per_rupee = total_views / campaign_budget
-
-                # Create a gauge chart for budget efficiency
-                fig_views_per_rupee = go.Figure(go.Indicator(
-                    mode="gauge+number",
-                    value=views_per_rupee,
-                    title={'text': "Views per ₹"},
-                    gauge={
-                        'axis': {'range': [0, views_per_rupee * 2]},
-                        'bar': {'color': "lightblue"},
-                        'steps': [
-                            {'range': [0, views_per_rupee/2], 'color': "lightgray"},
-                            {'range': [views_per_rupee/2, views_per_rupee * 1.5], 'color': "gray"}
-                        ],
-                        'threshold': {
-                            'line': {'color': "red", 'width': 4},
-                            'thickness': 0.75,
-                            'value': views_per_rupee * 1.5
-                        }
-                    }
-                ))
-                st.plotly_chart(fig_views_per_rupee, use_container_width=True)
+            # Views per rupee gauge (only built when there are views and a budget)
+            if figures['efficiency_gauge']:
+                st.plotly_chart(figures['efficiency_gauge'], use_container_width=True)
             else:
                 st.info("Need views and budget to calculate efficiency")
 
-# Show influencer details if enabled
-if sharing_settings.get('include_influencer_details', True) and campaign['influencers']:
-    st.subheader("Campaign Influencers")
-    
-    # Create display dataframe
-    influencers_df = pd.DataFrame(campaign['influencers'])
-    
-    # Add filtering capabilities for clients
-    filter_cols = st.columns(3)
-    
-    with filter_cols[0]:
-        filter_platform = st.selectbox(
-            "Filter by Platform",
-            ["All"] + list(influencers_df['platform'].unique()),
-            key="platform_filter"
-        )
-    
-    with filter_cols[1]:
-        filter_post_type = st.selectbox(
-            "Filter by Post Type",
-            ["All"] + list(influencers_df['post_type'].unique()),
-            key="post_type_filter"
-        )
-    
-    with filter_cols[2]:
-        sort_options = ["Name", "Username", "Views"]  # Added Username to sort options
-        if sharing_settings.get('include_engagement_metrics', True):
-            sort_options.extend(["Likes", "Shares", "Comments"])
-        
-        sort_by = st.selectbox("Sort By", sort_options, key="sort_by_filter")
-    
-    # Apply filters and sorting
-    filtered_df = influencers_df.copy()
-    
-    if filter_platform != "All":
-        filtered_df = filtered_df[filtered_df['platform'] == filter_platform]
-    
-    if filter_post_type != "All":
-        filtered_df = filtered_df[filtered_df['post_type'] == filter_post_type]
-    
-    # Apply sorting
-    if sort_by == "Name":
-        filtered_df = filtered_df.sort_values('name')
-    elif sort_by == "Username":  # Added sorting by username
-        filtered_df = filtered_df.sort_values('username')
-    elif sort_by == "Views":
-        filtered_df = filtered_df.sort_values('views', ascending=False)
-    elif sort_by == "Likes":
-        filtered_df = filtered_df.sort_values('likes', ascending=False)
-    elif sort_by == "Shares":
-        filtered_df = filtered_df.sort_values('shares', ascending=False)
-    elif sort_by == "Comments":
-        filtered_df = filtered_df.sort_values('comments', ascending=False)
-    
-    # Display filtered results
-    if not filtered_df.empty:
-        # Select columns to display - Include username column
-        display_columns = ['name', 'username', 'platform', 'post_type', 'views']
-        
-        # Add engagement metrics if enabled
-        if sharing_settings.get('include_engagement_metrics', True):
-            display_columns.extend(['likes', 'shares', 'comments'])
-        
-        if 'post_url' in filtered_df.columns and any(not pd.isna(url) for url in filtered_df['post_url']):
-            display_columns.append('post_url')
-        
-        # Create a clean display dataframe with only selected columns
-        filtered_display_df = filtered_df[display_columns].copy()
-        
-        # Rename columns for display
-        column_map = {
-            'name': 'Name',
-            'username': 'Username',  # Map username to Username
-            'platform': 'Platform',
-            'post_type': 'Post Type', 
-            'views': 'Views',
-            'post_url': 'Post URL',
-            'likes': 'Likes',
-            'shares': 'Shares',
-            'comments': 'Comments'
-        }
-        
-        filtered_display_df.columns = [column_map.get(col, col) for col in filtered_display_df.columns]
-        
-        # Format numeric columns
-        if 'Views' in filtered_display_df.columns:
-            filtered_display_df['Views'] = filtered_display_df['Views'].apply(lambda x: f"{x:,}")
-        
-        if 'Likes' in filtered_display_df.columns:
-            filtered_display_df['Likes'] = filtered_display_df['Likes'].apply(lambda x: f"{x:,}")
-        
-        if 'Shares' in filtered_display_df.columns:
-            filtered_display_df['Shares'] = filtered_display_df['Shares'].apply(lambda x: f"{x:,}")
-        
-        if 'Comments' in filtered_display_df.columns:
-            filtered_display_df['Comments'] = filtered_display_df['Comments'].apply(lambda x: f"{x:,}")
-        
-        # Calculate filtered totals - Include Username in totals row
-        filtered_totals = {
-            'Name': 'TOTAL',
-            'Username': '',
-            'Platform': '',
-            'Post Type': '',
-            'Views': f"{filtered_df['views'].sum():,}"
-        }
-        
-        if 'Likes' in filtered_display_df.columns:
-            filtered_totals['Likes'] = f"{filtered_df['likes'].sum():,}"
-        
-        if 'Shares' in filtered_display_df.columns:
-            filtered_totals['Shares'] = f"{filtered_df['shares'].sum():,}"
+@st.fragment
+def influencer_section(campaign, sharing_settings):
+    """Influencer table with client filters and the CSV export of the filtered rows.
+
+    Runs as a fragment: changing a filter reruns only this section, reusing
+    the campaign fetched by the last full run and its memoized frame.
+    """
+    with fragment_timings("client_view", "influencers"):
+        export_filters = None
         
-        if 'Comments' in filtered_display_df.columns:
-            filtered_totals['Comments'] = f"{filtered_df['comments'].sum():,}"
+        # Show influencer details if enabled
+        if sharing_settings.get('include_influencer_details', True) and campaign['influencers']:
+            st.subheader("Campaign Influencers")
+            
+            # Create display dataframe
+            with span("frame.influencer_table", "frame"):
+                influencers_df = influencer_frame(campaign)
+            
+            # Add filtering capabilities for clients
+            filter_cols = st.columns(3)
+            
+            with filter_cols[0]:
+                filter_platform = st.selectbox(
+                    "Filter by Platform",
+                    filter_options(influencers_df, 'platform'),
+                    key="platform_filter"
+                )
+            
+            with filter_cols[1]:
+                filter_post_type = st.selectbox(
+                    "Filter by Post Type",
+                    filter_options(influencers_df, 'post_type'),
+                    key="post_type_filter"
+                )
+            
+            with filter_cols[2]:
+                sort_options = ["Name", "Username", "Views"]  # Added Username to sort options
+                if sharing_settings.get('include_engagement_metrics', True):
+                    sort_options.extend(["Likes", "Shares", "Comments"])
+                
+                sort_by = st.selectbox("Sort By", sort_options, key="sort_by_filter")
+            
+            # Rank only the rows shown; totals come from the precomputed group sums
+            filters = (filter_platform, filter_post_type, sort_by)
+            limit = table_limit(st.session_state, "client_table_rows", filters)
+            with span("frame.filter_sort", "frame"):
+                ranking = ranking_index(campaign)
+                matched, totals = ranking.totals(filter_platform, filter_post_type)
+                top_df = ranking.rank(*filters, limit=limit)
+            
+            # Display filtered results
+            if matched:
+                # Select columns to display - Include username column
+                display_columns = ['name', 'username', 'platform', 'post_type', 'views']
+                
+                # Add engagement metrics if enabled
+                if sharing_settings.get('include_engagement_metrics', True):
+                    display_columns.extend(['likes', 'shares', 'comments'])
+                
+                if 'post_url' in influencers_df.columns and influencers_df['post_url'].notna().any():
+                    display_columns.append('post_url')
+                
+                # Show record count and display the dataframe with a totals row
+                st.write(f"Showing {len(top_df):,} of {matched:,} influencers")
+                with span("render.influencer_table", "render"):
+                    st.dataframe(display_table(top_df, display_columns, totals), use_container_width=True)
+                
+                if len(top_df) < matched:
+                    st.button(f"Load {min(RANKING_PAGE_SIZE, matched - len(top_df)):,} more",
+                              on_click=show_more, args=(st.session_state, "client_table_rows"))
+                
+                export_filters = filters
+            else:
+                st.info("No influencers match your filter criteria")
         
-        # Add totals row
-        filtered_display_df = pd.concat([filtered_display_df, pd.DataFrame([filtered_totals])], ignore_index=True)
+        elif not campaign.get('influencer_count', len(campaign['influencers'])):
+            st.info("No influencers added to this campaign yet.")
         
-        # Show record count and display the dataframe
-        st.write(f"Showing {len(filtered_df)} influencers")
-        st.dataframe(filtered_display_df, use_container_width=True)
-    else:
-        st.info("No influencers match your filter criteria")
-
-elif not campaign['influencers']:
-    st.info("No influencers added to this campaign yet.")
+        # Add direct CSV Download button (only when the influencer details are shared)
+        if sharing_settings.get('include_influencer_details', True) and campaign['influencers']:
+            st.subheader("Export Data")
+            
+            # Create columns for layout
+            col1, col2 = st.columns([3, 1])
+            
+            with col1:
+                st.write("Download the current data to use in Excel or other spreadsheet applications.")
+            
+            with col2:
+                # The CSV is only built when the button is clicked
+                def export_csv():
+                    with span("frame.export_csv", "frame"):
+                        # The filtered rows if the table shows any, otherwise all influencers
+                        if export_filters is not None:
+                            rows = ranking_index(campaign).rank(*export_filters)
+                        else:
+                            rows = influencer_frame(campaign)
+                        if not sharing_settings.get('include_engagement_metrics', True):
+                            rows = rows.drop(columns=['likes', 'shares', 'comments'])
+                        return rows.to_csv(index=False)
+                
+                st.download_button(
+                    label="Download Data",
+                    data=export_csv,
+                    file_name=f"{campaign['name']}_influencers.csv",
+                    mime="text/csv"
+                )
 
-# Add direct CSV Download button
-if campaign['influencers']:
-    st.subheader("Export Data")
-    
-    # Create columns for layout
-    col1, col2 = st.columns([3, 1])
-    
-    with col1:
-        st.write("Download the current data to use in Excel or other spreadsheet applications.")
-    
-    with col2:
-        # Generate the download link directly
-        download_link = get_csv_download_link(campaign, filtered_df)
-        st.markdown(download_link, unsafe_allow_html=True)
+influencer_section(campaign, sharing_settings)
 
 # Add contact information section
 st.subheader("Contact Information")
@@ -438,4 +316,7 @@ st.markdown("""
         Back to Campaign Manager
     </a>
 </div>
-""", unsafe_allow_html=True)
\ No newline at end of file
+""", unsafe_allow_html=True)
+
+# Show the admin timing panel (hidden unless requested) and export timings
+render_timing_panel()
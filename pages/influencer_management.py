@@ -3,7 +3,17 @@ import pandas as pd
 import uuid
 import time
 from datetime import datetime
-from db import save_campaign, delete_influencer, generate_numeric_id
+from db import save_campaign, generate_numeric_ids
+from profiling import start_rerun, span, render_timing_panel
+from shared_state import bootstrap_session, reload_campaign
+from concurrency import EditConflictError, detached_copy
+from resilience import BackendUnavailableError
+from undo import remember_influencer_delete, last_label, undo_last
+from jobs import submit, watch, render_jobs
+from csv_import import (
+    parse_influencer_csv, preview_influencer_csv, missing_columns, upload_key,
+    plan_upsert, upsert_summary, run_import, import_key
+)
 
 # Set page configuration - MUST BE THE FIRST STREAMLIT COMMAND
 st.set_page_config(
@@ -12,6 +22,9 @@ st.set_page_config(
     layout="wide"
 )
 
+# Start recording per-rerun timings
+start_rerun("influencer_management")
+
 # Hide Streamlit's default GitHub link and menu
 hide_streamlit_elements = """
 <style>
@@ -27,10 +40,18 @@ header {visibility: hidden;}
 """
 st.markdown(hide_streamlit_elements, unsafe_allow_html=True)
 
-# Check if session state is initialized
-if 'campaigns' not in st.session_state or 'current_campaign_id' not in st.session_state:
-    st.error("Please navigate to the main page first to select or create a campaign.")
-    st.stop()
+# Set up the session (or open the ?campaign_id= deep link) and pick up changes from other sessions
+bootstrap_session(st.session_state, st.query_params)
+
+# Tell the user if their last save clashed with someone else's
+if 'save_conflict' in st.session_state:
+    st.warning(st.session_state.pop('save_conflict'))
+if 'undo_message' in st.session_state:
+    st.info(st.session_state.pop('undo_message'))
+# Outcome of a background job this session started (see jobs.render_jobs)
+if 'job_message' in st.session_state:
+    level, text = st.session_state.pop('job_message')
+    (st.success if level == 'success' else st.error)(text)
 
 # Check if a campaign is selected
 if st.session_state.current_campaign_id is None:
@@ -62,10 +83,23 @@ if 'im_form_comments' not in st.session_state:
 # Get current campaign data
 current_campaign = st.session_state.campaigns[st.session_state.current_campaign_id]
 
+# Progress of imports running in the background for this campaign
+render_jobs(st.session_state, current_campaign['id'])
+
 # Helper function to save campaign data
 def save_campaign_data():
     """Save campaign data to database"""
-    save_campaign(current_campaign)
+    try:
+        save_campaign(current_campaign)
+    except EditConflictError as e:
+        # Someone else saved overlapping changes first: show theirs instead
+        reload_campaign(st.session_state, current_campaign['id'])
+        st.session_state.save_conflict = str(e)
+        st.rerun()
+    except BackendUnavailableError as e:
+        # Nothing was lost: the edits stay in this session and go out with the next save
+        st.session_state.save_conflict = f"{e}. Your changes were not saved yet."
+        st.rerun()
 
 # Function to reset form fields
 def reset_form_fields():
@@ -110,7 +144,7 @@ with budget_col2:
 # Create tabs for different sections
 tab1, tab2, tab3 = st.tabs(["Add Influencers", "Manage Existing", "Bulk Operations"])
 
-with tab1:
+with tab1, span("render.add_tab", "render"):
     st.header("Add New Influencer")
     
     # Create a form for adding new influencers
@@ -157,7 +191,7 @@ with tab1:
                 st.error("Influencer name is required")
             else:
                 # Create new influencer entry
-                new_influencer_id = generate_numeric_id()
+                new_influencer_id = generate_numeric_ids(1)[0]
                 
                 new_influencer = {
                     "id": new_influencer_id,
@@ -189,7 +223,7 @@ with tab1:
                 st.success(f"Added {name} to the campaign!")
                 st.rerun()  # Rerun to reset the form
 
-with tab2:
+with tab2, span("render.manage_tab", "render"):
     st.header("Manage Existing Influencers")
     
     if not current_campaign["influencers"]:
@@ -250,6 +284,16 @@ with tab2:
         # Display influencers with edit options
         st.subheader("Edit Influencers")
         
+        # Undo the last delete made in this session
+        undo_label = last_label(st.session_state)
+        if undo_label and st.button(f"Undo delete: {undo_label}"):
+            try:
+                st.session_state.undo_message = undo_last(st.session_state)
+            except BackendUnavailableError as e:
+                # The delete stays on the undo stack, so the button can be used again
+                st.session_state.save_conflict = f"{e}. The delete was not undone yet."
+            st.rerun()
+        
         # Store indexes to delete after loop to avoid modifying list during iteration
         to_delete = []
         
@@ -331,9 +375,7 @@ with tab2:
                     
                     if original_idx is not None:
                         try:
-                            # Actually delete from database first
-                            delete_influencer(influencer["id"])
-                            
+                            # Removed from the database by the save after the loop (one bulk delete)
                             # Update metrics before removing
                             current_campaign["metrics"]["total_views"] -= int(influencer["views"])
                             current_campaign["metrics"]["total_likes"] = current_campaign["metrics"].get("total_likes", 0) - int(influencer.get("likes", 0))
@@ -350,14 +392,14 @@ with tab2:
         # Actually remove the influencers from the list after the loop
         if to_delete:
             # Sort in reverse order to avoid index shifting problems
-            for idx in sorted(to_delete, reverse=True):
-                current_campaign["influencers"].pop(idx)
+            removed = [current_campaign["influencers"].pop(idx) for idx in sorted(to_delete, reverse=True)]
+            remember_influencer_delete(st.session_state, current_campaign, removed)
             
             # Save the updated campaign
             save_campaign_data()
             st.rerun()
 
-with tab3:
+with tab3, span("render.bulk_tab", "render"):
     st.header("Bulk Operations")
     
     # Upload CSV file option
@@ -367,10 +409,10 @@ with tab3:
     st.write("Download a CSV template to see the required format:")
     
     # Generate sample CSV data with new engagement metrics (no cost field)
-    sample_data = """name,platform,post_type,views,likes,shares,comments,post_url
-Influencer1,Instagram,Post,15000,1200,45,78,https://instagram.com/post1
-Influencer2,TikTok,Video,50000,3500,120,95,https://tiktok.com/video2
-Influencer3,YouTube,Collaboration,25000,850,65,42,https://youtube.com/video3"""
+    sample_data = """name,username,platform,post_type,views,likes,shares,comments,post_url
+Influencer1,@influencer1,Instagram,Post,15000,1200,45,78,https://instagram.com/post1
+Influencer2,@influencer2,TikTok,Video,50000,3500,120,95,https://tiktok.com/video2
+Influencer3,@influencer3,YouTube,Collaboration,25000,850,65,42,https://youtube.com/video3"""
     
     st.download_button(
         label="Download CSV Template",
@@ -382,68 +424,72 @@ Influencer3,YouTube,Collaboration,25000,850,65,42,https://youtube.com/video3"""
     # Upload CSV
     uploaded_file = st.file_uploader("Upload your CSV file", type=["csv"])
     
+    import_mode = st.radio(
+        "Import Mode",
+        ["append", "upsert"],
+        format_func=lambda mode: "Add as new influencers" if mode == "append"
+            else "Update existing (match on platform + username, or post URL)",
+        horizontal=True,
+        key="im_import_mode"
+    )
+    
     if uploaded_file is not None:
         # Read the CSV file
         try:
-            df = pd.read_csv(uploaded_file)
-            st.success(f"Successfully read CSV with {len(df)} records")
+            data = uploaded_file.getvalue()
+            data_key = upload_key(data)
             
+            # Only the first rows are read until the user asks to plan or import
             st.subheader("Preview")
-            st.dataframe(df.head())
-            
-            # Check required columns
-            required_columns = ["name", "platform", "post_type", "views"]
-            missing_columns = [col for col in required_columns if col not in df.columns]
+            preview = preview_influencer_csv(data)
+            st.dataframe(preview)
             
-            if missing_columns:
-                st.error(f"Missing required columns: {', '.join(missing_columns)}")
-            else:
-                # Process the data
-                if st.button("Import Influencers"):
-                    new_influencers = []
-                    total_views = 0
-                    total_likes = 0
-                    total_shares = 0
-                    total_comments = 0
+            missing = missing_columns(preview)
+            if missing:
+                st.error(f"Missing required columns: {', '.join(missing)}")
+            elif import_mode == "upsert":
+                if st.session_state.get("im_planned_upload") != data_key:
+                    if st.button("Plan Update"):
+                        st.session_state.im_planned_upload = data_key
+                        st.rerun()
+                else:
+                    # Parsed once per file content, then reused across reruns
+                    with span("frame.read_csv", "frame"):
+                        df = parse_influencer_csv(data)['frame']
+                    st.success(f"Successfully read CSV with {len(df)} records")
                     
-                    for _, row in df.iterrows():
-                        # Create new influencer entry
-                        new_influencer_id = generate_numeric_id()
-                        
-                        new_influencer = {
-                            "id": new_influencer_id,
-                            "name": row["name"],
-                            "platform": row["platform"],
-                            "post_type": row["post_type"],
-                            "views": int(row["views"]),
-                            "likes": int(row.get("likes", 0)),
-                            "shares": int(row.get("shares", 0)),
-                            "comments": int(row.get("comments", 0))
-                        }
-                        
-                        # Add post_url if it exists
-                        if "post_url" in df.columns:
-                            new_influencer["post_url"] = row.get("post_url", "")
-                        
-                        new_influencers.append(new_influencer)
-                        
-                        # Update totals
-                        total_views += int(row["views"])
-                        total_likes += int(row.get("likes", 0))
-                        total_shares += int(row.get("shares", 0))
-                        total_comments += int(row.get("comments", 0))
+                    # Match rows to existing influencers and only write what changed
+                    with span("frame.plan_upsert", "frame"):
+                        plan = plan_upsert(current_campaign, df)
+                    summary = upsert_summary(plan)
                     
-                    # Add to campaign
-                    current_campaign["influencers"].extend(new_influencers)
+                    summary_cols = st.columns(4)
+                    summary_cols[0].metric("New", summary['inserted'])
+                    summary_cols[1].metric("Updated", summary['updated'])
+                    summary_cols[2].metric("Unchanged", summary['unchanged'])
+                    summary_cols[3].metric("Duplicate Rows", summary['duplicates'])
                     
-                    # Update metrics
-                    current_campaign["metrics"]["total_views"] += total_views
-                    current_campaign["metrics"]["total_likes"] = current_campaign["metrics"].get("total_likes", 0) + total_likes
-                    current_campaign["metrics"]["total_shares"] = current_campaign["metrics"].get("total_shares", 0) + total_shares
-                    current_campaign["metrics"]["total_comments"] = current_campaign["metrics"].get("total_comments", 0) + total_comments
+                    if plan['updates']:
+                        with st.expander("Rows that will be updated"):
+                            st.dataframe(pd.DataFrame(plan['updates']).drop(columns=['id']), use_container_width=True)
                     
-                    save_campaign_data()
-                    st.success(f"Successfully imported {len(new_influencers)} influencers!")
+                    if st.button("Apply Update", disabled=not (plan['inserts'] or plan['updates'])):
+                        # Re-planned and saved in the background against a copy of the campaign
+                        job_id = submit("csv_import", run_import, detached_copy(current_campaign), df, "upsert",
+                                        label=f"Updating from {uploaded_file.name}", campaign_id=current_campaign['id'],
+                                        idempotency_key=import_key(current_campaign, data_key, "upsert"))
+                        watch(st.session_state, job_id)
+                        st.rerun()
+            else:
+                # Process the data in the background; the page shows its progress.
+                # Clicking again before the campaign reloads returns the same job.
+                if st.button("Import Influencers"):
+                    with span("frame.read_csv", "frame"):
+                        df = parse_influencer_csv(data)['frame']
+                    job_id = submit("csv_import", run_import, detached_copy(current_campaign), df, "append",
+                                    label=f"Importing {uploaded_file.name}", campaign_id=current_campaign['id'],
+                                    idempotency_key=import_key(current_campaign, data_key, "append"))
+                    watch(st.session_state, job_id)
                     st.rerun()
         
         except Exception as e:
@@ -486,4 +532,7 @@ Influencer3,YouTube,Collaboration,25000,850,65,42,https://youtube.com/video3"""
 
 # Footer
 st.markdown("---")
-st.markdown("Campaign Manager v1.0 | Influencer Management")
\ No newline at end of file
+st.markdown("Campaign Manager v1.0 | Influencer Management")
+
+# Show the admin timing panel (hidden unless requested) and export timings
+render_timing_panel()
@@ -0,0 +1,253 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from functools import wraps
+from telemetry import operation_stats, percentile_ms
+
+# Per-rerun timing recorder.
+#
+# Streamlit executes each session's script in its own thread, so a thread-local
+# recorder gives us one set of timings per rerun without touching session state.
+# Pages call start_rerun() at the top and render_timing_panel() at the bottom;
+# db functions and chart builders are wrapped with @timed / span(); st.fragment bodies
+# are wrapped with fragment_timings() so fragment-only reruns are recorded too.
+
+# Keep individual spans bounded so a 100k-influencer save doesn't hold 100k records
+MAX_SPANS = 500
+
+# The timing panel is hidden unless this key is set and passed as ?timing=<key>
+TIMING_KEY = os.getenv("LTCO_TIMING_KEY")
+
+# Optional path to append one JSON line per rerun for offline analysis
+TIMING_LOG = os.getenv("LTCO_TIMING_LOG")
+
+_local = threading.local()
+
+
+def _recorder():
+    """Return the recorder for the current rerun, or None outside a rerun"""
+    return getattr(_local, "recorder", None)
+
+
+def start_rerun(page):
+    """Start recording timings for a new rerun of the given page"""
+    _local.recorder = {
+        "page": page,
+        "started_at": datetime.now().isoformat(timespec="milliseconds"),
+        "start": time.perf_counter(),
+        "queries": 0,
+        "spans": [],
+        "dropped_spans": 0,
+        "totals": {},
+        "depth": 0,
+    }
+
+
+def fragment_rerun():
+    """Check whether Streamlit is rerunning only a fragment rather than the whole page"""
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+    ctx = get_script_run_ctx()
+    return bool(ctx is not None and ctx.fragment_ids_this_run)
+
+
+@contextmanager
+def fragment_timings(page, name):
+    """Time an st.fragment body.
+
+    During a full page rerun the fragment is a span of the page's rerun. When
+    only the fragment reruns it gets a rerun record of its own (page
+    "<page>:<name>"), exported like a page rerun.
+    """
+    if not fragment_rerun():
+        with span(f"fragment.{name}", "fragment"):
+            yield
+        return
+
+    start_rerun(f"{page}:{name}")
+    try:
+        yield
+    finally:
+        export_rerun()
+
+
+def count_query(n=1):
+    """Count backend round trips against the current rerun"""
+    recorder = _recorder()
+    if recorder is not None:
+        recorder["queries"] += n
+
+
+@contextmanager
+def span(name, kind="block"):
+    """Time a block of code and record it against the current rerun"""
+    recorder = _recorder()
+    if recorder is None:
+        yield
+        return
+
+    depth = recorder["depth"]
+    queries_before = recorder["queries"]
+    recorder["depth"] = depth + 1
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        recorder["depth"] = depth
+
+        # Aggregate totals are always kept, individual spans only up to MAX_SPANS
+        total = recorder["totals"].setdefault(name, {"kind": kind, "calls": 0, "seconds": 0.0})
+        total["calls"] += 1
+        total["seconds"] += elapsed
+
+        if len(recorder["spans"]) < MAX_SPANS:
+            recorder["spans"].append({
+                "name": name,
+                "kind": kind,
+                "depth": depth,
+                "offset_ms": round((start - recorder["start"]) * 1000, 3),
+                "duration_ms": round(elapsed * 1000, 3),
+                "queries": recorder["queries"] - queries_before,
+            })
+        else:
+            recorder["dropped_spans"] += 1
+
+
+def timed(name=None, kind="db"):
+    """Decorator that records each call of the wrapped function as a span"""
+    def decorator(func):
+        span_name = name or f"{func.__module__}.{func.__name__}"
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(span_name, kind):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def rerun_summary():
+    """Return the timings recorded so far for the current rerun as a dict"""
+    recorder = _recorder()
+    if recorder is None:
+        return None
+
+    return {
+        "page": recorder["page"],
+        "started_at": recorder["started_at"],
+        "total_ms": round((time.perf_counter() - recorder["start"]) * 1000, 3),
+        "queries": recorder["queries"],
+        "totals": {
+            name: {
+                "kind": total["kind"],
+                "calls": total["calls"],
+                "ms": round(total["seconds"] * 1000, 3),
+            }
+            for name, total in recorder["totals"].items()
+        },
+        "spans": list(recorder["spans"]),
+        "dropped_spans": recorder["dropped_spans"],
+    }
+
+
+def export_rerun(path=None):
+    """Append the current rerun's timings as one JSON line"""
+    path = path or TIMING_LOG
+    summary = rerun_summary()
+    if not path or summary is None:
+        return None
+
+    line = json.dumps(summary, default=str)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(line + "\n")
+    return line
+
+
+def timing_panel_enabled():
+    """Check whether the admin timing panel was requested for this rerun"""
+    if not TIMING_KEY:
+        return False
+
+    import streamlit as st
+    return st.query_params.get("timing") == TIMING_KEY
+
+
+def render_timing_panel():
+    """Finish the rerun: export timings and show the admin panel if requested"""
+    export_rerun()
+
+    if not timing_panel_enabled():
+        return
+
+    import streamlit as st
+    import pandas as pd
+
+    summary = rerun_summary()
+    if summary is None:
+        return
+
+    with st.expander(f"Timing: {summary['total_ms']:.1f} ms, {summary['queries']} queries"):
+        totals_df = pd.DataFrame([
+            {"Span": name, "Kind": total["kind"], "Calls": total["calls"], "Total (ms)": total["ms"]}
+            for name, total in summary["totals"].items()
+        ])
+        if not totals_df.empty:
+            totals_df = totals_df.sort_values("Total (ms)", ascending=False)
+        st.dataframe(totals_df, use_container_width=True, hide_index=True)
+
+        if summary["spans"]:
+            spans_df = pd.DataFrame(summary["spans"])
+            spans_df["name"] = ["  " * depth + name for depth, name in zip(spans_df["depth"], spans_df["name"])]
+            st.dataframe(spans_df.drop(columns=["depth"]), use_container_width=True, hide_index=True)
+
+        if summary["dropped_spans"]:
+            st.caption(f"{summary['dropped_spans']} spans not shown (limit {MAX_SPANS})")
+
+        # Process-lifetime backend counters from db._execute
+        operations = operation_stats.snapshot()
+        if operations:
+            st.caption("Backend operations since process start")
+            st.dataframe(pd.DataFrame([
+                {
+                    "Operation": op,
+                    "Calls": stats["calls"],
+                    "Errors": stats["errors"],
+                    "Retries": stats["retries"],
+                    "Rejected": stats["rejected"],
+                    "Rows written": stats["rows"],
+                    "Avg (ms)": round(stats["seconds"] * 1000 / stats["calls"], 3) if stats["calls"] else 0.0,
+                    "p50 (ms)": percentile_ms(stats["histogram"], 0.5),
+                    "p95 (ms)": percentile_ms(stats["histogram"], 0.95),
+                    "p99 (ms)": percentile_ms(stats["histogram"], 0.99),
+                    "Max (ms)": round(stats["max_seconds"] * 1000, 3),
+                }
+                for op, stats in sorted(operations.items())
+            ]), use_container_width=True, hide_index=True)
+            from resilience import breaker
+            st.caption(f"Backend circuit breaker: {breaker.state()}")
+
+        # Imported here because charts depends on this module
+        from charts import figure_cache
+        cache = figure_cache.stats()
+        st.caption(
+            f"Figure cache: {cache['entries']} entries, {cache['bytes'] / 1024:.0f} KiB "
+            f"of {cache['max_bytes'] / 1024 / 1024:.0f} MiB, {cache['hits']} hits, "
+            f"{cache['misses']} misses, {cache['evictions']} evictions"
+        )
+
+        from lazy_imports import import_times
+        deferred = import_times()
+        if deferred:
+            st.caption("Deferred imports: " + ", ".join(f"{name} {ms:.0f} ms" for name, ms in sorted(deferred.items())))
+
+        st.download_button(
+            label="Download timings (JSON lines)",
+            data=json.dumps(summary, default=str) + "\n",
+            file_name=f"timings_{summary['page']}.jsonl",
+            mime="application/json",
+            key="timing_panel_download"
+        )
@@ -0,0 +1,28 @@
+import argparse
+import sys
+
+# Hard-deletes campaigns and influencers that were soft-deleted in the app.
+#
+# Deletes in the UI only set a deleted_at tombstone (so they are one cheap
+# update and can be undone); this job removes tombstoned rows in large
+# batches. Run it off-peak, e.g. from cron:
+#     0 3 * * *  python purge.py --hours 24
+
+
+def main(argv=None):
+    import db
+
+    parser = argparse.ArgumentParser(description="Remove soft-deleted campaigns and influencers")
+    parser.add_argument("--hours", type=float, default=db.PURGE_AFTER_HOURS,
+                        help="only purge rows deleted more than this many hours ago")
+    parser.add_argument("--batch-size", type=int, default=db.PURGE_BATCH_SIZE,
+                        help="influencer rows removed per batch")
+    args = parser.parse_args(argv)
+
+    purged = db.purge_deleted(args.hours, args.batch_size)
+    print(f"Purged {purged['campaigns']} campaigns and {purged['influencers']} influencers")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,239 @@
+import argparse
+import logging
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import shared_state
+from local_backend import create_local_client
+from metrics_history import TIMESTAMP_FORMAT, now_timestamp, retention_cutoff
+from telemetry import get_logger, log_event
+
+# Local read replica of campaigns and influencers (LTCO_REPLICA=on).
+#
+# A SQLite file with the local_backend schema holds a copy of both tables,
+# and db.py serves campaign reads from it while every write still goes to
+# the primary (Supabase, or the LTCO_BACKEND=sqlite stand-in) with the usual
+# compare-and-swap. The copy is brought up to date incrementally: each sync
+# fetches only rows whose updated_at is at or after the table's watermark
+# (minus REPLICA_OVERLAP_SECONDS, for clock skew between app processes),
+# keyset paged on (updated_at, id), and upserts them, tombstones included, so
+# soft deletes replicate too. The first sync also copies rows that have no
+# updated_at yet, keyset paged on id.
+#
+# Before a read the replica syncs if the shared_state change feed moved
+# since the last sync (a save in any app process) or the last sync is older
+# than REPLICA_MAX_LAG seconds (writes made outside the app). If the primary
+# can't be reached the read is served from the local copy as it is.
+#
+# Supabase needs an updated_at column on both tables, kept current by db.py
+# and, for writes made outside the app, by a trigger:
+#   alter table campaigns add column updated_at timestamptz;
+#   alter table influencers add column updated_at timestamptz;
+#   create index campaigns_updated_at_idx on campaigns (updated_at, id);
+#   create index influencers_updated_at_idx on influencers (updated_at, id);
+#   create function touch_updated_at() returns trigger language plpgsql as $$
+#   begin new.updated_at = now(); return new; end $$;
+#   create trigger campaigns_touch before insert or update on campaigns
+#     for each row execute function touch_updated_at();
+#   create trigger influencers_touch before insert or update on influencers
+#     for each row execute function touch_updated_at();
+#
+# Usage:
+#     python replica.py sync      # bring the local copy up to date (e.g. before starting the app)
+#     python replica.py status    # show watermarks and row counts
+
+REPLICA_ENABLED = os.getenv("LTCO_REPLICA", "off").lower() == "on"
+REPLICA_PATH = os.getenv("LTCO_REPLICA_PATH", os.path.join("data", "replica.db"))
+REPLICA_MAX_LAG = float(os.getenv("LTCO_REPLICA_MAX_LAG", "30"))
+REPLICA_OVERLAP_SECONDS = 5
+
+# Rows fetched per request while syncing
+REPLICA_BATCH_SIZE = 1000
+
+# Lower bound for the first sync's updated_at scan (before any real timestamp)
+EARLIEST_TIMESTAMP = "1970-01-01 00:00:00"
+
+REPLICATED_TABLES = ("campaigns", "influencers")
+
+logger = get_logger("replica")
+
+
+def _parse_timestamp(value):
+    """Parse a stored timestamp (local 'YYYY-MM-DD HH:MM:SS' or Postgres ISO) as UTC"""
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
+
+
+def _since(watermark):
+    """First updated_at to fetch for a table last synced up to watermark"""
+    start = _parse_timestamp(watermark) - timedelta(seconds=REPLICA_OVERLAP_SECONDS)
+    return start.strftime(TIMESTAMP_FORMAT)
+
+
+class Replica:
+    """Local copy of the campaign tables, synced incrementally from a primary client"""
+
+    def __init__(self, primary, path=REPLICA_PATH, execute=None, max_lag=REPLICA_MAX_LAG,
+                 keep_deleted_hours=None):
+        self.primary = primary
+        self.local = create_local_client(path)
+        self.max_lag = max_lag
+        self.keep_deleted_hours = keep_deleted_hours
+        self._execute = execute or (lambda query, op, rows=0: query.execute())
+        self._lock = threading.Lock()
+        self._synced_seq = None
+        self._synced_at = None
+
+    def _watermark(self, table):
+        rows = self.local.table("replica_watermarks").select("watermark").eq("table_name", table).execute().data
+        return rows[0]["watermark"] if rows else None
+
+    def _pull(self, table):
+        """Copy rows of table changed since its watermark; returns the rows copied"""
+        watermark = self._watermark(table)
+        started = now_timestamp()
+        newest = watermark
+        copied = 0
+
+        # Rows written before updated_at existed have none: the first sync copies them in id order
+        pages = [] if watermark else [self._unstamped_pages(table)]
+        pages.append(self._stamped_pages(table, _since(watermark) if watermark else EARLIEST_TIMESTAMP))
+        for rows in (page for source in pages for page in source):
+            self.local.table(table).upsert(rows).execute()
+            copied += len(rows)
+            stamped = [row["updated_at"] for row in rows if row.get("updated_at")]
+            if stamped:
+                last = max(stamped, key=_parse_timestamp)
+                if newest is None or _parse_timestamp(last) > _parse_timestamp(newest):
+                    newest = last
+
+        # Rows without updated_at are all copied now; later writes stamp them
+        newest = newest or started
+        if newest != watermark:
+            self.local.table("replica_watermarks").upsert(
+                {"table_name": table, "watermark": newest, "synced_at": now_timestamp()},
+                on_conflict="table_name"
+            ).execute()
+        return copied
+
+    def _unstamped_pages(self, table):
+        """Batches of rows without updated_at, keyset paged on id"""
+        last_id = None
+        while True:
+            query = self.primary.table(table).select("*").is_("updated_at", "null")
+            if last_id is not None:
+                query = query.gt("id", last_id)
+            rows = self._execute(query.order("id").limit(REPLICA_BATCH_SIZE), f"replica.pull_{table}").data
+            if rows:
+                yield rows
+            if len(rows) < REPLICA_BATCH_SIZE:
+                return
+            last_id = rows[-1]["id"]
+
+    def _stamped_pages(self, table, since):
+        """Batches of rows with updated_at >= since, keyset paged on (updated_at, id).
+
+        Each page continues strictly after the last (updated_at, id) copied,
+        so rows written during the sync can't shift others out of a page: a
+        row updated meanwhile only moves later in the order.
+        """
+        last = None
+        while True:
+            rows = []
+            if last is not None:
+                # The rest of the rows sharing the last timestamp, then the later ones
+                query = self.primary.table(table).select("*").eq("updated_at", last[0]).gt("id", last[1])
+                rows = self._execute(query.order("id").limit(REPLICA_BATCH_SIZE), f"replica.pull_{table}").data
+            if len(rows) < REPLICA_BATCH_SIZE:
+                query = self.primary.table(table).select("*")
+                query = query.gt("updated_at", last[0]) if last is not None else query.gte("updated_at", since)
+                query = query.order("updated_at").order("id").limit(REPLICA_BATCH_SIZE - len(rows))
+                rows += self._execute(query, f"replica.pull_{table}").data
+            if rows:
+                yield rows
+            if len(rows) < REPLICA_BATCH_SIZE:
+                return
+            last = (rows[-1]["updated_at"], rows[-1]["id"])
+
+    def _prune(self):
+        """Drop tombstones the primary has purged by now"""
+        if self.keep_deleted_hours is None:
+            return
+        cutoff = retention_cutoff(self.keep_deleted_hours / 24)
+        purged = self.local.table("campaigns").delete().lt("deleted_at", cutoff).execute().data
+        campaign_ids = [row["id"] for row in purged]
+        if campaign_ids:
+            self.local.table("influencers").delete().in_("campaign_id", campaign_ids).execute()
+        self.local.table("influencers").delete().lt("deleted_at", cutoff).execute()
+
+    def sync(self):
+        """Pull changes from the primary; returns {table: rows copied}"""
+        with self._lock:
+            return self._sync()
+
+    def _sync(self):
+        seq = shared_state.latest_seq()
+        start = time.perf_counter()
+        copied = {table: self._pull(table) for table in REPLICATED_TABLES}
+        self._prune()
+        self._synced_seq = seq
+        self._synced_at = time.monotonic()
+        log_event(logger, logging.DEBUG, "replica.synced",
+                  duration_ms=round((time.perf_counter() - start) * 1000, 1), **copied)
+        return copied
+
+    def _stale(self):
+        if self._synced_at is None or time.monotonic() - self._synced_at > self.max_lag:
+            return True
+        return shared_state.latest_seq() != self._synced_seq
+
+    def reader(self):
+        """Return the local client for a read, syncing first if the copy may be behind"""
+        if self._stale():
+            with self._lock:
+                # Another session may have synced while this one waited
+                if self._stale():
+                    try:
+                        self._sync()
+                    except Exception as e:
+                        # Offline: serve what the replica already has
+                        log_event(logger, logging.WARNING, "replica.sync_failed", error=e)
+        return self.local
+
+    def status(self):
+        """Watermark and local row count per replicated table"""
+        return {
+            table: {
+                "watermark": self._watermark(table),
+                "rows": self.local.table(table).select("id", count="exact").limit(1).execute().count,
+            }
+            for table in REPLICATED_TABLES
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Maintain the local read replica")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("sync", help="pull changes from the primary")
+    sub.add_parser("status", help="show watermarks and row counts")
+    args = parser.parse_args(argv)
+
+    import db
+
+    replica = db.get_replica()
+    if args.command == "sync":
+        copied = replica.sync()
+        print(f"Copied {copied['campaigns']} campaigns and {copied['influencers']} influencers")
+    else:
+        for table, status in replica.status().items():
+            print(f"{table:<12} {status['rows']:>8} rows  watermark {status['watermark']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,163 @@
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+
+from telemetry import get_logger, log_event, operation_stats
+
+# Retries and a circuit breaker around backend calls.
+#
+# db._execute runs every query through call(). A transient failure (network
+# error, timeout, 5xx, or a Postgres error that says "try again") is retried
+# with full-jitter exponential backoff, but only for idempotent operations:
+# selects, upserts, deletes and plain updates. Inserts and the
+# compare-and-swap campaign update are attempted once, since a retry after a
+# lost response could write twice or report a conflict with our own write.
+#
+# A call whose attempts all fail raises BackendUnavailableError. Consecutive
+# transient failures also open a process-wide circuit breaker; while it is
+# open calls fail at once with BackendUnavailableError instead of each
+# waiting out a timeout. After BREAKER_RESET_SECONDS one trial call is let
+# through and its outcome closes or re-opens the breaker. Errors the backend
+# answered deliberately (constraint violations, bad filters) are not retried
+# and count as the backend being up.
+#
+# Each attempt is timed into telemetry.operation_stats (latency histogram per
+# operation); retries and calls rejected by the open breaker are counted
+# there too. Requests time out after DB_TIMEOUT_SECONDS (set on the Supabase
+# client in db._create_client).
+
+DB_TIMEOUT_SECONDS = float(os.getenv("LTCO_DB_TIMEOUT", "10"))
+
+# Attempts per idempotent call, and the backoff before attempt n+1 (random up to base * 2**n, capped)
+RETRY_ATTEMPTS = int(os.getenv("LTCO_DB_RETRIES", "3"))
+RETRY_BASE_DELAY = 0.2
+RETRY_MAX_DELAY = 2.0
+
+# Consecutive transient failures that open the breaker, and seconds before a trial call
+BREAKER_THRESHOLD = int(os.getenv("LTCO_BREAKER_THRESHOLD", "5"))
+BREAKER_RESET_SECONDS = float(os.getenv("LTCO_BREAKER_RESET", "30"))
+
+# Postgres error codes worth retrying: serialization failure, deadlock, too many
+# connections, connection failures, cancelled by statement timeout
+TRANSIENT_PG_CODES = {"40001", "40P01", "53300", "57014", "57P01", "08000", "08003", "08006"}
+
+# HTTP statuses worth retrying (PostgREST and the gateway in front of it)
+TRANSIENT_HTTP_STATUSES = {408, 429, 500, 502, 503, 504}
+
+logger = get_logger("resilience")
+
+
+class BackendUnavailableError(Exception):
+    """The backend can't be reached: a call's attempts all failed transiently, or the breaker is open"""
+
+    def __init__(self, message, retry_in=None):
+        self.retry_in = retry_in
+        super().__init__(message)
+
+
+def _breaker_open(retry_in):
+    return BackendUnavailableError(
+        f"The database is not responding; try again in {max(1, round(retry_in))} seconds", retry_in
+    )
+
+
+def is_transient(error):
+    """Check whether an error from a backend call may succeed if the call is repeated"""
+    import httpx
+    from postgrest.exceptions import APIError
+
+    if isinstance(error, (httpx.TimeoutException, httpx.TransportError)):
+        return True
+    if isinstance(error, APIError):
+        code = str(error.code or "")
+        return code in TRANSIENT_PG_CODES or (code.isdigit() and int(code) in TRANSIENT_HTTP_STATUSES)
+    if isinstance(error, sqlite3.OperationalError):
+        # The local stand-in's "database is locked"
+        return "locked" in str(error)
+    return False
+
+
+class CircuitBreaker:
+    """Opens after `threshold` consecutive transient failures; half-opens after `reset_seconds`"""
+
+    def __init__(self, threshold=BREAKER_THRESHOLD, reset_seconds=BREAKER_RESET_SECONDS):
+        self.threshold = threshold
+        self.reset_seconds = reset_seconds
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._trial_running = False
+
+    def before_call(self):
+        """Raise BackendUnavailableError unless a call may go through now"""
+        with self._lock:
+            if self._opened_at is None:
+                return
+            waited = time.monotonic() - self._opened_at
+            if waited < self.reset_seconds or self._trial_running:
+                raise _breaker_open(max(self.reset_seconds - waited, 0))
+            # Half-open: this call is the trial
+            self._trial_running = True
+
+    def record_success(self):
+        with self._lock:
+            if self._opened_at is not None:
+                log_event(logger, logging.INFO, "breaker.closed")
+            self._failures = 0
+            self._opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_running = False
+            if self._opened_at is not None or self._failures >= self.threshold:
+                if self._opened_at is None:
+                    log_event(logger, logging.WARNING, "breaker.opened", failures=self._failures)
+                self._opened_at = time.monotonic()
+
+    def state(self):
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            return "half-open" if time.monotonic() - self._opened_at >= self.reset_seconds else "open"
+
+
+# One breaker for the backend all of db.py talks to
+breaker = CircuitBreaker()
+
+
+def backoff_delay(attempt):
+    """Full-jitter delay before retrying after the given (0-based) attempt"""
+    return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt))
+
+
+def call(func, op, idempotent=True, attempts=RETRY_ATTEMPTS):
+    """Run func() under the breaker, retrying transient failures if the operation is idempotent"""
+    attempts = attempts if idempotent else 1
+    for attempt in range(attempts):
+        try:
+            breaker.before_call()
+        except BackendUnavailableError:
+            operation_stats.count(op, "rejected")
+            raise
+        try:
+            result = func()
+        except Exception as e:
+            if not is_transient(e):
+                breaker.record_success()
+                raise
+            breaker.record_failure()
+            if attempt + 1 >= attempts:
+                raise BackendUnavailableError(f"The database is not responding ({type(e).__name__}: {e})") from e
+            delay = backoff_delay(attempt)
+            operation_stats.count(op, "retries")
+            log_event(logger, logging.WARNING, "backend.retry", op=op, attempt=attempt + 1,
+                      delay_ms=round(delay * 1000), error=e)
+            time.sleep(delay)
+        else:
+            breaker.record_success()
+            return result
@@ -0,0 +1,341 @@
+"""Shared cache and campaign change feed for running several app processes.
+
+Each Streamlit session keeps its campaigns in st.session_state. Saves and
+deletes in db.py publish a change event, and every page calls
+sync_campaigns() at the top of each rerun to reload campaigns that were
+changed by other sessions, in this process or any other.
+
+LTCO_SHARED_STATE selects the backend:
+    memory   (default) one process; sessions in it still see each other's edits
+    sqlite   processes on one host share LTCO_SHARED_STATE_PATH
+    redis    processes on any host share LTCO_REDIS_URL (needs the redis package)
+
+Pages start with bootstrap_session(), which sets up the session without
+app.py having run first. A ?campaign_id= query param loads and selects just
+that campaign, and the selected campaign is written back to the URL, so
+deep links and browser refreshes open the campaign directly.
+
+The shared cache also backs the chart figure cache, so a figure built by one
+process is reused by the others.
+
+Multi-process deployment (sticky sessions are required because each Streamlit
+session lives on one websocket):
+    LTCO_SHARED_STATE=sqlite streamlit run app.py --server.port 8501
+    LTCO_SHARED_STATE=sqlite streamlit run app.py --server.port 8502
+    ...behind a load balancer with session affinity. Point LTCO_SNAPSHOT_DIR
+    at storage every process can read.
+"""
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import deque
+
+from telemetry import get_logger, log_event
+
+SHARED_STATE = os.getenv("LTCO_SHARED_STATE", "memory").lower()
+SHARED_STATE_PATH = os.getenv("LTCO_SHARED_STATE_PATH", os.path.join("data", "shared_state.db"))
+REDIS_URL = os.getenv("LTCO_REDIS_URL", "redis://localhost:6379/0")
+
+# Change events kept for sessions that are behind; older sessions reload everything
+MAX_EVENTS = int(os.getenv("LTCO_SHARED_MAX_EVENTS", "10000"))
+
+# Default lifetime of shared cache entries in seconds
+CACHE_TTL = int(os.getenv("LTCO_SHARED_CACHE_TTL", "3600"))
+
+logger = get_logger("shared_state")
+
+
+class MemoryState:
+    """In-process change feed and cache (the single-process default)"""
+
+    shared_cache = False
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._events = deque(maxlen=MAX_EVENTS)
+        self._seq = 0
+
+    def publish(self, campaign_id, kind, origin):
+        with self._lock:
+            self._seq += 1
+            self._events.append((self._seq, campaign_id, kind, origin))
+            return self._seq
+
+    def latest_seq(self):
+        with self._lock:
+            return self._seq
+
+    def changes_since(self, seq):
+        """Return ([(campaign_id, kind, origin)], latest seq), or (None, latest) if events were dropped"""
+        with self._lock:
+            if self._events and self._events[0][0] > seq + 1:
+                return None, self._seq
+            return [event[1:] for event in self._events if event[0] > seq], self._seq
+
+    def cache_get(self, key):
+        return None
+
+    def cache_set(self, key, value, ttl=CACHE_TTL):
+        pass
+
+
+class SQLiteState:
+    """Change feed and cache in a SQLite file shared by processes on one host"""
+
+    shared_cache = True
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS change_events (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        campaign_id INTEGER,
+        kind TEXT,
+        origin TEXT,
+        created_at REAL
+    );
+    CREATE TABLE IF NOT EXISTS shared_cache (
+        key TEXT PRIMARY KEY,
+        value TEXT,
+        expires_at REAL
+    );
+    """
+
+    def __init__(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=5)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(self.SCHEMA)
+
+    def publish(self, campaign_id, kind, origin):
+        with self._lock:
+            seq = self._conn.execute(
+                "INSERT INTO change_events (campaign_id, kind, origin, created_at) VALUES (?, ?, ?, ?)",
+                (campaign_id, kind, origin, time.time())
+            ).lastrowid
+            if seq % 1000 == 0:
+                self._conn.execute("DELETE FROM change_events WHERE seq <= ?", (seq - MAX_EVENTS,))
+                self._conn.execute("DELETE FROM shared_cache WHERE expires_at < ?", (time.time(),))
+            return seq
+
+    def latest_seq(self):
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(MAX(seq), 0) FROM change_events").fetchone()[0]
+
+    def changes_since(self, seq):
+        with self._lock:
+            oldest, latest = self._conn.execute(
+                "SELECT COALESCE(MIN(seq), 0), COALESCE(MAX(seq), 0) FROM change_events"
+            ).fetchone()
+            if oldest > seq + 1:
+                return None, latest
+            rows = self._conn.execute(
+                "SELECT campaign_id, kind, origin FROM change_events WHERE seq > ? AND seq <= ? ORDER BY seq",
+                (seq, latest)
+            ).fetchall()
+            return rows, latest
+
+    def cache_get(self, key):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM shared_cache WHERE key = ? AND expires_at >= ?", (key, time.time())
+            ).fetchone()
+        return row[0] if row else None
+
+    def cache_set(self, key, value, ttl=CACHE_TTL):
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO shared_cache (key, value, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at",
+                (key, value, time.time() + ttl)
+            )
+
+
+class RedisState:
+    """Change feed (a capped Redis stream) and cache shared by processes on any host"""
+
+    shared_cache = True
+
+    STREAM = "ltco:changes"
+    SEQ = "ltco:changes:seq"
+
+    # INCR and XADD in one script so stream order always matches seq order
+    PUBLISH_SCRIPT = """
+    local seq = redis.call('INCR', KEYS[2])
+    redis.call('XADD', KEYS[1], 'MAXLEN', '~', ARGV[4], '*',
+               'seq', seq, 'campaign_id', ARGV[1], 'kind', ARGV[2], 'origin', ARGV[3])
+    return seq
+    """
+
+    def __init__(self, url):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("LTCO_SHARED_STATE=redis needs the redis package: pip install redis")
+        self._redis = redis.Redis.from_url(url, decode_responses=True)
+        self._publish = self._redis.register_script(self.PUBLISH_SCRIPT)
+
+    def publish(self, campaign_id, kind, origin):
+        return self._publish(keys=[self.STREAM, self.SEQ], args=[campaign_id, kind, origin or "", MAX_EVENTS])
+
+    def latest_seq(self):
+        return int(self._redis.get(self.SEQ) or 0)
+
+    def changes_since(self, seq):
+        latest = self.latest_seq()
+        if latest <= seq:
+            return [], seq
+        # Read backwards until we pass seq; the stream is capped so this is bounded
+        entries = []
+        for _, fields in self._redis.xrevrange(self.STREAM, count=min(latest - seq, MAX_EVENTS)):
+            if int(fields["seq"]) <= seq:
+                break
+            entries.append(fields)
+        if not entries or int(entries[-1]["seq"]) > seq + 1:
+            return None, latest
+        return [(int(f["campaign_id"]), f["kind"], f["origin"]) for f in reversed(entries)], int(entries[0]["seq"])
+
+    def cache_get(self, key):
+        return self._redis.get(f"ltco:cache:{key}")
+
+    def cache_set(self, key, value, ttl=CACHE_TTL):
+        self._redis.set(f"ltco:cache:{key}", value, ex=ttl)
+
+
+def _create_state():
+    if SHARED_STATE == "sqlite":
+        return SQLiteState(SHARED_STATE_PATH)
+    if SHARED_STATE == "redis":
+        return RedisState(REDIS_URL)
+    return MemoryState()
+
+
+state = _create_state()
+
+# Origin of changes made by the session whose script is running on this thread
+_local = threading.local()
+
+
+def publish_change(campaign_id, kind="updated"):
+    """Announce that a campaign was saved ("updated") or "deleted"; never raises"""
+    try:
+        return state.publish(campaign_id, kind, getattr(_local, "origin", None))
+    except Exception as e:
+        log_event(logger, logging.ERROR, "shared_state.publish_failed", campaign_id=campaign_id, error=e)
+        return None
+
+
+def latest_seq():
+    """Current position of the change feed"""
+    return state.latest_seq()
+
+
+def changes_since(seq):
+    """Return ([(campaign_id, kind, origin)], latest seq), or (None, latest) if events were dropped"""
+    return state.changes_since(seq)
+
+
+def cache_get(key):
+    """Read a value from the shared cache (None when missing or not shared)"""
+    if not state.shared_cache:
+        return None
+    try:
+        return state.cache_get(key)
+    except Exception as e:
+        log_event(logger, logging.WARNING, "shared_state.cache_failed", error=e)
+        return None
+
+
+def cache_set(key, value, ttl=CACHE_TTL):
+    """Store a value in the shared cache; failures only cost a rebuild elsewhere"""
+    if not state.shared_cache:
+        return
+    try:
+        state.cache_set(key, value, ttl)
+    except Exception as e:
+        log_event(logger, logging.WARNING, "shared_state.cache_failed", error=e)
+
+
+def sync_campaigns(session_state):
+    """Reload campaigns in session_state that other sessions changed since the last sync"""
+    if "_change_origin" not in session_state:
+        session_state["_change_origin"] = uuid.uuid4().hex
+    origin = session_state["_change_origin"]
+    _local.origin = origin
+
+    if "campaigns" not in session_state:
+        return
+    if "campaigns_seq" not in session_state:
+        session_state["campaigns_seq"] = latest_seq()
+        return
+
+    events, latest = state.changes_since(session_state["campaigns_seq"])
+
+    # Sessions only hold the campaigns they opened; the sidebar list is read fresh every rerun
+    loaded = session_state["campaigns"]
+    if events is None:
+        # Too far behind the feed: reload everything this session holds
+        changed = list(loaded)
+    else:
+        changed = dict.fromkeys(str(campaign_id) for campaign_id, _, event_origin in events
+                                if event_origin != origin and str(campaign_id) in loaded)
+    for campaign_id in changed:
+        reload_campaign(session_state, int(campaign_id))
+
+    if session_state.get("current_campaign_id") not in (None, *session_state["campaigns"]):
+        session_state["current_campaign_id"] = None
+    session_state["campaigns_seq"] = latest
+
+
+def reload_campaign(session_state, campaign_id):
+    """Replace a campaign in session_state with the stored one, dropping it if it was deleted"""
+    import db
+
+    fresh = db.get_campaign(campaign_id)
+    campaigns = session_state["campaigns"]
+    if fresh is None:
+        campaigns.pop(str(campaign_id), None)
+        if session_state.get("current_campaign_id") == str(campaign_id):
+            session_state["current_campaign_id"] = None
+    else:
+        campaigns[str(campaign_id)] = fresh
+    return fresh
+
+
+def bootstrap_session(session_state, query_params):
+    """Initialize the campaign session state for a page and apply a ?campaign_id= deep link.
+
+    Only the linked campaign is loaded (once per session; later reruns use the
+    copy in session_state and sync_campaigns() keeps it current). The selected
+    campaign id is mirrored into query_params so a refresh reopens it.
+    """
+    if "campaigns" not in session_state:
+        # Changes after this seq are picked up by sync_campaigns
+        session_state["campaigns_seq"] = latest_seq()
+        session_state["campaigns"] = {}
+    if "current_campaign_id" not in session_state:
+        session_state["current_campaign_id"] = None
+
+    # Reload campaigns changed by other sessions or app processes
+    sync_campaigns(session_state)
+
+    # Apply the link only when it changes, so selecting another campaign in the app wins
+    requested = query_params.get("campaign_id")
+    if requested and requested != session_state.get("_linked_campaign_id"):
+        session_state["_linked_campaign_id"] = requested
+        if requested.isdigit():
+            if requested in session_state["campaigns"] or reload_campaign(session_state, int(requested)):
+                session_state["current_campaign_id"] = requested
+
+    current = session_state["current_campaign_id"]
+    if current is not None:
+        session_state["_linked_campaign_id"] = current
+        if query_params.get("campaign_id") != current:
+            query_params["campaign_id"] = current
+    elif "campaign_id" in query_params:
+        del query_params["campaign_id"]
+    return current
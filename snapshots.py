@@ -0,0 +1,423 @@
+"""Static snapshots of the client view for shared links.
+
+Whenever a campaign is saved (including its sharing_settings), db.save_campaign
+hands it to publish() which renders everything the client view needs into a
+JSON bundle plus a standalone HTML report. Both hold only the sections the
+campaign's sharing_settings show (no influencer rows when details are hidden,
+no likes/shares/comments when engagement is hidden):
+
+    <LTCO_SNAPSHOT_DIR>/reports/<share_token>.json   read by pages/client_view.py
+    <LTCO_SNAPSHOT_DIR>/reports/<share_token>.html   self-contained report page
+    <LTCO_SNAPSHOT_DIR>/campaigns/<campaign_id>      current token for the campaign
+
+Share-token requests are served from the JSON bundle (no database queries and
+no chart building), falling back to the live query when no snapshot exists.
+The reports/ directory only ever contains token-named files, so it can be
+served directly by a reverse proxy; campaigns/ must not be exposed.
+
+Writes that change influencers without a full campaign save (db's bulk
+upserts and deletes) call unpublish_campaign(), as does a failed publish, so
+a share link falls back to live data instead of serving a stale bundle.
+
+LTCO_SNAPSHOTS selects the publishing mode: "async" (default, a background
+thread coalesces repeated saves of the same campaign), "sync" or "off".
+
+Usage:
+    python snapshots.py    # republish snapshots for every campaign in the backend
+"""
+import html
+import json
+import logging
+import os
+import re
+import sys
+import threading
+from datetime import datetime
+
+from charts import platform_pie, views_by_platform, engagement_by_platform, efficiency_gauge, influencer_totals, metrics_trend
+from telemetry import get_logger, log_event, track_operation
+
+SNAPSHOT_DIR = os.getenv("LTCO_SNAPSHOT_DIR", os.path.join("data", "snapshots"))
+SNAPSHOT_MODE = os.getenv("LTCO_SNAPSHOTS", "async").lower()
+
+# Bump when the bundle layout changes; older bundles are ignored and republished
+SNAPSHOT_VERSION = 3
+
+# Rows shown in the static HTML report (the JSON bundle keeps every influencer)
+HTML_TABLE_ROWS = 1000
+
+DEFAULT_SHARING_SETTINGS = {
+    'include_dashboard': True,
+    'include_metrics': True,
+    'include_costs': False,
+    'include_influencer_details': True,
+    'include_engagement_metrics': True,
+    'client_name': '',
+    'custom_message': ''
+}
+
+# Influencer and campaign total fields left out of a bundle when engagement metrics are hidden
+ENGAGEMENT_FIELDS = ("likes", "shares", "comments")
+ENGAGEMENT_TOTALS = ("total_shares", "total_comments")
+
+# Share tokens are used as file names, so only accept simple ones
+_TOKEN_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+logger = get_logger("snapshots")
+
+
+def _reports_dir():
+    return os.path.join(SNAPSHOT_DIR, "reports")
+
+
+def _pointer_path(campaign_id):
+    return os.path.join(SNAPSHOT_DIR, "campaigns", str(campaign_id))
+
+
+def _valid_token(token):
+    return isinstance(token, str) and bool(_TOKEN_PATTERN.match(token))
+
+
+def _write_atomic(path, text):
+    """Write text to path via a temp file so readers never see a partial file"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def sharing_settings_for(campaign):
+    """Return the campaign's sharing settings, falling back to the client view defaults"""
+    return campaign.get('sharing_settings') or dict(DEFAULT_SHARING_SETTINGS)
+
+
+def campaign_figures(campaign, sharing_settings):
+    """Build the client view charts as Plotly dicts (None for charts that are hidden)"""
+    figures = {
+        "platform_pie": None,
+        "views_by_platform": None,
+        "engagement_by_platform": None,
+        "efficiency_gauge": None,
+        "metrics_trend": None,
+    }
+    if not sharing_settings.get('include_dashboard', True) or not campaign.get('influencers'):
+        return figures
+
+    figures["platform_pie"] = platform_pie(campaign)
+    figures["views_by_platform"] = views_by_platform(campaign)
+
+    # Imported here because db publishes snapshots on save
+    from db import get_metric_trend
+    if campaign.get("id") is not None:
+        trend = get_metric_trend(campaign["id"], period="day")
+        if not trend.empty:
+            figures["metrics_trend"] = metrics_trend(trend, "views", "day")
+
+    if sharing_settings.get('include_engagement_metrics', True):
+        figures["engagement_by_platform"] = engagement_by_platform(campaign)
+
+        total_views = influencer_totals(campaign)['views']
+        campaign_budget = campaign.get('budget', 0)
+        if total_views > 0 and campaign_budget > 0:
+            figures["efficiency_gauge"] = efficiency_gauge(total_views / campaign_budget, threshold=True)
+
+    return figures
+
+
+def build_snapshot(campaign):
+    """Render the read-only client view data for a campaign into a JSON-serializable dict.
+
+    Only what sharing_settings show goes in: the bundle can be fetched
+    directly by anyone holding the link.
+    """
+    sharing_settings = sharing_settings_for(campaign)
+    engagement = sharing_settings.get('include_engagement_metrics', True)
+    hidden = {key for key in ENGAGEMENT_FIELDS if not engagement}
+
+    influencers = campaign.get("influencers") or []
+    shown_influencers = [
+        {key: value for key, value in inf.items() if not key.startswith("_") and key not in hidden}
+        for inf in influencers
+    ] if sharing_settings.get('include_influencer_details', True) else []
+
+    metrics = dict(campaign.get("metrics") or {}) if sharing_settings.get('include_metrics', True) else {}
+    if not engagement:
+        for total in ENGAGEMENT_TOTALS:
+            metrics.pop(total, None)
+
+    return {
+        "version": SNAPSHOT_VERSION,
+        "published_at": datetime.now().isoformat(timespec="seconds"),
+        "revision": campaign.get("revision"),
+        "campaign": {
+            "id": campaign.get("id"),
+            "name": campaign.get("name"),
+            "created_at": campaign.get("created_at"),
+            "share_token": campaign.get("share_token"),
+            "budget": campaign.get("budget", 0),
+            "metrics": metrics,
+            "sharing_settings": sharing_settings,
+            # The charts and "no influencers yet" message need the count even when the rows are hidden
+            "influencer_count": len(influencers),
+            "influencers": shown_influencers,
+        },
+        # Engagement charts are already left out by campaign_figures when engagement is hidden
+        "charts": campaign_figures(campaign, sharing_settings),
+    }
+
+
+def _script_json(value):
+    """JSON for embedding in an inline <script>: nothing in it can close the tag or open a comment"""
+    text = json.dumps(value)
+    return (text.replace("</", "<\\/").replace("<!--", "<\\u0021--")
+            .replace("\u2028", "\\u2028").replace("\u2029", "\\u2029"))
+
+
+def render_html(snapshot):
+    """Render a snapshot as a standalone HTML report (charts load plotly.js from its CDN)"""
+    from plotly.offline import get_plotlyjs_version
+
+    campaign = snapshot["campaign"]
+    settings = campaign["sharing_settings"]
+    metrics = campaign["metrics"]
+    esc = html.escape
+
+    parts = [
+        "<!DOCTYPE html>",
+        "<html><head><meta charset='utf-8'>",
+        f"<title>{esc(str(campaign['name']))}</title>",
+        f"<script src='https://cdn.plot.ly/plotly-{get_plotlyjs_version()}.min.js'></script>",
+        "<style>body{font-family:sans-serif;margin:2rem;color:#262730}"
+        ".metrics{display:flex;gap:2rem;flex-wrap:wrap}.metric b{display:block;font-size:1.6rem}"
+        ".charts{display:grid;grid-template-columns:1fr 1fr;gap:1rem}"
+        "table{border-collapse:collapse;width:100%}td,th{border-bottom:1px solid #ddd;padding:4px 8px;text-align:left}"
+        "</style></head><body>",
+        f"<h1>{esc(str(campaign['name']))}</h1>",
+    ]
+    if settings.get('client_name'):
+        parts.append(f"<p><b>Prepared for:</b> {esc(settings['client_name'])}</p>")
+    parts.append(f"<p><b>Updated:</b> {esc(snapshot['published_at'])}</p>")
+    if settings.get('custom_message'):
+        parts.append(f"<p>{esc(settings['custom_message'])}</p>")
+
+    if settings.get('include_metrics', True):
+        shown = [("Budget", f"₹{campaign['budget']:,.2f}"),
+                 ("Total Views", f"{metrics.get('total_views', 0):,}"),
+                 ("Total Likes", f"{metrics.get('total_likes', 0):,}")]
+        if settings.get('include_engagement_metrics', True):
+            shown += [("Total Shares", f"{metrics.get('total_shares', 0):,}"),
+                      ("Total Comments", f"{metrics.get('total_comments', 0):,}")]
+        parts.append("<h2>Campaign Performance</h2><div class='metrics'>")
+        parts.extend(f"<div class='metric'>{esc(label)}<b>{esc(value)}</b></div>" for label, value in shown)
+        parts.append("</div>")
+
+    figures = [(name, fig) for name, fig in snapshot["charts"].items() if fig is not None]
+    if figures:
+        parts.append("<h2>Performance Charts</h2><div class='charts'>")
+        for name, fig in figures:
+            parts.append(f"<div id='{name}'></div>")
+            parts.append(
+                f"<script>Plotly.newPlot('{name}', {_script_json(fig['data'])}, "
+                f"{_script_json(fig.get('layout', {}))}, {{responsive: true}});</script>"
+            )
+        parts.append("</div>")
+
+    influencers = campaign["influencers"]
+    if settings.get('include_influencer_details', True) and influencers:
+        columns = [('name', 'Name'), ('username', 'Username'), ('platform', 'Platform'),
+                   ('post_type', 'Post Type'), ('views', 'Views')]
+        if settings.get('include_engagement_metrics', True):
+            columns += [('likes', 'Likes'), ('shares', 'Shares'), ('comments', 'Comments')]
+
+        top = sorted(influencers, key=lambda inf: inf.get('views', 0) or 0, reverse=True)[:HTML_TABLE_ROWS]
+        parts.append("<h2>Campaign Influencers</h2>")
+        if len(influencers) > len(top):
+            parts.append(f"<p>Top {len(top)} of {len(influencers)} influencers by views</p>")
+        parts.append("<table><tr>" + "".join(f"<th>{label}</th>" for _, label in columns) + "</tr>")
+        for inf in top:
+            cells = []
+            for key, _ in columns:
+                value = inf.get(key, '')
+                cells.append(f"{value:,}" if isinstance(value, int) else esc(str(value if value is not None else '')))
+            parts.append("<tr>" + "".join(f"<td>{cell}</td>" for cell in cells) + "</tr>")
+        parts.append("</table>")
+
+    parts.append("<hr><p>Campaign Manager v1.0 | Client view</p></body></html>")
+    return "\n".join(parts)
+
+
+def publish_snapshot(campaign):
+    """Write the JSON bundle and HTML report for a campaign; returns the JSON path or None"""
+    token = campaign.get("share_token")
+    campaign_id = campaign.get("id")
+    if not _valid_token(token) or campaign_id is None:
+        return None
+
+    try:
+        with track_operation("snapshots.publish", rows=len(campaign.get("influencers") or [])):
+            snapshot = build_snapshot(campaign)
+            reports = _reports_dir()
+            json_path = os.path.join(reports, f"{token}.json")
+
+            # Drop the previous report if the share token was regenerated
+            pointer = _pointer_path(campaign_id)
+            try:
+                with open(pointer, encoding="utf-8") as f:
+                    old_token = f.read().strip()
+            except FileNotFoundError:
+                old_token = None
+            if old_token and old_token != token and _valid_token(old_token):
+                remove_snapshot(old_token)
+
+            _write_atomic(os.path.join(reports, f"{token}.html"), render_html(snapshot))
+            _write_atomic(json_path, json.dumps(snapshot, default=str))
+            _write_atomic(pointer, token)
+    except Exception as e:
+        log_event(logger, logging.ERROR, "snapshot.publish_failed", campaign_id=campaign_id, error=e)
+        # Don't leave the previous (now stale) report up: the link falls back to live data
+        unpublish_campaign(campaign_id)
+        remove_snapshot(token)
+        return None
+
+    log_event(logger, logging.DEBUG, "snapshot.published", campaign_id=campaign_id,
+              influencers=len(snapshot["campaign"]["influencers"]))
+    return json_path
+
+
+def remove_snapshot(token):
+    """Delete the report files for a share token"""
+    if not _valid_token(token):
+        return
+    for ext in ("json", "html"):
+        _remove(os.path.join(_reports_dir(), f"{token}.{ext}"))
+    _loaded.pop(token, None)
+
+
+def unpublish_campaign(campaign_id):
+    """Delete the current report for a campaign (when it is deleted, or changed without a republish)"""
+    if SNAPSHOT_MODE == "off":
+        return
+    pointer = _pointer_path(campaign_id)
+    try:
+        with open(pointer, encoding="utf-8") as f:
+            remove_snapshot(f.read().strip())
+    except FileNotFoundError:
+        return
+    _remove(pointer)
+
+
+# Token -> (file mtime, snapshot); reloaded only when the file changes
+_loaded = {}
+
+
+def load_snapshot(token):
+    """Return the published snapshot for a share token, or None if there isn't a current one"""
+    if SNAPSHOT_MODE == "off" or not _valid_token(token):
+        return None
+
+    path = os.path.join(_reports_dir(), f"{token}.json")
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+    cached = _loaded.get(token)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+
+    try:
+        with open(path, encoding="utf-8") as f:
+            snapshot = json.load(f)
+    except (OSError, ValueError) as e:
+        log_event(logger, logging.WARNING, "snapshot.load_failed", token=token, error=e)
+        return None
+    if snapshot.get("version") != SNAPSHOT_VERSION:
+        return None
+
+    _loaded[token] = (mtime, snapshot)
+    return snapshot
+
+
+class _Publisher:
+    """Background thread that publishes the latest pending version of each campaign"""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._pending = {}
+        self._busy = False
+        self._thread = None
+
+    def submit(self, campaign):
+        with self._cond:
+            # A newer save replaces one that hasn't been published yet
+            self._pending[campaign.get("id")] = campaign
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="snapshot-publisher", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                _, campaign = self._pending.popitem()
+                self._busy = True
+            try:
+                publish_snapshot(campaign)
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
+
+    def flush(self, timeout=None):
+        """Wait until every submitted campaign has been published"""
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._pending and not self._busy, timeout)
+
+
+_publisher = _Publisher()
+
+
+def publish(campaign):
+    """Publish a campaign's snapshot according to LTCO_SNAPSHOTS (called from db.save_campaign)"""
+    if SNAPSHOT_MODE == "off" or not _valid_token(campaign.get("share_token")):
+        return
+
+    # Copy what the snapshot reads so later in-place edits by the page can't race the publisher
+    frozen = dict(campaign)
+    frozen["influencers"] = [dict(inf) for inf in campaign.get("influencers") or []]
+    frozen.pop("_fingerprint", None)
+    frozen.pop("_frame", None)
+    frozen.pop("_ranking", None)
+
+    if SNAPSHOT_MODE == "sync":
+        publish_snapshot(frozen)
+    else:
+        _publisher.submit(frozen)
+
+
+def flush(timeout=None):
+    """Block until queued snapshots are written"""
+    return _publisher.flush(timeout)
+
+
+def main(argv=None):
+    import db
+
+    campaigns = db.get_campaigns()
+    published = sum(1 for campaign in campaigns.values() if publish_snapshot(campaign))
+    print(f"Published {published} of {len(campaigns)} campaign snapshots to {_reports_dir()}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,261 @@
+"""Seedable synthetic campaign and influencer generator for load testing.
+
+Usage:
+    python synthetic.py --campaigns 20 --influencers 2000000 --format csv --out data/fixtures
+    python synthetic.py --campaigns 5 --influencers 500000 --format parquet
+    LTCO_BACKEND=sqlite LTCO_SQLITE_PATH=load.db python synthetic.py --format db
+
+Rows are generated in chunks with numpy, so millions of influencers never
+need to be held in memory at once. The same --seed always produces the
+same data.
+"""
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Platform and post type choices match the selectboxes in app.py
+PLATFORM_WEIGHTS = {
+    "Instagram": 0.38,
+    "TikTok": 0.27,
+    "YouTube": 0.15,
+    "Facebook": 0.12,
+    "Twitter": 0.08,
+}
+
+# Post type mix per platform (only types offered in app.py)
+POST_TYPE_WEIGHTS = {
+    "Instagram": {"Post": 0.35, "Reel": 0.45, "Story": 0.20},
+    "TikTok": {"Video": 1.0},
+    "YouTube": {"Video": 0.85, "Post": 0.15},
+    "Facebook": {"Post": 0.45, "Video": 0.30, "Reel": 0.15, "Story": 0.10},
+    "Twitter": {"Tweet": 0.90, "Video": 0.10},
+}
+
+# Median views per platform; views are lognormal around these, so a few
+# posts get orders of magnitude more views than the typical one
+MEDIAN_VIEWS = {
+    "Instagram": 8_000,
+    "TikTok": 15_000,
+    "YouTube": 12_000,
+    "Facebook": 4_000,
+    "Twitter": 3_000,
+}
+VIEWS_SIGMA = 1.6
+
+POST_URL_PREFIXES = {
+    "Instagram": "https://instagram.com/p/",
+    "TikTok": "https://tiktok.com/video/",
+    "YouTube": "https://youtube.com/watch?v=",
+    "Facebook": "https://facebook.com/posts/",
+    "Twitter": "https://twitter.com/status/",
+}
+
+INFLUENCER_COLUMNS = [
+    "id", "campaign_id", "name", "username", "platform", "post_type",
+    "post_url", "views", "likes", "shares", "comments",
+]
+
+DEFAULT_CHUNK_SIZE = 100_000
+
+
+def campaign_sizes(rng, campaigns, influencers):
+    """Split the influencer total across campaigns with a skewed (lognormal) distribution"""
+    if campaigns <= 0:
+        return []
+    shares = rng.lognormal(mean=0.0, sigma=1.0, size=campaigns)
+    sizes = np.floor(shares / shares.sum() * influencers).astype(np.int64)
+    # Hand the rounding remainder to the largest campaign
+    sizes[np.argmax(sizes)] += influencers - sizes.sum()
+    return sizes.tolist()
+
+
+def generate_influencers(rng, campaign_id, count, first_id):
+    """Generate count influencer rows for one campaign as a DataFrame"""
+    platforms = np.array(list(PLATFORM_WEIGHTS))
+    platform_idx = rng.choice(len(platforms), size=count, p=list(PLATFORM_WEIGHTS.values()))
+    platform = platforms[platform_idx]
+
+    post_type = np.empty(count, dtype=object)
+    views = np.empty(count, dtype=np.int64)
+    for i, name in enumerate(platforms):
+        mask = platform_idx == i
+        n = int(mask.sum())
+        if not n:
+            continue
+        types = POST_TYPE_WEIGHTS[name]
+        post_type[mask] = rng.choice(list(types), size=n, p=list(types.values()))
+        views[mask] = rng.lognormal(mean=np.log(MEDIAN_VIEWS[name]), sigma=VIEWS_SIGMA, size=n)
+
+    # Engagement rates: likes ~5% of views, comments a fraction of likes, shares rarer
+    like_rate = rng.beta(2.0, 38.0, size=count)
+    likes = (views * like_rate).astype(np.int64)
+    comments = (likes * rng.beta(1.5, 30.0, size=count)).astype(np.int64)
+    shares = (views * rng.beta(1.2, 250.0, size=count)).astype(np.int64)
+
+    ids = np.arange(first_id, first_id + count, dtype=np.int64)
+    handles = pd.Series(ids).astype(str)
+    url_prefixes = pd.Series(platform).map(POST_URL_PREFIXES)
+
+    return pd.DataFrame({
+        "id": ids,
+        "campaign_id": campaign_id,
+        "name": "Creator " + handles,
+        "username": "@creator" + handles,
+        "platform": platform,
+        "post_type": post_type,
+        "post_url": url_prefixes + handles,
+        "views": views,
+        "likes": likes,
+        "shares": shares,
+        "comments": comments,
+    }, columns=INFLUENCER_COLUMNS)
+
+
+def make_campaign_record(rng, campaign_id, index):
+    """Build a campaigns-table row for a generated campaign (metrics filled in later)"""
+    day = int(rng.integers(1, 365))
+    return {
+        "id": campaign_id,
+        "name": f"Load Test Campaign {index + 1}",
+        "created_at": (pd.Timestamp("2025-01-01") + pd.Timedelta(days=day)).strftime("%Y-%m-%d %H:%M:%S"),
+        "share_token": f"load{campaign_id}",
+        "budget": float(round(rng.lognormal(mean=np.log(200_000), sigma=1.0), -3)),
+        "metrics": {
+            "total_reach": 0,
+            "total_views": 0,
+            "total_likes": 0,
+            "total_shares": 0,
+            "total_comments": 0,
+        },
+        "sharing_settings": {
+            "include_dashboard": True,
+            "include_metrics": True,
+            "include_engagement_metrics": True,
+            "include_budget": False,
+            "include_influencer_details": True,
+        },
+    }
+
+
+def generate(campaigns, influencers, seed=0, chunk_size=DEFAULT_CHUNK_SIZE,
+             first_campaign_id=1, first_influencer_id=1):
+    """Yield (campaign_record, influencer_chunks) for each generated campaign.
+
+    influencer_chunks is a generator of DataFrames of at most chunk_size rows and
+    must be consumed before the campaign record's metrics are final.
+    """
+    rng = np.random.default_rng(seed)
+    next_id = first_influencer_id
+
+    for index, size in enumerate(campaign_sizes(rng, campaigns, influencers)):
+        campaign_id = first_campaign_id + index
+        totals = {"views": 0, "likes": 0, "shares": 0, "comments": 0}
+        record = make_campaign_record(rng, campaign_id, index)
+
+        def chunks(campaign_id=campaign_id, size=size, first_id=next_id, totals=totals, record=record):
+            for start in range(0, size, chunk_size):
+                df = generate_influencers(rng, campaign_id, min(chunk_size, size - start), first_id + start)
+                for key in totals:
+                    totals[key] += int(df[key].sum())
+                yield df
+            record["metrics"].update({
+                "total_views": totals["views"],
+                "total_likes": totals["likes"],
+                "total_shares": totals["shares"],
+                "total_comments": totals["comments"],
+            })
+
+        yield record, chunks()
+        next_id += size
+
+
+def write_files(out_dir, campaigns, influencers, seed, chunk_size, file_format):
+    """Write campaigns and influencers fixtures as CSV or Parquet files"""
+    os.makedirs(out_dir, exist_ok=True)
+    influencers_path = os.path.join(out_dir, f"influencers.{file_format}")
+    campaigns_path = os.path.join(out_dir, f"campaigns.{file_format}")
+
+    writer = None
+    if file_format == "parquet":
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            sys.exit("Parquet output needs pyarrow: pip install pyarrow")
+    elif os.path.exists(influencers_path):
+        os.remove(influencers_path)
+
+    campaign_records = []
+    rows = 0
+    for record, chunks in generate(campaigns, influencers, seed, chunk_size):
+        for df in chunks:
+            if file_format == "parquet":
+                table = pa.Table.from_pandas(df, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(influencers_path, table.schema)
+                writer.write_table(table)
+            else:
+                df.to_csv(influencers_path, mode="a", header=rows == 0, index=False)
+            rows += len(df)
+        campaign_records.append(record)
+
+    if writer is not None:
+        writer.close()
+
+    campaigns_df = pd.DataFrame(campaign_records)
+    campaigns_df["metrics"] = campaigns_df["metrics"].map(json.dumps)
+    campaigns_df["sharing_settings"] = campaigns_df["sharing_settings"].map(json.dumps)
+    if file_format == "parquet":
+        campaigns_df.to_parquet(campaigns_path, index=False)
+    else:
+        campaigns_df.to_csv(campaigns_path, index=False)
+
+    return rows, len(campaign_records)
+
+
+def write_backend(campaigns, influencers, seed, chunk_size, batch_size):
+    """Bulk insert generated campaigns and influencers into the configured storage backend"""
+    import db
+
+    rows = 0
+    count = 0
+    for record, chunks in generate(campaigns, influencers, seed, chunk_size):
+        # Write the campaign row first so influencers always reference an existing campaign
+        db.save_campaign(dict(record))
+        for df in chunks:
+            rows += db.save_influencers_bulk(df.to_dict("records"), batch_size=batch_size)
+        # Rewrite the campaign row with the final metrics
+        db.save_campaign(record)
+        count += 1
+    return rows, count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate synthetic campaigns and influencers")
+    parser.add_argument("--campaigns", type=int, default=10)
+    parser.add_argument("--influencers", type=int, default=1_000_000,
+                        help="total influencer rows across all campaigns")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--format", choices=["csv", "parquet", "db"], default="csv")
+    parser.add_argument("--out", default=os.path.join("data", "fixtures"),
+                        help="output directory for csv/parquet fixtures")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--batch-size", type=int, default=1000,
+                        help="rows per bulk insert request when writing to the backend")
+    args = parser.parse_args(argv)
+
+    if args.format == "db":
+        rows, count = write_backend(args.campaigns, args.influencers, args.seed, args.chunk_size, args.batch_size)
+        print(f"Inserted {rows} influencers across {count} campaigns")
+    else:
+        rows, count = write_files(args.out, args.campaigns, args.influencers, args.seed,
+                                  args.chunk_size, args.format)
+        print(f"Wrote {rows} influencers across {count} campaigns to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
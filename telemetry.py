@@ -0,0 +1,162 @@
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# Structured logging and per-operation counters.
+#
+# Log calls go through log_event(), which checks the level before doing any
+# work and only builds the JSON line inside the handler, so a disabled debug
+# call costs one isEnabledFor() check. High-volume events can be sampled with
+# sample_every=N to emit one in N.
+
+LOG_LEVEL = os.getenv("LTCO_LOG_LEVEL", "INFO").upper()
+
+# Emit one in N per-row debug events (e.g. each influencer upsert)
+LOG_SAMPLE_EVERY = int(os.getenv("LTCO_LOG_SAMPLE_EVERY", "100"))
+
+# Latency histogram bucket upper bounds in milliseconds (last bucket is overflow)
+LATENCY_BUCKETS_MS = [1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000]
+
+
+class JsonFormatter(logging.Formatter):
+    """Format log records as one JSON object per line"""
+
+    def format(self, record):
+        entry = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "level": record.levelname,
+            "logger": record.name,
+            "event": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", {}))
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+_configured = False
+_config_lock = threading.Lock()
+
+
+def get_logger(name):
+    """Return a logger under the 'ltco' namespace with JSON output configured"""
+    global _configured
+    if not _configured:
+        with _config_lock:
+            if not _configured:
+                root = logging.getLogger("ltco")
+                handler = logging.StreamHandler()
+                handler.setFormatter(JsonFormatter())
+                root.addHandler(handler)
+                root.setLevel(LOG_LEVEL)
+                root.propagate = False
+                _configured = True
+    return logging.getLogger(f"ltco.{name}")
+
+
+_sample_counters = {}
+
+
+def log_event(logger, level, event, sample_every=1, **fields):
+    """Log a structured event if the level is enabled, optionally sampled"""
+    if not logger.isEnabledFor(level):
+        return
+
+    if sample_every > 1:
+        # Racy increments only skew sampling slightly, so no lock here
+        count = _sample_counters.get(event, 0)
+        _sample_counters[event] = count + 1
+        if count % sample_every:
+            return
+        fields["sampled_1_in"] = sample_every
+
+    logger.log(level, event, extra={"fields": fields})
+
+
+class OperationStats:
+    """Thread-safe per-operation counters: calls, errors, retries, rows written and latency histogram"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ops = {}
+
+    def _stats(self, op):
+        stats = self._ops.get(op)
+        if stats is None:
+            stats = self._ops[op] = {
+                "calls": 0,
+                "errors": 0,
+                "retries": 0,
+                "rejected": 0,
+                "rows": 0,
+                "seconds": 0.0,
+                "max_seconds": 0.0,
+                "histogram": [0] * (len(LATENCY_BUCKETS_MS) + 1),
+            }
+        return stats
+
+    def record(self, op, seconds, rows=0, error=False):
+        """Record one call of an operation"""
+        bucket = bisect_left(LATENCY_BUCKETS_MS, seconds * 1000)
+        with self._lock:
+            stats = self._stats(op)
+            stats["calls"] += 1
+            stats["rows"] += rows
+            stats["seconds"] += seconds
+            stats["max_seconds"] = max(stats["max_seconds"], seconds)
+            stats["histogram"][bucket] += 1
+            if error:
+                stats["errors"] += 1
+
+    def count(self, op, counter):
+        """Bump a plain counter of an operation (e.g. "retries")"""
+        with self._lock:
+            self._stats(op)[counter] += 1
+
+    def snapshot(self):
+        """Return a copy of all counters"""
+        with self._lock:
+            return {
+                op: dict(stats, histogram=list(stats["histogram"]))
+                for op, stats in self._ops.items()
+            }
+
+    def reset(self):
+        """Clear all counters"""
+        with self._lock:
+            self._ops.clear()
+
+
+# Process-wide counters for backend operations
+operation_stats = OperationStats()
+
+
+def percentile_ms(histogram, fraction):
+    """Estimate a latency percentile (in ms) from histogram bucket counts"""
+    total = sum(histogram)
+    if not total:
+        return 0.0
+
+    threshold = total * fraction
+    seen = 0
+    for i, count in enumerate(histogram):
+        seen += count
+        if seen >= threshold:
+            return float(LATENCY_BUCKETS_MS[i]) if i < len(LATENCY_BUCKETS_MS) else float("inf")
+    return float("inf")
+
+
+@contextmanager
+def track_operation(op, rows=0):
+    """Time a block and record it in operation_stats"""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        operation_stats.record(op, time.perf_counter() - start, error=True)
+        raise
+    operation_stats.record(op, time.perf_counter() - start, rows=rows)
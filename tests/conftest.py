@@ -0,0 +1,9 @@
+import os
+import sys
+
+# Run against the in-memory SQLite stand-in with snapshot publishing off,
+# set before any app module reads its configuration
+os.environ.setdefault("LTCO_BACKEND", "sqlite")
+os.environ.setdefault("LTCO_SNAPSHOTS", "off")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,48 @@
+from charts import FigureCache
+
+
+def test_entries_are_evicted_once_the_byte_budget_is_exceeded():
+    cache = FigureCache(max_bytes=10)
+    cache.put("a", "xxxx")
+    cache.put("b", "xxxx")
+    cache.put("c", "xxxx")
+
+    assert cache.get("a") is None
+    assert cache.get("b") == "xxxx"
+    assert cache.get("c") == "xxxx"
+    assert cache.stats()["bytes"] == 8
+    assert cache.stats()["evictions"] == 1
+
+
+def test_recently_read_entries_outlive_older_ones():
+    cache = FigureCache(max_bytes=12)
+    cache.put("a", "xxxx")
+    cache.put("b", "xxxx")
+    cache.put("c", "xxxx")
+    cache.get("a")
+
+    cache.put("d", "xxxx")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "xxxx"
+    assert cache.get("c") == "xxxx"
+    assert cache.get("d") == "xxxx"
+
+
+def test_replacing_an_entry_counts_only_its_new_size():
+    cache = FigureCache(max_bytes=10)
+    cache.put("a", "xxxx")
+    cache.put("b", "xxxx")
+    cache.put("a", "xx")
+
+    assert cache.stats()["bytes"] == 6
+    assert cache.get("b") == "xxxx"
+
+
+def test_values_larger_than_the_budget_are_not_cached():
+    cache = FigureCache(max_bytes=10)
+    cache.put("a", "xxxx")
+    cache.put("big", "x" * 11)
+
+    assert cache.get("big") is None
+    assert cache.get("a") == "xxxx"
@@ -0,0 +1,83 @@
+import httpx
+import pytest
+
+import db
+import resilience
+import synthetic
+from concurrency import EditConflictError
+from resilience import BackendUnavailableError
+
+
+@pytest.fixture
+def campaign():
+    db.supabase.reset()
+    resilience.breaker.record_success()
+    synthetic.write_backend(campaigns=1, influencers=5, seed=0, chunk_size=5, batch_size=5)
+    campaign_id = int(next(iter(db.get_campaigns())))
+    return db.get_campaign(campaign_id)
+
+
+def _lose_responses(monkeypatch, ops):
+    """Run the given operations, then fail them as if the response was lost"""
+    execute = db._execute
+
+    def lossy(query, op, rows=0, idempotent=True):
+        result = execute(query, op, rows, idempotent)
+        if op not in ops:
+            return result
+        raise BackendUnavailableError(f"The database is not responding ({httpx.ReadTimeout('lost')})")
+    monkeypatch.setattr(db, '_execute', lossy)
+
+
+def test_lost_cas_response_is_recognized_as_our_own_write(campaign, monkeypatch):
+    views = campaign['metrics']['total_views']
+    campaign['metrics']['total_views'] = views + 10
+    _lose_responses(monkeypatch, {'campaigns.update_if_version'})
+
+    db.save_campaign(campaign)
+
+    monkeypatch.undo()
+    assert db.get_campaign(campaign['id'])['metrics']['total_views'] == views + 10
+
+
+def test_retry_after_unconfirmed_save_does_not_count_metrics_twice(campaign, monkeypatch):
+    views = campaign['metrics']['total_views']
+    campaign['metrics']['total_views'] = views + 10
+    # The update commits, and the check that would recognize it fails too
+    _lose_responses(monkeypatch, {'campaigns.update_if_version', 'campaigns.select_by_id'})
+    with pytest.raises(BackendUnavailableError):
+        db.save_campaign(campaign)
+    monkeypatch.undo()
+    resilience.breaker.record_success()
+
+    db.save_campaign(campaign)
+
+    assert db.get_campaign(campaign['id'])['metrics']['total_views'] == views + 10
+
+
+def test_influencer_saved_between_our_campaign_swap_and_our_rows_is_not_overwritten(campaign, monkeypatch):
+    views = campaign['metrics']['total_views']
+    edited = campaign['influencers'][0]
+    edited['views'] += 100
+    campaign['metrics']['total_views'] += 100
+
+    write_influencers = db._write_influencers
+
+    def others_save_first(*args, **kwargs):
+        # Another session loads after our campaign row swap and saves the same influencer
+        monkeypatch.setattr(db, '_write_influencers', write_influencers)
+        theirs = db.get_campaign(campaign['id'])
+        row = next(inf for inf in theirs['influencers'] if inf['id'] == edited['id'])
+        row['views'] += 7
+        theirs['metrics']['total_views'] += 7
+        db.save_campaign(theirs)
+        return write_influencers(*args, **kwargs)
+    monkeypatch.setattr(db, '_write_influencers', others_save_first)
+
+    with pytest.raises(EditConflictError):
+        db.save_campaign(campaign)
+
+    stored = db.get_campaign(campaign['id'])
+    row = next(inf for inf in stored['influencers'] if inf['id'] == edited['id'])
+    assert row['views'] == edited['views'] - 100 + 7
+    assert stored['metrics']['total_views'] == views + 7
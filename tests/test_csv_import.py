@@ -0,0 +1,75 @@
+import threading
+
+import pandas as pd
+
+import db
+from concurrency import detached_copy
+from csv_import import build_influencers, run_import
+
+
+class _Job:
+    def progress(self, done, total=None, message=None):
+        pass
+
+
+def _frame(prefix, rows):
+    return pd.DataFrame({
+        "name": [f"{prefix}{i}" for i in range(rows)],
+        "username": [f"{prefix}{i}" for i in range(rows)],
+        "platform": "Instagram",
+        "post_type": "Post",
+        "views": 10,
+        "likes": 1,
+        "shares": 0,
+        "comments": 0,
+    })
+
+
+def _new_campaign(name):
+    # Reserved ids, since two campaigns created in the same millisecond would share a timestamp id
+    campaign_id = db.save_campaign({
+        "id": db.generate_numeric_ids(1)[0], "name": name, "budget": 0.0, "created_at": "2026-01-01 00:00:00",
+        "metrics": {"total_views": 0, "total_likes": 0, "total_shares": 0, "total_comments": 0},
+        "influencers": [],
+    })
+    return db.get_campaign(campaign_id)
+
+
+def test_back_to_back_large_imports_get_disjoint_ids(monkeypatch):
+    # Both imports start within the same millisecond
+    monkeypatch.setattr(db, "generate_numeric_id", lambda: 1_800_000_000_000)
+    first, _ = build_influencers(_frame("a", 5000))
+    second, _ = build_influencers(_frame("b", 5000))
+    ids = [inf["id"] for inf in first + second]
+    assert len(set(ids)) == len(ids) == 10000
+
+
+def test_concurrent_large_imports_keep_every_row():
+    campaigns = [_new_campaign("one"), _new_campaign("two")]
+    frames = [_frame("a", 3000), _frame("b", 3000)]
+    workers = [
+        threading.Thread(target=run_import, args=(_Job(), detached_copy(campaign), df, "append"))
+        for campaign, df in zip(campaigns, frames)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    for campaign in campaigns:
+        stored = db.get_campaign(campaign["id"])
+        assert len(stored["influencers"]) == 3000
+        assert stored["metrics"]["total_views"] == 30000
+
+
+def test_bulk_rows_without_ids_get_reserved_ids(monkeypatch):
+    db.supabase.reset()
+    monkeypatch.setattr(db, "generate_numeric_id", lambda: 1_800_000_000_000)
+    campaign_id = db.generate_numeric_ids(1)[0]
+    rows = [{"campaign_id": campaign_id, "name": f"n{i}", "platform": "Instagram", "views": 1} for i in range(20)]
+    db.save_influencers_bulk(rows)
+    db.save_influencer({"campaign_id": campaign_id, "name": "single", "platform": "Instagram", "views": 1})
+
+    assert len({row["id"] for row in rows}) == 20
+    stored = db.supabase.table("influencers").select("id").eq("campaign_id", campaign_id).execute().data
+    assert len(stored) == 21
@@ -0,0 +1,50 @@
+import pytest
+
+import db
+import shared_state
+import synthetic
+from shared_state import bootstrap_session
+
+
+@pytest.fixture
+def campaign_id():
+    db.supabase.reset()
+    synthetic.write_backend(campaigns=1, influencers=3, seed=0, chunk_size=5, batch_size=5)
+    return next(iter(db.get_campaigns()))
+
+
+def test_link_opens_only_the_linked_campaign(campaign_id):
+    session_state, query_params = {}, {"campaign_id": campaign_id}
+
+    assert bootstrap_session(session_state, query_params) == campaign_id
+    assert list(session_state["campaigns"]) == [campaign_id]
+
+
+@pytest.mark.parametrize("requested", ["999999999", "not-a-number"])
+def test_unknown_campaign_link_opens_nothing_and_is_dropped(campaign_id, requested):
+    session_state, query_params = {}, {"campaign_id": requested}
+
+    assert bootstrap_session(session_state, query_params) is None
+    assert session_state["campaigns"] == {}
+    assert "campaign_id" not in query_params
+
+
+def test_deleted_campaign_link_opens_nothing(campaign_id):
+    db.delete_campaign(int(campaign_id))
+    session_state, query_params = {}, {"campaign_id": campaign_id}
+
+    assert bootstrap_session(session_state, query_params) is None
+    assert "campaign_id" not in query_params
+
+
+def test_campaign_deleted_after_opening_is_closed_on_the_next_run(campaign_id, monkeypatch):
+    session_state, query_params = {}, {"campaign_id": campaign_id}
+    bootstrap_session(session_state, query_params)
+
+    # Deleted by another session
+    monkeypatch.setattr(shared_state._local, "origin", "other-session")
+    db.delete_campaign(int(campaign_id))
+
+    assert bootstrap_session(session_state, query_params) is None
+    assert campaign_id not in session_state["campaigns"]
+    assert "campaign_id" not in query_params
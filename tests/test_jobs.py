@@ -0,0 +1,25 @@
+import jobs
+import db
+
+
+def _job(job_id):
+    return next(job for job in db.get_jobs(job_ids=[job_id]))
+
+
+def test_job_is_marked_failed_when_its_result_cannot_be_stored(monkeypatch):
+    db.supabase.reset()
+    update_job = db.update_job
+
+    def failing_update(job_id, **fields):
+        if fields.get('status') == 'succeeded':
+            raise RuntimeError("result rejected")
+        return update_job(job_id, **fields)
+    monkeypatch.setattr(db, 'update_job', failing_update)
+
+    job_id = jobs.submit("test", lambda job: {'message': "done"})
+    jobs._pool().shutdown(wait=True)
+    jobs._executor = None
+
+    job = _job(job_id)
+    assert job['status'] == 'failed'
+    assert "result rejected" in job['error']
@@ -0,0 +1,45 @@
+import threading
+
+import db
+
+
+def _influencer(influencer_id, campaign_id, views):
+    return {"id": influencer_id, "campaign_id": campaign_id, "platform": "Instagram",
+            "views": views, "likes": 0, "shares": 0, "comments": 0, "version": 1}
+
+
+def _trend_views(campaign_id):
+    trend = db.get_metric_trend(campaign_id)
+    return int(trend["views"].iloc[-1]) if len(trend) else 0
+
+
+def test_concurrent_saves_keep_every_rollup_increment():
+    db.supabase.reset()
+    ids = db.generate_numeric_ids(400)
+
+    def record(chunk):
+        for influencer_id in chunk:
+            db._record_metric_changes(7, [_influencer(influencer_id, 7, 5)], {})
+
+    workers = [threading.Thread(target=record, args=(ids[i::8],)) for i in range(8)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    assert _trend_views(7) == 400 * 5
+
+
+def test_deleting_influencers_records_negative_deltas():
+    db.supabase.reset()
+    campaign_id = db.generate_numeric_ids(1)[0]
+    influencers = [_influencer(influencer_id, campaign_id, 100) for influencer_id in db.generate_numeric_ids(3)]
+    db.save_influencers_bulk(influencers)
+    assert _trend_views(campaign_id) == 300
+
+    db.delete_influencers_bulk([influencers[0]["id"], influencers[1]["id"]])
+    assert _trend_views(campaign_id) == 100
+
+    # Saving a deleted influencer again (an undo) counts it back in
+    db.save_influencers_bulk([dict(influencers[0], deleted_at=None, version=2)])
+    assert _trend_views(campaign_id) == 200
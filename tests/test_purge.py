@@ -0,0 +1,20 @@
+import db
+import synthetic
+
+
+def test_purge_removes_deleted_campaigns_in_one_call_per_batch(monkeypatch):
+    db.supabase.reset()
+    synthetic.write_backend(campaigns=5, influencers=50, seed=0, chunk_size=50, batch_size=50)
+    campaign_ids = sorted(int(campaign_id) for campaign_id in db.get_campaigns())
+    for campaign_id in campaign_ids[:3]:
+        db.delete_campaign(campaign_id)
+
+    calls = []
+    rpc = db.supabase.rpc
+    monkeypatch.setattr(db.supabase, 'rpc', lambda name, params=None: calls.append(name) or rpc(name, params))
+    purged = db.purge_deleted(older_than_hours=-1)
+
+    assert calls.count('delete_campaign_cascade') == 1
+    assert purged['campaigns'] == 3
+    assert sorted(int(campaign_id) for campaign_id in db.get_campaigns()) == campaign_ids[3:]
+    assert purged['influencers'] == 50 - sum(len(c['influencers']) for c in db.get_campaigns().values())
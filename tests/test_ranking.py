@@ -0,0 +1,85 @@
+import random
+
+import pandas as pd
+import pytest
+
+from influencer_table import NUMERIC_COLUMNS, RANKING_PAGE_SIZE, SORT_COLUMNS, RankingIndex
+
+
+@pytest.fixture(scope="module")
+def frame():
+    rng = random.Random(0)
+    rows = []
+    for i in range(3 * RANKING_PAGE_SIZE + 17):
+        rows.append({
+            "name": rng.choice(["Asha", "Ben", "Chen", None]),
+            "username": f"@user{rng.randrange(40)}",
+            # Missing platform / post type form their own groups
+            "platform": rng.choice(["Instagram", "TikTok", "YouTube", None]),
+            "post_type": rng.choice(["Post", "Reel", None]),
+            # Few distinct values, so every sort has long runs of ties
+            "views": rng.choice([0, 100, 1000]),
+            "likes": rng.choice([0, 5]),
+            "shares": rng.randrange(3),
+            "comments": rng.randrange(3),
+        })
+    return pd.DataFrame(rows)
+
+
+FILTERS = [("All", "All"), ("Instagram", "All"), ("All", "Reel"), ("TikTok", "Post"), ("Snapchat", "All")]
+
+
+def _expected(df, platform, post_type, sort_by=None):
+    if platform != "All":
+        df = df[df["platform"] == platform]
+    if post_type != "All":
+        df = df[df["post_type"] == post_type]
+    if sort_by is not None:
+        column, ascending = SORT_COLUMNS[sort_by]
+        df = df.sort_values(column, ascending=ascending, kind="stable")
+    return df
+
+
+@pytest.mark.parametrize("platform, post_type", FILTERS)
+def test_totals_match_a_filtered_sum(frame, platform, post_type):
+    expected = _expected(frame, platform, post_type)
+
+    matched, totals = RankingIndex(frame).totals(platform, post_type)
+
+    assert matched == len(expected)
+    assert totals == {col: int(expected[col].sum()) for col in NUMERIC_COLUMNS}
+
+
+def test_totals_over_all_rows_include_missing_groups(frame):
+    matched, totals = RankingIndex(frame).totals()
+
+    assert matched == len(frame)
+    assert totals["views"] == int(frame["views"].sum())
+    grouped = frame.groupby(["platform", "post_type"], dropna=False)["views"].sum()
+    assert totals["views"] == int(grouped.sum())
+
+
+@pytest.mark.parametrize("platform, post_type", FILTERS)
+@pytest.mark.parametrize("sort_by", list(SORT_COLUMNS))
+def test_rank_matches_a_stable_sort(frame, platform, post_type, sort_by):
+    expected = _expected(frame, platform, post_type, sort_by)
+
+    ranked = RankingIndex(frame).rank(platform, post_type, sort_by)
+
+    assert list(ranked.index) == list(expected.index)
+
+
+@pytest.mark.parametrize("sort_by", ["Views", "Name"])
+def test_load_more_pages_extend_without_reordering_ties(frame, sort_by):
+    index = RankingIndex(frame)
+    expected = list(_expected(frame, "All", "All", sort_by).index)
+
+    shown = []
+    for limit in range(RANKING_PAGE_SIZE, len(frame) + RANKING_PAGE_SIZE, RANKING_PAGE_SIZE):
+        page = list(index.rank(sort_by=sort_by, limit=limit).index)
+        # Earlier pages keep their rows and order; only new rows are appended
+        assert page[:len(shown)] == shown
+        shown = page
+
+    assert shown == expected
+    assert len(set(shown)) == len(frame)
@@ -0,0 +1,58 @@
+import db
+import synthetic
+from invalidation import ReadCache
+
+
+def _campaign(campaign_id):
+    return {"id": campaign_id, "name": f"Campaign {campaign_id}"}
+
+
+def test_campaign_change_drops_every_token_of_that_campaign_only():
+    cache = ReadCache(max_entries=10, ttl=60)
+    cache.put("a1", _campaign(1), cache.generation)
+    cache.put("a2", _campaign(1), cache.generation)
+    cache.put("b", _campaign(2), cache.generation)
+
+    cache.invalidate_campaign(1)
+
+    assert cache.get("a1") is None
+    assert cache.get("a2") is None
+    assert cache.get("b")["id"] == 2
+
+
+def test_token_change_drops_only_that_token():
+    cache = ReadCache(max_entries=10, ttl=60)
+    cache.put("old", _campaign(1), cache.generation)
+    cache.put("other", _campaign(1), cache.generation)
+
+    cache.invalidate_token("old")
+
+    assert cache.get("old") is None
+    assert cache.get("other")["id"] == 1
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_read_that_raced_an_invalidation_is_not_cached():
+    cache = ReadCache(max_entries=10, ttl=60)
+    generation = cache.generation
+
+    # The row was read, then changed before the result was stored
+    cache.invalidate_campaign(1)
+    cache.put("a", _campaign(1), generation)
+
+    assert cache.get("a") is None
+    cache.put("a", _campaign(1), cache.generation)
+    assert cache.get("a")["id"] == 1
+
+
+def test_shared_link_reflects_a_save_made_after_it_was_cached():
+    db.supabase.reset()
+    synthetic.write_backend(campaigns=1, influencers=3, seed=0, chunk_size=5, batch_size=5)
+    campaign = db.get_campaign(int(next(iter(db.get_campaigns()))))
+    token = campaign['share_token']
+    assert db.get_campaign_by_share_token(token)['name'] == campaign['name']
+
+    campaign['name'] = "Renamed"
+    db.save_campaign(campaign)
+
+    assert db.get_campaign_by_share_token(token)['name'] == "Renamed"
@@ -0,0 +1,35 @@
+import replica
+from local_backend import create_local_client
+
+
+def _influencer(influencer_id, updated_at):
+    return {"id": influencer_id, "campaign_id": 1, "name": f"n{influencer_id}", "platform": "Instagram",
+            "views": influencer_id, "updated_at": updated_at}
+
+
+def test_rows_written_during_a_sync_do_not_push_others_out_of_the_copy(monkeypatch):
+    monkeypatch.setattr(replica, "REPLICA_BATCH_SIZE", 10)
+    primary = create_local_client()
+    primary.table("influencers").upsert(
+        [_influencer(i, None) for i in range(1, 16)]
+        + [_influencer(i, "2026-01-01 00:00:00") for i in range(16, 41)]
+    ).execute()
+
+    pulls = []
+
+    def execute(query, op, rows=0):
+        result = query.execute()
+        if op == "replica.pull_influencers":
+            pulls.append(op)
+            if len(pulls) in (1, 3):
+                # A save on the primary between pages moves an already copied row to the end
+                primary.table("influencers").update({"views": 999, "updated_at": "2026-01-02 00:00:00"}) \
+                    .eq("id", len(pulls)).execute()
+        return result
+
+    copy = replica.Replica(primary, path=":memory:", execute=execute)
+    copy.sync()
+
+    stored = {row["id"]: row for row in copy.local.table("influencers").select("*").execute().data}
+    assert sorted(stored) == list(range(1, 41))
+    assert stored[1]["views"] == stored[3]["views"] == 999
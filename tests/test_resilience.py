@@ -0,0 +1,114 @@
+import httpx
+import pytest
+
+import resilience
+from resilience import BackendUnavailableError, CircuitBreaker
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(resilience.time, 'monotonic', clock)
+    monkeypatch.setattr(resilience.time, 'sleep', lambda seconds: None)
+    return clock
+
+
+@pytest.fixture
+def breaker(monkeypatch, clock):
+    breaker = CircuitBreaker(threshold=2, reset_seconds=30)
+    monkeypatch.setattr(resilience, 'breaker', breaker)
+    return breaker
+
+
+def _failing(calls):
+    def func():
+        calls.append(1)
+        raise httpx.ReadTimeout("timed out")
+    return func
+
+
+def test_breaker_opens_half_opens_and_closes(breaker, clock):
+    breaker.record_failure()
+    assert breaker.state() == "closed"
+    breaker.record_failure()
+    assert breaker.state() == "open"
+    with pytest.raises(BackendUnavailableError):
+        breaker.before_call()
+
+    clock.now += 30
+    assert breaker.state() == "half-open"
+    # One trial call goes through; others are still turned away while it runs
+    breaker.before_call()
+    with pytest.raises(BackendUnavailableError):
+        breaker.before_call()
+
+    breaker.record_success()
+    assert breaker.state() == "closed"
+    breaker.before_call()
+
+
+def test_failed_trial_reopens_the_breaker(breaker, clock):
+    breaker.record_failure()
+    breaker.record_failure()
+    clock.now += 30
+    breaker.before_call()
+
+    breaker.record_failure()
+
+    assert breaker.state() == "open"
+    with pytest.raises(BackendUnavailableError):
+        breaker.before_call()
+
+
+def test_open_breaker_rejects_calls_without_running_them(breaker):
+    calls = []
+    with pytest.raises(BackendUnavailableError):
+        resilience.call(_failing(calls), "test.select", attempts=5)
+    # Two failures open the breaker, so the third attempt never runs
+    assert len(calls) == 2
+
+    with pytest.raises(BackendUnavailableError):
+        resilience.call(lambda: calls.append(1), "test.select")
+    assert len(calls) == 2
+
+
+def test_idempotent_calls_are_retried_until_they_succeed(monkeypatch, clock):
+    monkeypatch.setattr(resilience, 'breaker', CircuitBreaker(threshold=5, reset_seconds=30))
+    calls = []
+
+    def flaky():
+        calls.append(1)
+        if len(calls) < 3:
+            raise httpx.ReadTimeout("timed out")
+        return "ok"
+
+    assert resilience.call(flaky, "test.select", attempts=3) == "ok"
+    assert len(calls) == 3
+
+
+def test_non_idempotent_calls_are_attempted_once(breaker):
+    calls = []
+    with pytest.raises(BackendUnavailableError):
+        resilience.call(_failing(calls), "test.insert", idempotent=False, attempts=3)
+    assert len(calls) == 1
+
+
+def test_errors_the_backend_answered_are_not_retried(breaker):
+    calls = []
+
+    def rejected():
+        calls.append(1)
+        raise ValueError("bad filter")
+
+    with pytest.raises(ValueError):
+        resilience.call(rejected, "test.select", attempts=3)
+    assert len(calls) == 1
+    assert breaker.state() == "closed"
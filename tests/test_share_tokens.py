@@ -0,0 +1,45 @@
+import pytest
+
+import db
+import synthetic
+
+
+@pytest.fixture
+def campaigns():
+    db.supabase.reset()
+    synthetic.write_backend(campaigns=2, influencers=3, seed=0, chunk_size=5, batch_size=5)
+    return [db.get_campaign(int(campaign_id)) for campaign_id in db.get_campaigns()]
+
+
+def test_minting_skips_tokens_already_in_use(campaigns, monkeypatch):
+    taken = campaigns[0]['share_token']
+    candidates = iter([taken, "fresh-token"])
+    monkeypatch.setattr(db.secrets, 'token_urlsafe', lambda nbytes: next(candidates))
+
+    assert db.mint_share_token() == "fresh-token"
+
+
+def test_minting_gives_up_when_every_attempt_collides(campaigns, monkeypatch):
+    taken = campaigns[0]['share_token']
+    monkeypatch.setattr(db.secrets, 'token_urlsafe', lambda nbytes: taken)
+
+    with pytest.raises(RuntimeError):
+        db.mint_share_token()
+
+
+def test_regenerated_token_is_no_longer_resolved_from_the_map(campaigns):
+    first, second = campaigns
+    old_token = first['share_token']
+    assert db.get_campaign_by_share_token(old_token)['id'] == first['id']
+
+    first['share_token'] = db.mint_share_token()
+    db.save_campaign(first)
+
+    assert db.get_campaign_by_share_token(old_token) is None
+    assert db.get_campaign_by_share_token(first['share_token'])['id'] == first['id']
+
+    # The old token handed to another campaign resolves to that campaign
+    second['share_token'] = old_token
+    db.save_campaign(second)
+
+    assert db.get_campaign_by_share_token(old_token)['id'] == second['id']
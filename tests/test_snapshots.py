@@ -0,0 +1,93 @@
+import json
+import re
+
+import db
+import snapshots
+
+HOSTILE = "</script><script>alert(1)</script><!--"
+
+
+def _campaign(platform):
+    influencers = [
+        {"id": i, "name": f"Creator {i}", "username": f"creator{i}", "platform": platform,
+         "post_type": platform, "views": 100 * (i + 1), "likes": 10, "shares": 1, "comments": 2, "post_url": ""}
+        for i in range(3)
+    ]
+    return {
+        "id": 1,
+        "name": "Launch",
+        "created_at": "2026-01-01 00:00:00",
+        "share_token": "hostile",
+        "budget": 1000.0,
+        "metrics": {"total_views": 600, "total_likes": 30, "total_shares": 3, "total_comments": 6},
+        "sharing_settings": dict(snapshots.DEFAULT_SHARING_SETTINGS),
+        "influencers": influencers,
+    }
+
+
+def test_publish_escapes_chart_data_in_html_report(tmp_path, monkeypatch):
+    monkeypatch.setattr(snapshots, "SNAPSHOT_DIR", str(tmp_path))
+    monkeypatch.setattr(snapshots, "SNAPSHOT_MODE", "sync")
+
+    snapshots.publish(_campaign(HOSTILE))
+
+    report = (tmp_path / "reports" / "hostile.html").read_text(encoding="utf-8")
+    assert HOSTILE not in report
+    assert "</script><script>alert(1)" not in report
+    # Every inline script still ends where the report put its closing tag
+    for script in re.findall(r"<script>(.*?)</script>", report, flags=re.S):
+        assert script.startswith("Plotly.newPlot(")
+        assert "<!--" not in script
+
+
+def _published(tmp_path, campaign):
+    snapshots.publish(campaign)
+    return json.loads((tmp_path / "reports" / f"{campaign['share_token']}.json").read_text(encoding="utf-8"))
+
+
+def test_bundle_leaves_out_sections_the_link_does_not_share(tmp_path, monkeypatch):
+    monkeypatch.setattr(snapshots, "SNAPSHOT_DIR", str(tmp_path))
+    monkeypatch.setattr(snapshots, "SNAPSHOT_MODE", "sync")
+    campaign = _campaign("Instagram")
+    campaign["sharing_settings"].update(include_influencer_details=False, include_engagement_metrics=False)
+
+    bundle = _published(tmp_path, campaign)
+
+    assert bundle["campaign"]["influencers"] == []
+    assert bundle["campaign"]["influencer_count"] == 3
+    assert set(bundle["campaign"]["metrics"]) == {"total_views", "total_likes"}
+    assert bundle["charts"]["engagement_by_platform"] is None
+    assert bundle["charts"]["efficiency_gauge"] is None
+    assert "Creator 0" not in json.dumps(bundle)
+
+
+def test_bundle_rows_drop_engagement_fields_when_engagement_is_hidden(tmp_path, monkeypatch):
+    monkeypatch.setattr(snapshots, "SNAPSHOT_DIR", str(tmp_path))
+    monkeypatch.setattr(snapshots, "SNAPSHOT_MODE", "sync")
+    campaign = _campaign("Instagram")
+    campaign["sharing_settings"]["include_engagement_metrics"] = False
+
+    rows = _published(tmp_path, campaign)["campaign"]["influencers"]
+
+    assert len(rows) == 3
+    assert all(not {"likes", "shares", "comments"} & set(row) for row in rows)
+
+
+def test_bulk_writes_withdraw_the_stale_snapshot(tmp_path, monkeypatch):
+    monkeypatch.setattr(snapshots, "SNAPSHOT_DIR", str(tmp_path))
+    monkeypatch.setattr(snapshots, "SNAPSHOT_MODE", "sync")
+    db.supabase.reset()
+    campaign = _campaign("Instagram")
+    campaign["id"] = db.generate_numeric_ids(1)[0]
+    for inf in campaign["influencers"]:
+        inf["id"] = None
+    db.save_campaign(campaign)
+    assert snapshots.load_snapshot("hostile") is not None
+
+    db.delete_influencers_bulk([campaign["influencers"][0]["id"]])
+    assert snapshots.load_snapshot("hostile") is None
+
+    db.save_campaign(db.get_campaign(campaign["id"]))
+    assert snapshots.load_snapshot("hostile") is not None
+    db.save_influencers_bulk([dict(campaign["influencers"][1], views=5)])
+    assert snapshots.load_snapshot("hostile") is None
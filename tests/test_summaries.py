@@ -0,0 +1,42 @@
+import db
+import shared_state
+import synthetic
+
+
+def test_bulk_loaded_campaigns_get_summary_rows():
+    db.supabase.reset()
+    rows, count = synthetic.write_backend(campaigns=3, influencers=300, seed=0, chunk_size=50, batch_size=40)
+
+    summaries, _ = db.get_campaign_summaries()
+    assert db.count_campaigns() == count == 3
+    assert sum(row['influencer_count'] for row in summaries) == rows == 300
+    stored = db.get_campaigns()
+    for row in summaries:
+        campaign = stored[str(row['campaign_id'])]
+        assert row['total_views'] == sum(inf['views'] for inf in campaign['influencers'])
+
+
+def test_direct_deletes_update_summaries_and_announce_the_change():
+    db.supabase.reset()
+    synthetic.write_backend(campaigns=2, influencers=20, seed=0, chunk_size=20, batch_size=20)
+    campaign = db.get_campaign(int(next(iter(db.get_campaigns()))))
+    doomed = campaign['influencers'][:3]
+    seq = shared_state.latest_seq()
+
+    assert db.delete_influencers_bulk([inf['id'] for inf in doomed]) == 3
+
+    summary = next(row for row in db.get_campaign_summaries()[0] if row['campaign_id'] == campaign['id'])
+    assert summary['influencer_count'] == len(campaign['influencers']) - 3
+    assert summary['total_views'] == sum(inf['views'] for inf in campaign['influencers'][3:])
+    assert shared_state.latest_seq() != seq
+
+
+def test_bulk_writes_announce_the_change():
+    db.supabase.reset()
+    synthetic.write_backend(campaigns=1, influencers=10, seed=0, chunk_size=10, batch_size=10)
+    campaign = db.get_campaign(int(next(iter(db.get_campaigns()))))
+    seq = shared_state.latest_seq()
+
+    db.save_influencers_bulk([dict(campaign['influencers'][0], views=1)])
+
+    assert shared_state.latest_seq() != seq
@@ -0,0 +1,34 @@
+import pytest
+
+import db
+import synthetic
+from resilience import BackendUnavailableError
+from undo import remember_influencer_delete, undo_last
+
+
+def test_failed_undo_stays_on_the_stack_and_can_be_retried(monkeypatch):
+    db.supabase.reset()
+    synthetic.write_backend(campaigns=1, influencers=5, seed=0, chunk_size=5, batch_size=5)
+    campaign = db.get_campaign(int(next(iter(db.get_campaigns()))))
+    views = campaign['metrics']['total_views']
+    session_state = {"campaigns": {str(campaign['id']): campaign}}
+
+    removed = campaign['influencers'][:2]
+    campaign['influencers'] = campaign['influencers'][2:]
+    campaign['metrics']['total_views'] -= sum(inf['views'] for inf in removed)
+    db.save_campaign(campaign)
+    remember_influencer_delete(session_state, campaign, removed)
+
+    def unavailable(campaign_data):
+        raise BackendUnavailableError("The database is not responding")
+    monkeypatch.setattr(db, 'save_campaign', unavailable)
+    with pytest.raises(BackendUnavailableError):
+        undo_last(session_state)
+    assert len(session_state["undo_stack"]) == 1
+
+    monkeypatch.undo()
+    assert undo_last(session_state).startswith("Restored")
+    assert session_state["undo_stack"] == []
+    stored = db.get_campaign(campaign['id'])
+    assert len(stored['influencers']) == 5
+    assert stored['metrics']['total_views'] == views
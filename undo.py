@@ -0,0 +1,88 @@
+from campaign_summaries import METRIC_TOTALS
+from concurrency import EditConflictError
+
+# In-session undo stack for deletes.
+#
+# Deletes are soft (db.py only tombstones the rows), so undoing one restores
+# the tombstoned campaign or re-saves the removed influencers. This works
+# until purge.py hard-deletes the rows (LTCO_PURGE_AFTER_HOURS later).
+
+UNDO_DEPTH = 20
+
+
+def _push(session_state, entry):
+    if "undo_stack" not in session_state:
+        session_state["undo_stack"] = []
+    stack = session_state["undo_stack"]
+    stack.append(entry)
+    del stack[:-UNDO_DEPTH]
+
+
+def remember_campaign_delete(session_state, campaign):
+    """Record a deleted campaign so undo_last() can restore it"""
+    _push(session_state, {
+        "kind": "campaign",
+        "campaign_id": campaign["id"],
+        "label": f"campaign '{campaign['name']}'",
+    })
+
+
+def remember_influencer_delete(session_state, campaign, influencers):
+    """Record influencers removed from a campaign so undo_last() can add them back"""
+    names = ", ".join(inf["name"] for inf in influencers[:3]) + ("..." if len(influencers) > 3 else "")
+    _push(session_state, {
+        "kind": "influencers",
+        "campaign_id": str(campaign["id"]),
+        "influencers": [dict(inf) for inf in influencers],
+        "label": names,
+    })
+
+
+def last_label(session_state):
+    """Describe what undo_last() would restore, or None if there is nothing to undo"""
+    stack = session_state.get("undo_stack") or []
+    return stack[-1]["label"] if stack else None
+
+
+def undo_last(session_state):
+    """Undo the most recent delete in this session and return a message for the user.
+
+    The entry stays on the stack unless the undo went through (or can never
+    work), so it can be tried again; BackendUnavailableError is raised for
+    the caller to report like a failed save.
+    """
+    import db
+    from shared_state import reload_campaign
+
+    stack = session_state["undo_stack"]
+    entry = stack[-1]
+    campaigns = session_state["campaigns"]
+
+    if entry["kind"] == "campaign":
+        campaign = db.restore_campaign(entry["campaign_id"])
+        stack.pop()
+        if campaign is None:
+            return f"{entry['label']} was already removed for good and can't be restored"
+        campaigns[str(entry["campaign_id"])] = campaign
+        return f"Restored {entry['label']}"
+
+    campaign = campaigns.get(entry["campaign_id"])
+    if campaign is None:
+        stack.pop()
+        return f"Can't restore {entry['label']}: the campaign no longer exists"
+
+    # Rows restored by an earlier attempt that failed to save are still in the session
+    present = {inf["id"] for inf in campaign["influencers"]}
+    restored = [inf for inf in entry["influencers"] if inf["id"] not in present]
+    campaign["influencers"].extend(restored)
+    metrics = campaign.setdefault("metrics", {})
+    for field, total in METRIC_TOTALS.items():
+        metrics[total] = metrics.get(total, 0) + sum(int(inf.get(field, 0)) for inf in restored)
+
+    try:
+        db.save_campaign(campaign)
+    except EditConflictError as e:
+        reload_campaign(session_state, campaign["id"])
+        return str(e)
+    stack.pop()
+    return f"Restored {entry['label']}"